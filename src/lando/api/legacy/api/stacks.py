@@ -28,11 +28,14 @@ from lando.api.legacy.revisions import (
 )
 from lando.api.legacy.stacks import (
     build_stack_graph,
-    calculate_landable_subgraphs,
     get_landable_repos_for_revision_data,
+    get_landable_subgraphs,
     request_extended_revision_data,
 )
-from lando.api.legacy.transplants import get_blocker_checks
+from lando.api.legacy.transplants import (
+    get_blocker_checks,
+    get_blocker_checks_context,
+)
 from lando.api.legacy.users import user_search
 from lando.main.auth import require_phabricator_api_key
 from lando.main.models import Repo
@@ -51,8 +54,17 @@ def get(phab: PhabricatorClient, request: HttpRequest, revision_id: int):
     Args:
         revision_id: (int) ID of the revision in 'D{number}' format
     """
-    revision = phab.call_conduit(
-        "differential.revision.search", constraints={"ids": [revision_id]}
+    # The projects used by the checks don't depend on the stack, so they are
+    # looked up at the same time as the revision.
+    revision, release_managers, secure_project_phid, sec_approval_project_phid = (
+        phab.gather(
+            lambda: phab.call_conduit(
+                "differential.revision.search", constraints={"ids": [revision_id]}
+            ),
+            lambda: get_release_managers(phab),
+            lambda: get_secure_project_phid(phab),
+            lambda: get_sec_approval_project_phid(phab),
+        )
     )
     revision = phab.single(revision, "data", none_when_empty=True)
     if revision is None:
@@ -67,7 +79,6 @@ def get(phab: PhabricatorClient, request: HttpRequest, revision_id: int):
     supported_repos = Repo.get_mapping()
     landable_repos = get_landable_repos_for_revision_data(stack_data, supported_repos)
 
-    release_managers = get_release_managers(phab)
     if not release_managers:
         raise Exception("Could not find `#release-managers` project on Phabricator.")
 
@@ -79,8 +90,12 @@ def get(phab: PhabricatorClient, request: HttpRequest, revision_id: int):
         stack_data=stack_data,
     )
 
-    landable, blocked = calculate_landable_subgraphs(
-        stack_data, edges, landable_repos, other_checks=other_checks
+    landable, blocked = get_landable_subgraphs(
+        stack_data,
+        edges,
+        landable_repos,
+        other_checks=other_checks,
+        context=get_blocker_checks_context(supported_repos, relman_group_phid),
     )
     uplift_repos = [
         name for name, repo in supported_repos.items() if repo.approval_required
@@ -92,14 +107,14 @@ def get(phab: PhabricatorClient, request: HttpRequest, revision_id: int):
 
     involved_phids = list(involved_phids)
 
-    users = user_search(phab, involved_phids)
-    projects = project_search(phab, involved_phids)
+    users, projects = phab.gather(
+        lambda: user_search(phab, involved_phids),
+        lambda: project_search(phab, involved_phids),
+    )
 
-    secure_project_phid = get_secure_project_phid(phab)
     if not secure_project_phid:
         raise Exception("Could not find `#secure-revision` project on Phabricator.")
 
-    sec_approval_project_phid = get_sec_approval_project_phid(phab)
     if not sec_approval_project_phid:
         raise Exception("Could not find `#sec-approval` project on Phabricator.")
 
@@ -108,9 +123,16 @@ def get(phab: PhabricatorClient, request: HttpRequest, revision_id: int):
         for member in release_managers["attachments"]["members"]["members"]
     }
 
+    lando_revisions = {
+        revision.revision_id: revision
+        for revision in Revision.objects.filter(
+            revision_id__in=[r["id"] for r in stack_data.revisions.values()]
+        ).prefetch_related("landing_jobs")
+    }
+
     revisions_response = []
     for _phid, phab_revision in stack_data.revisions.items():
-        lando_revision = Revision.one_or_none(revision_id=phab_revision["id"])
+        lando_revision = lando_revisions.get(phab_revision["id"])
         revision_phid = PhabricatorClient.expect(phab_revision, "phid")
         fields = PhabricatorClient.expect(phab_revision, "fields")
         diff_phid = PhabricatorClient.expect(fields, "diffPHID")
@@ -30,14 +30,15 @@ from lando.api.legacy.revisions import (
     find_title_and_summary_for_landing,
     gather_involved_phids,
     get_bugzilla_bug,
+    get_diff_base_revision,
     revision_is_secure,
     select_diff_author,
 )
 from lando.api.legacy.stacks import (
     RevisionData,
     build_stack_graph,
-    calculate_landable_subgraphs,
     get_landable_repos_for_revision_data,
+    get_landable_subgraphs,
     request_extended_revision_data,
 )
 from lando.api.legacy.transplants import (
@@ -46,6 +47,7 @@ from lando.api.legacy.transplants import (
     check_landing_warnings,
     convert_path_id_to_phid,
     get_blocker_checks,
+    get_blocker_checks_context,
 )
 from lando.api.legacy.users import user_search
 from lando.api.legacy.validation import (
@@ -142,8 +144,12 @@ def _assess_transplant_request(
         stack_data=stack_data,
     )
 
-    landable, blocked = calculate_landable_subgraphs(
-        stack_data, edges, landable_repos, other_checks=other_checks
+    landable, blocked = get_landable_subgraphs(
+        stack_data,
+        edges,
+        landable_repos,
+        other_checks=other_checks,
+        context=get_blocker_checks_context(supported_repos, relman_group_phid),
     )
 
     assessment = check_landing_blockers(
@@ -345,6 +351,12 @@ def post(phab: PhabricatorClient, request: HttpRequest, data: dict):
             lando_revision = Revision(revision_id=revision_id)
 
         lando_revision.diff_id = diff_id
+        # The base revision lets the landing worker merge the patch if it doesn't
+        # apply cleanly anymore.
+        lando_revision.data = {
+            **lando_revision.data,
+            "base_revision": get_diff_base_revision(diff),
+        }
         lando_revision.save()
 
         revision_reviewers[lando_revision.id] = get_approved_by_ids(
@@ -395,7 +407,10 @@ def post(phab: PhabricatorClient, request: HttpRequest, data: dict):
     add_revisions_to_job(lando_revisions, job)
     logger.info(f"Setting {revision_reviewers} reviewer data on each revision.")
     for revision in lando_revisions:
-        revision.data = {"approved_by": revision_reviewers[revision.id]}
+        revision.data = {
+            **revision.data,
+            "approved_by": revision_reviewers[revision.id],
+        }
         revision.save()
 
     # Submit landing job.
@@ -28,8 +28,10 @@ def reposetup(ui, repo):
 
 
 def extsetup(ui):
-    entry = extensions.wrapcommand(commands.table, b"commit", commitcommand)
-    options = entry[1]
-    options.append(
-        (b"", b"landing_system", b"", b"set commit's landing-system identifier")
-    )
+    # `import` commits each patch it applies, like `commit` does.
+    for command in (b"commit", b"import"):
+        entry = extensions.wrapcommand(commands.table, command, commitcommand)
+        options = entry[1]
+        options.append(
+            (b"", b"landing_system", b"", b"set commit's landing-system identifier")
+        )
@@ -3,7 +3,7 @@ from typing import Optional
 
 from django.core.cache import cache
 
-from lando.utils.phabricator import PhabricatorClient, result_list_to_phid_dict
+from lando.utils.phabricator import PROJECT_CACHE, PhabricatorClient
 
 logger = logging.getLogger(__name__)
 
@@ -44,19 +44,10 @@ def project_search(
     if not project_phids:
         return {}
 
-    project_phids = list(project_phids)
-    project_phids.sort()
-    cache_key = ",".join(project_phids)
-
-    if cache.has_key(cache_key):
-        return cache.get(cache_key)
-
-    projects = phabricator.call_conduit(
-        "project.search", constraints={"phids": project_phids}
+    return phabricator.memoize(
+        ("project.search", frozenset(project_phids)),
+        lambda: PROJECT_CACHE.search(phabricator, project_phids),
     )
-    result = result_list_to_phid_dict(phabricator.expect(projects, "data"))
-    cache.set(cache_key, result)
-    return result
 
 
 def get_project_phid(
@@ -113,7 +104,12 @@ def get_testing_tag_project_phids(
     phabricator: PhabricatorClient,
 ) -> Optional[list[str]]:
     """Return phids for the testing tag projects."""
-    tags = [get_project_phid(slug, phabricator) for slug in TESTING_TAG_PROJ_SLUGS]
+    tags = phabricator.gather(
+        *(
+            lambda slug=slug: get_project_phid(slug, phabricator)
+            for slug in TESTING_TAG_PROJ_SLUGS
+        )
+    )
     return [t for t in tags if t is not None]
 
 
@@ -131,9 +127,13 @@ def get_sec_approval_project_phid(phabricator: PhabricatorClient) -> Optional[st
 
 def get_release_managers(phab: PhabricatorClient) -> Optional[dict]:
     """Load the release-managers group details from Phabricator"""
-    groups = phab.call_conduit(
-        "project.search",
-        attachments={"members": True},
-        constraints={"slugs": [RELMAN_PROJECT_SLUG]},
-    )
-    return phab.single(groups, "data")
+
+    def fetch():
+        groups = phab.call_conduit(
+            "project.search",
+            attachments={"members": True},
+            constraints={"slugs": [RELMAN_PROJECT_SLUG]},
+        )
+        return phab.single(groups, "data")
+
+    return phab.memoize(("release_managers",), fetch)
@@ -113,6 +113,15 @@ def select_diff_author(diff: dict) -> tuple[Optional[str], Optional[str]]:
     return authors[0][0] if authors else (None, None)
 
 
+def get_diff_base_revision(diff: dict) -> Optional[str]:
+    """Return the commit the diff was created on top of, if known to Phabricator."""
+    refs = PhabricatorClient.expect(diff, "fields").get("refs", [])
+    for ref in refs:
+        if ref.get("type") == "base":
+            return ref.get("identifier")
+    return None
+
+
 def get_bugzilla_bug(revision: dict) -> Optional[int]:
     bug = PhabricatorClient.expect(revision, "fields").get("bugzilla.bug-id")
     return int(bug) if bug else None
@@ -10,11 +10,14 @@ from typing import (
     Optional,
 )
 
-import networkx as nx
+from django.conf import settings
 
-from lando.main.models import Repo
+from lando.main.models import Repo, StackIndex
 from lando.utils.phabricator import (
+    DIFF_CACHE,
+    REPOSITORY_CACHE,
     PhabricatorClient,
+    PhabricatorCommunicationException,
     PhabricatorRevisionStatus,
     result_list_to_phid_dict,
 )
@@ -63,6 +66,15 @@ def request_extended_revision_data(
     if not revision_phids:
         return RevisionData({}, {}, {})
 
+    return phab.memoize(
+        ("revision_data", frozenset(revision_phids)),
+        lambda: _request_extended_revision_data(phab, revision_phids),
+    )
+
+
+def _request_extended_revision_data(
+    phab: PhabricatorClient, revision_phids: list[str]
+) -> RevisionData:
     revs = phab.call_conduit(
         "differential.revision.search",
         constraints={"phids": revision_phids},
@@ -76,45 +88,89 @@ def request_extended_revision_data(
     phab.expect(revs, "data", len(revision_phids) - 1)
     revs = result_list_to_phid_dict(phab.expect(revs, "data"))
 
-    diffs = phab.call_conduit(
-        "differential.diff.search",
-        constraints={
-            "phids": [phab.expect(r, "fields", "diffPHID") for r in revs.values()]
-        },
-        attachments={"commits": True},
-        limit=len(revs),
+    # The repositories of the revisions can be searched for at the same time as
+    # the diffs, as the diffs are almost always in the same repositories.
+    rev_repo_phids = {
+        phab.expect(r, "fields", "repositoryPHID") for r in revs.values()
+    } - {None}
+    # Diffs are cached until their revision is modified, e.g. by a new diff.
+    diff_versions = {
+        phab.expect(r, "fields", "diffPHID"): phab.expect(r, "fields", "dateModified")
+        for r in revs.values()
+    }
+    diffs, repos = phab.gather(
+        lambda: DIFF_CACHE.search(phab, diff_versions, versions=diff_versions),
+        lambda: _search_repositories(phab, rev_repo_phids),
     )
-    phab.expect(diffs, "data", len(revision_phids) - 1)
-    diffs = result_list_to_phid_dict(phab.expect(diffs, "data"))
+    if len(diffs) != len(diff_versions):
+        raise PhabricatorCommunicationException(
+            "Phabricator responded with unexpected data"
+        )
 
-    repo_phids = [phab.expect(r, "fields", "repositoryPHID") for r in revs.values()] + [
+    diff_repo_phids = {
         phab.expect(d, "fields", "repositoryPHID") for d in diffs.values()
-    ]
-    repo_phids = {phid for phid in repo_phids if phid is not None}
-    if repo_phids:
-        repos = phab.call_conduit(
-            "diffusion.repository.search",
-            attachments={"projects": True},
-            constraints={"phids": list(repo_phids)},
-            limit=len(repo_phids),
-        )
-        phab.expect(repos, "data", len(repo_phids) - 1)
-        repos = result_list_to_phid_dict(phab.expect(repos, "data"))
-    else:
-        repos = {}
+    } - {None}
+    if diff_repo_phids - rev_repo_phids:
+        repos.update(_search_repositories(phab, diff_repo_phids - rev_repo_phids))
 
     return RevisionData(revs, diffs, repos)
 
 
-class RevisionStack(nx.DiGraph):
-    def __init__(self, nodes: set[str], edges: set[tuple[str, str]]):
-        super().__init__(
-            # Reverse the order of the nodes in the edges set as `networkx`
-            # represents `a -> b` as `(a, b)` but Lando uses `(b, a)`.
-            (successor, predecessor)
-            for predecessor, successor in edges
+def _search_repositories(phab: PhabricatorClient, repo_phids: set[str]) -> dict:
+    """Return a dictionary mapping phid to repository data for `repo_phids`."""
+    if not repo_phids:
+        return {}
+
+    repos = REPOSITORY_CACHE.search(phab, repo_phids)
+    if len(repos) != len(repo_phids):
+        raise PhabricatorCommunicationException(
+            "Phabricator responded with unexpected data"
         )
-        self.add_nodes_from(nodes)
+    return repos
+
+
+class RevisionStack:
+    """A directed acyclic graph of the revisions in a stack.
+
+    The graph is stored as adjacency lists, with an edge from each revision to the
+    revisions which depend on it, so that walking successors goes from the root of
+    the stack towards its heads.
+    """
+
+    __slots__ = ("_successors", "_predecessors")
+
+    def __init__(self, nodes: set[str], edges: set[tuple[str, str]]):
+        # Adjacency lists, as dictionaries to keep them ordered and deduplicated.
+        self._successors: dict[str, dict[str, None]] = {}
+        self._predecessors: dict[str, dict[str, None]] = {}
+
+        # Lando represents `a -> b` as `(b, a)`, i.e. as (child, parent).
+        for successor, predecessor in edges:
+            self.add_node(predecessor)
+            self.add_node(successor)
+            self._successors[predecessor][successor] = None
+            self._predecessors[successor][predecessor] = None
+
+        for node in nodes:
+            self.add_node(node)
+
+    def add_node(self, node: str):
+        """Add `node` to the graph, if it isn't in it already."""
+        if node not in self._successors:
+            self._successors[node] = {}
+            self._predecessors[node] = {}
+
+    @property
+    def nodes(self) -> Iterable[str]:
+        return self._successors.keys()
+
+    def successors(self, node: str) -> Iterator[str]:
+        """Iterate over the revisions which depend on `node`."""
+        return iter(self._successors[node])
+
+    def predecessors(self, node: str) -> Iterator[str]:
+        """Iterate over the revisions `node` depends on."""
+        return iter(self._predecessors[node])
 
     def root_revisions(self) -> Iterator[str]:
         """Iterate over the set of root revisions in the stack.
@@ -130,13 +186,19 @@ class RevisionStack(nx.DiGraph):
 
         `set(stack.root_revisions()) == {"D", "E"}`.
         """
-        return (node for node, degree in self.in_degree if degree == 0)
+        return (
+            node
+            for node, predecessors in self._predecessors.items()
+            if not predecessors
+        )
 
     def iter_stack_from_root(self, dest: str) -> Iterator[str]:
         """Iterate over the revisions in the stack starting from the root.
 
         Walks from one of the root nodes of the graphs to `dest`. If multiple
         root nodes exist, it will select one naively.
+
+        This takes time linear in the number of ancestors of `dest`.
         """
         root = next(self.root_revisions())
 
@@ -144,18 +206,57 @@ class RevisionStack(nx.DiGraph):
             yield root
             return
 
-        paths = list(nx.all_simple_paths(self, root, dest))
-
-        if not paths:
+        # Find the ancestors of `dest`, which are the only nodes a path to it can
+        # go through.
+        ancestors = {dest}
+        to_process = [dest]
+        while to_process:
+            for parent in self._predecessors[to_process.pop()]:
+                if parent not in ancestors:
+                    ancestors.add(parent)
+                    to_process.append(parent)
+
+        if root not in ancestors:
             raise ValueError(f"Graph has no paths from {root} to {dest}.")
 
-        if len(paths) > 1:
-            raise ValueError(f"Graph has multiple paths from {root} to {dest}: {paths}")
+        # Count the paths from the root to each ancestor, in topological order,
+        # stopping at two since we only need to know if the path is unique.
+        remaining_parents = {
+            node: sum(parent in ancestors for parent in self._predecessors[node])
+            for node in ancestors
+        }
+        path_counts = dict.fromkeys(ancestors, 0)
+        path_counts[root] = 1
+        to_process = [node for node, count in remaining_parents.items() if not count]
+        while to_process:
+            node = to_process.pop()
+            for child in self._successors[node]:
+                if child not in ancestors:
+                    continue
+                path_counts[child] = min(path_counts[child] + path_counts[node], 2)
+                remaining_parents[child] -= 1
+                if not remaining_parents[child]:
+                    to_process.append(child)
+
+        if not path_counts[dest]:
+            raise ValueError(f"Graph has no paths from {root} to {dest}.")
 
-        path = paths[0]
+        if path_counts[dest] > 1:
+            raise ValueError(f"Graph has multiple paths from {root} to {dest}.")
+
+        # Walk back from `dest` along the only parents which have a path from the
+        # root.
+        path = [dest]
+        while path[-1] != root:
+            path.append(
+                next(
+                    parent
+                    for parent in self._predecessors[path[-1]]
+                    if parent in ancestors and path_counts[parent]
+                )
+            )
 
-        for node in path:
-            yield node
+        yield from reversed(path)
 
 
 def calculate_landable_subgraphs(
@@ -248,6 +349,7 @@ def calculate_landable_subgraphs(
     # All of the roots may not be open so we need to walk from them
     # and find the first open revision along each path.
     to_process = roots
+    visited = set(roots)
     roots = set()
     while to_process:
         phid = to_process.pop()
@@ -255,63 +357,80 @@ def calculate_landable_subgraphs(
             roots.add(phid)
             continue
 
-        to_process.update(stack.successors(phid))
+        for child in stack.successors(phid):
+            if child not in visited:
+                visited.add(child)
+                to_process.add(child)
 
     # Because `roots` may no longer contain just true roots of the DAG,
     # a "root" could be the descendent of another. Filter out these "roots".
     to_process = set()
     for root in roots:
         to_process.update(stack.successors(root))
+    visited = set(to_process)
     while to_process:
         phid = to_process.pop()
         roots.discard(phid)
-        to_process.update(stack.successors(phid))
+        for child in stack.successors(phid):
+            if child not in visited:
+                visited.add(child)
+                to_process.add(child)
 
     # Filter out roots that we have blocked already.
     roots = roots - blocked.keys()
 
+    # The reason each revision checked so far is blocked, or None.
+    reasons = {}
+
+    def blocked_by(phid):
+        if phid not in reasons:
+            reasons[phid] = _blocked_by(
+                phid, revision_data, statuses, stack, blocked, other_checks=other_checks
+            )
+        return reasons[phid]
+
     # Do a pass over the roots to check if they're blocked, so we only
     # start landable paths with unblocked roots.
     to_process = roots
     roots = set()
     for root in to_process:
-        reason = _blocked_by(
-            root, revision_data, statuses, stack, blocked, other_checks=other_checks
-        )
+        reason = blocked_by(root)
         if reason is None:
             roots.add(root)
         else:
             block(root, reason)
 
-    # Now walk from the unblocked roots to identify landable paths.
+    # Now walk from the unblocked roots to identify landable paths. A landable
+    # revision has a single open parent, so rather than copying paths as we walk
+    # we keep a pointer to the parent we reached each revision from, and only
+    # build the paths once we reach their heads.
     landable = roots.copy()
+    parent_of = dict.fromkeys(roots)
     paths = []
-    to_process = [[root] for root in roots]
+    to_process = list(roots)
     while to_process:
-        path = to_process.pop()
+        phid = to_process.pop()
 
         valid_children = []
-        for child in stack.successors(path[-1]):
+        for child in stack.successors(phid):
             if statuses[child].closed:
                 continue
 
-            reason = _blocked_by(
-                child,
-                revision_data,
-                statuses,
-                stack,
-                blocked,
-                other_checks=other_checks,
-            )
+            reason = blocked_by(child)
             if reason is None:
                 valid_children.append(child)
                 landable.add(child)
+                parent_of[child] = phid
             else:
                 block(child, reason)
 
         if valid_children:
-            to_process.extend([path + [child] for child in valid_children])
+            to_process.extend(valid_children)
         else:
+            path = [phid]
+            while parent_of[path[-1]] is not None:
+                path.append(parent_of[path[-1]])
+            path.reverse()
             paths.append(path)
 
     # Do one final pass to set blocked for anything that's not landable and
@@ -323,6 +442,48 @@ def calculate_landable_subgraphs(
     return paths, blocked
 
 
+def get_landable_subgraphs(
+    revision_data: RevisionData,
+    edges: set[tuple[str, str]],
+    landable_repos: Container[str],
+    *,
+    other_checks: Iterable[Callable[[dict, dict, dict], Optional[str]]] = [],
+    context: Iterable[str] = (),
+) -> tuple[list[list[str]], dict[str, str]]:
+    """Return the landable paths and blockers of a stack, using the stack index.
+
+    See `calculate_landable_subgraphs`. If `settings.STACK_INDEX_ENABLED`, the
+    result is read from the `StackIndex` of the stack if it is up to date, and
+    stored in it otherwise.
+
+    Args:
+        context: Strings identifying anything `other_checks` depend on besides the
+            revision, diff and repository data, such as the release managers'
+            group PHID. They are part of the index key, along with the PHIDs of
+            `landable_repos`.
+    """
+    if not settings.STACK_INDEX_ENABLED:
+        return calculate_landable_subgraphs(
+            revision_data, edges, landable_repos, other_checks=other_checks
+        )
+
+    key = StackIndex.build_key(
+        revision_data.revisions,
+        revision_data.repositories,
+        edges,
+        context=[*context, *(f"landable:{phid}" for phid in landable_repos)],
+    )
+    index = StackIndex.lookup(key)
+    if index is not None:
+        return index.landable_paths, index.blockers
+
+    landable, blocked = calculate_landable_subgraphs(
+        revision_data, edges, landable_repos, other_checks=other_checks
+    )
+    StackIndex.store(key, revision_data.revisions.keys(), edges, landable, blocked)
+    return landable, blocked
+
+
 def _blocked_by(
     phid: str,
     revision_data: RevisionData,
@@ -345,7 +506,7 @@ def _blocked_by(
     for parent in open_parents:
         if parent in blocked:
             return "Depends on D{} which is open and blocked.".format(
-                PhabricatorClient.expect(revision_data[parent], "id")
+                PhabricatorClient.expect(revision_data.revisions[parent], "id")
             )
 
     if open_parents:
@@ -4,8 +4,7 @@ import json
 import logging
 from collections import namedtuple
 from datetime import datetime, timezone
-
-import requests
+from typing import Optional
 
 from lando.api.legacy.reviews import calculate_review_extra_state, reviewer_identity
 from lando.api.legacy.revisions import (
@@ -28,6 +27,7 @@ from lando.utils.phabricator import (
     PhabricatorRevisionStatus,
     ReviewerStatus,
 )
+from lando.utils.product_details import get_product_details
 
 logger = logging.getLogger(__name__)
 
@@ -129,10 +129,68 @@ class TransplantAssessment:
             raise LegacyAPIException(400, error_message, details)
 
 
+def prefetch_landed_jobs(to_land, **kwargs) -> dict[int, LandingJob]:
+    """Return the most recent landed job of each revision in `to_land`, by id."""
+    revision_ids = {PhabricatorClient.expect(revision, "id") for revision, _ in to_land}
+    jobs = (
+        LandingJob.revisions_query(revision_ids)
+        .filter(status=LandingJobStatus.LANDED)
+        .order_by("-updated_at")
+        .prefetch_related("unsorted_revisions")
+    )
+
+    landed_jobs = {}
+    for job in jobs:
+        job_revision_ids = {
+            revision.revision_id for revision in job.unsorted_revisions.all()
+        } | {int(revision_id) for revision_id in job.revision_to_diff_id or {}}
+        for revision_id in job_revision_ids & revision_ids:
+            landed_jobs.setdefault(revision_id, job)
+    return landed_jobs
+
+
+def prefetch_diff_warnings(to_land, **kwargs) -> dict[tuple[int, int], list]:
+    """Return the data of the active warnings of each (revision id, diff id)."""
+    diff_ids = {
+        (PhabricatorClient.expect(revision, "id"), PhabricatorClient.expect(diff, "id"))
+        for revision, diff in to_land
+    }
+    warnings = DiffWarning.objects.filter(
+        revision_id__in={revision_id for revision_id, _ in diff_ids},
+        status=DiffWarningStatus.ACTIVE,
+    )
+
+    diff_warnings = {}
+    for warning in warnings:
+        key = (warning.revision_id, warning.diff_id)
+        if key in diff_ids:
+            diff_warnings.setdefault(key, []).append(warning.data)
+    return diff_warnings
+
+
+def prefetch_product_details(to_land, *, repo, **kwargs) -> Optional[dict]:
+    """Return the product details of the repository being landed to.
+
+    An empty dictionary is returned if the repository has no product details, and
+    None if they could not be retrieved.
+    """
+    supported_repos = Repo.get_mapping()
+    try:
+        repo_details = supported_repos[repo["fields"]["shortName"]]
+    except KeyError:
+        return {}
+
+    if not repo_details.product_details_url:
+        # Repo does not have a product details URL.
+        return {}
+
+    return get_product_details(repo_details.product_details_url)
+
+
 class RevisionWarningCheck:
     _warning_ids = set()
 
-    def __init__(self, i, display, articulated=False):
+    def __init__(self, i, display, articulated=False, *, prefetch=None):
         if not isinstance(i, int):
             raise ValueError("Warning ids must be provided as an integer")
 
@@ -148,10 +206,20 @@ class RevisionWarningCheck:
         self.display = display
         self.articulated = articulated
 
+        # Functions loading data needed by the check for all the revisions being
+        # landed at once, by the name of the argument the data is passed to the
+        # check as. They are called with the list of (revision, diff) to land and
+        # the arguments of the checks, see `check_landing_warnings`.
+        self.prefetch = prefetch or {}
+
     def __call__(self, f):
         @functools.wraps(f)
         def wrapped(*, revision, **kwargs):
             kwargs["revision"] = revision
+            for name, prefetch in self.prefetch.items():
+                if name not in kwargs:
+                    kwargs[name] = prefetch([(revision, kwargs.get("diff"))], **kwargs)
+
             result = f(**kwargs)
             return (
                 None
@@ -161,6 +229,7 @@ class RevisionWarningCheck:
                 )
             )
 
+        wrapped.prefetch = self.prefetch
         return wrapped
 
 
@@ -197,17 +266,14 @@ def warning_blocking_reviews(*, revision, diff, reviewers, users, projects, **kw
     )
 
 
-@RevisionWarningCheck(1, "Has previously landed.")
-def warning_previously_landed(*, revision, diff, **kwargs):
+@RevisionWarningCheck(
+    1, "Has previously landed.", prefetch={"landed_jobs": prefetch_landed_jobs}
+)
+def warning_previously_landed(*, revision, diff, landed_jobs, **kwargs):
     revision_id = PhabricatorClient.expect(revision, "id")
     diff_id = PhabricatorClient.expect(diff, "id")
 
-    job = (
-        LandingJob.revisions_query([revision_id])
-        .filter(status=LandingJobStatus.LANDED)
-        .order_by("-updated_at")
-        .first()
-    )
+    job = landed_jobs.get(revision_id)
 
     if job is None:
         return None
@@ -289,15 +355,14 @@ def warning_revision_missing_testing_tag(
     )
 
 
-@RevisionWarningCheck(6, "Revision has a diff warning.", True)
-def warning_diff_warning(*, revision, diff, **kwargs):
-    warnings = DiffWarning.objects.filter(
-        revision_id=revision["id"],
-        diff_id=diff["id"],
-        status=DiffWarningStatus.ACTIVE,
-    )
-    if warnings.count():
-        return [w.data for w in warnings]
+@RevisionWarningCheck(
+    6,
+    "Revision has a diff warning.",
+    True,
+    prefetch={"diff_warnings": prefetch_diff_warnings},
+)
+def warning_diff_warning(*, revision, diff, diff_warnings, **kwargs):
+    return diff_warnings.get((revision["id"], diff["id"]))
 
 
 @RevisionWarningCheck(7, "Revision is marked as WIP.")
@@ -307,22 +372,14 @@ def warning_wip_commit_message(*, revision, **kwargs):
         return "This revision is marked as a WIP. Please remove `WIP:` before landing."
 
 
-@RevisionWarningCheck(8, "Repository is under a soft code freeze.", True)
-def warning_code_freeze(*, repo, **kwargs):
-    supported_repos = Repo.get_mapping()
-    try:
-        repo_details = supported_repos[repo["fields"]["shortName"]]
-    except KeyError:
-        return
-
-    if not repo_details.product_details_url:
-        # Repo does not have a product details URL.
-        return
-
-    try:
-        product_details = requests.get(repo_details.product_details_url).json()
-    except requests.exceptions.RequestException as e:
-        logger.exception(e)
+@RevisionWarningCheck(
+    8,
+    "Repository is under a soft code freeze.",
+    True,
+    prefetch={"product_details": prefetch_product_details},
+)
+def warning_code_freeze(*, product_details, **kwargs):
+    if product_details is None:
         return [{"message": "Could not retrieve repository's code freeze status."}]
 
     freeze_date_str = product_details.get("NEXT_SOFTFREEZE_DATE")
@@ -410,21 +467,32 @@ def check_landing_warnings(
         warning_unresolved_comments,
     ],
 ):
+    context = {
+        "phab": phab,
+        "repo": repo,
+        "landing_repo": landing_repo,
+        "users": users,
+        "projects": projects,
+        "secure_project_phid": secure_project_phid,
+        "testing_tag_project_phids": testing_tag_project_phids,
+        "testing_policy_phid": testing_policy_phid,
+    }
+
+    # Load the data the checks need for the whole landing path up front, rather
+    # than once per revision.
+    for check in revision_warnings:
+        for name, prefetch in getattr(check, "prefetch", {}).items():
+            if name not in context:
+                context[name] = prefetch(to_land, **context)
+
     assessment = TransplantAssessment()
     for revision, diff in to_land:
         for check in revision_warnings:
             result = check(
-                phab=phab,
                 revision=revision,
                 diff=diff,
-                repo=repo,
-                landing_repo=landing_repo,
                 reviewers=reviewers[revision["phid"]],
-                users=users,
-                projects=projects,
-                secure_project_phid=secure_project_phid,
-                testing_tag_project_phids=testing_tag_project_phids,
-                testing_policy_phid=testing_policy_phid,
+                **context,
             )
 
             if result is not None:
@@ -519,6 +587,18 @@ def get_blocker_checks(
     ]
 
 
+def get_blocker_checks_context(repositories: dict, relman_group_phid: str) -> list:
+    """Return strings identifying the data the blocker checks depend on.
+
+    These are used to key the stack index, along with the Phabricator data.
+    """
+    return [f"relman:{relman_group_phid}"] + [
+        f"approval_required:{name}"
+        for name, repo in sorted(repositories.items())
+        if repo.approval_required
+    ]
+
+
 def convert_path_id_to_phid(
     landing_path: list[tuple[int, int]], stack_data: RevisionData
 ) -> list[tuple[str, int]]:
@@ -1,5 +1,8 @@
 import logging
+import threading
 from json.decoder import JSONDecodeError
+from time import monotonic
+from typing import Optional
 
 import requests
 
@@ -19,15 +22,54 @@ class TreeStatus:
     # hook will enforce `a=<reviewer>` is present in the commit message.
     OPEN_STATUSES = {"approval required", "open"}
 
-    def __init__(self, *, url=None, session=None):
+    # Timeout, in seconds, of each request to Tree Status.
+    DEFAULT_TIMEOUT = 10
+
+    # How long, in seconds, the cached state of the trees may be used while Tree
+    # Status can't be reached.
+    DEFAULT_MAX_STALE_SECONDS = 300
+
+    def __init__(
+        self,
+        *,
+        url=None,
+        session=None,
+        cache_seconds: float = 0,
+        max_stale_seconds: float = DEFAULT_MAX_STALE_SECONDS,
+    ):
         self.url = url if url is not None else TreeStatus.DEFAULT_URL
         self.url = self.url if self.url[-1] == "/" else self.url + "/"
         self.session = session or self.create_session()
 
+        # When `cache_seconds` is set, the state of all trees is fetched at once, and
+        # `is_open` is answered from memory until it expires.
+        self.cache_seconds = cache_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.cached_trees: Optional[dict[str, dict]] = None
+        self.cache_fetched_at = 0.0
+        self.cache_expires_at = 0.0
+        self.cache_lock = threading.Lock()
+
+        self.refresher: Optional[threading.Thread] = None
+        self.refresher_stop = threading.Event()
+
     def is_open(self, tree: str) -> bool:
         if not tree:
             raise ValueError("tree must be a non-empty string")
 
+        if self.cache_seconds:
+            tree_data = self.get_cached_trees().get(tree)
+            if tree_data is None:
+                # We assume missing trees are open.
+                return True
+
+            try:
+                return tree_data["status"] in TreeStatus.OPEN_STATUSES
+            except (KeyError, TypeError) as exc:
+                raise TreeStatusCommunicationException(
+                    "Tree status response did not contain expected data"
+                ) from exc
+
         try:
             resp = self.get_trees(tree=tree)
         except TreeStatusError as exc:
@@ -44,6 +86,96 @@ class TreeStatus:
                 "Tree status response did not contain expected data"
             ) from exc
 
+    def get_cached_trees(self) -> dict[str, dict]:
+        """Return the state of all trees, refreshing it if it has expired.
+
+        If Tree Status can't be reached, the last known state is returned, and the
+        next attempt to refresh it is delayed by `cache_seconds`. Once that state is
+        older than `max_stale_seconds`, it isn't used anymore, and trees are treated
+        as they are without caching when Tree Status can't be reached.
+
+        Raises:
+            TreeStatusException: If the state of the trees was never fetched, or is
+                too old to be used.
+        """
+        with self.cache_lock:
+            if self.cached_trees is not None and monotonic() < self.cache_expires_at:
+                return self.cached_trees
+
+        try:
+            return self.refresh_trees()
+        except TreeStatusException:
+            with self.cache_lock:
+                if self.cached_trees is None:
+                    raise
+
+                stale_until = self.cache_fetched_at + self.max_stale_seconds
+                if monotonic() >= stale_until:
+                    logger.error(
+                        "Could not refresh tree statuses, and the cached data is "
+                        f"more than {self.max_stale_seconds} seconds old."
+                    )
+                    raise
+
+                logger.warning(
+                    "Could not refresh tree statuses, using stale data.",
+                    exc_info=True,
+                )
+                self.cache_expires_at = min(
+                    monotonic() + self.cache_seconds, stale_until
+                )
+                return self.cached_trees
+
+    def refresh_trees(self) -> dict[str, dict]:
+        """Fetch the state of all trees in a single request, and cache it."""
+        resp = self.get_trees()
+        try:
+            trees = dict(resp["result"])
+        except (KeyError, TypeError, ValueError) as exc:
+            raise TreeStatusCommunicationException(
+                "Tree status response did not contain expected data"
+            ) from exc
+
+        with self.cache_lock:
+            self.cached_trees = trees
+            self.cache_fetched_at = monotonic()
+            self.cache_expires_at = self.cache_fetched_at + self.cache_seconds
+        return trees
+
+    def start_refresher(self):
+        """Refresh the cached state of the trees in a background thread.
+
+        This keeps requests to Tree Status off the caller's path. The refresher runs
+        until `stop_refresher` is called.
+        """
+        if not self.cache_seconds:
+            raise ValueError("cache_seconds must be set to refresh tree statuses")
+        if self.refresher and self.refresher.is_alive():
+            return
+
+        self.refresher_stop.clear()
+        self.refresher = threading.Thread(
+            target=self._refresh_periodically, name="treestatus-refresher", daemon=True
+        )
+        self.refresher.start()
+
+    def stop_refresher(self):
+        """Stop the background refresher, if running."""
+        self.refresher_stop.set()
+        if self.refresher:
+            self.refresher.join()
+            self.refresher = None
+
+    def _refresh_periodically(self):
+        # Refresh a little before expiry, so that callers never have to wait.
+        interval = self.cache_seconds / 2
+        while not self.refresher_stop.is_set():
+            try:
+                self.refresh_trees()
+            except TreeStatusException:
+                logger.warning("Could not refresh tree statuses.", exc_info=True)
+            self.refresher_stop.wait(interval)
+
     def get_trees(self, tree: str = "") -> dict:
         path = f"trees/{tree}" if tree else "trees"
         return self.request("GET", path)
@@ -73,6 +205,8 @@ class TreeStatus:
                 If there is an error communicating with the API.
         """
 
+        kwargs.setdefault("timeout", self.DEFAULT_TIMEOUT)
+
         try:
             response = self.session.request(method, self.url + url_path, **kwargs)
             data = response.json()
@@ -1,4 +1,4 @@
-from lando.utils.phabricator import result_list_to_phid_dict
+from lando.utils.phabricator import USER_CACHE
 
 
 def user_search(phabricator, user_phids):
@@ -11,5 +11,7 @@ def user_search(phabricator, user_phids):
     if not user_phids:
         return {}
 
-    users = phabricator.call_conduit("user.search", constraints={"phids": user_phids})
-    return result_list_to_phid_dict(phabricator.expect(users, "data"))
+    return phabricator.memoize(
+        ("user.search", frozenset(user_phids)),
+        lambda: USER_CACHE.search(phabricator, user_phids),
+    )
@@ -51,7 +51,11 @@ class Worker:
         # `self.refresh_enabled_repos`.
         self.enabled_repos = []
 
-        self.treestatus_client = TreeStatus(url=settings.TREESTATUS_URL)
+        self.treestatus_client = TreeStatus(
+            url=settings.TREESTATUS_URL,
+            cache_seconds=settings.TREESTATUS_CACHE_SECONDS,
+            max_stale_seconds=settings.TREESTATUS_MAX_STALE_SECONDS,
+        )
         self.treestatus_client.session.headers.update(
             {"User-Agent": f"landoapi.treestatus.TreeStatus/{version}"}
         )
@@ -111,14 +115,14 @@ class Worker:
         """Return the value of the pause configuration variable."""
         # When the pause variable is True, the worker is temporarily paused. The worker
         # resumes when the key is reset to False.
-        return ConfigurationVariable.get(self.PAUSE_KEY, False)
+        return ConfigurationVariable.get_cached(self.PAUSE_KEY, False)
 
     @property
     def _running(self) -> bool:
         """Return the value of the stop configuration variable."""
         # When the stop variable is True, the worker will exit and will not restart,
         # until the value is changed to False.
-        return not ConfigurationVariable.get(self.STOP_KEY, False)
+        return not ConfigurationVariable.get_cached(self.STOP_KEY, False)
 
     def _setup(self):
         """Perform various setup actions."""
@@ -129,22 +133,28 @@ class Worker:
         """Run the main event loop."""
         # NOTE: The worker will exit when max_loops is reached, or when the stop
         # variable is changed to True.
+        if settings.TREESTATUS_CACHE_SECONDS and settings.TREESTATUS_BACKGROUND_REFRESH:
+            self.treestatus_client.start_refresher()
+
         loops = 0
-        while self._running:
-            if max_loops is not None and loops >= max_loops:
-                break
-            while self._paused:
-                # Wait a set number of seconds before checking paused variable again.
-                self.throttle(self.sleep_seconds)
-            self.loop(*args, **kwargs)
-            loops += 1
+        try:
+            while self._running:
+                if max_loops is not None and loops >= max_loops:
+                    break
+                while self._paused:
+                    # Wait a set number of seconds before checking paused variable again.
+                    self.throttle(self.sleep_seconds)
+                self.loop(*args, **kwargs)
+                loops += 1
+        finally:
+            self.treestatus_client.stop_refresher()
 
         logger.info(f"{self} exited after {loops} loops.")
 
     @property
     def throttle_seconds(self) -> int:
         """The duration to pause for when the worker is being throttled."""
-        return ConfigurationVariable.get(self.THROTTLE_KEY, 3)
+        return ConfigurationVariable.get_cached(self.THROTTLE_KEY, 3)
 
     def throttle(self, seconds: int | None = None):
         """Sleep for a given number of seconds."""
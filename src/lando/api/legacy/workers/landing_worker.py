@@ -2,19 +2,25 @@ from __future__ import annotations
 
 import configparser
 import logging
+import multiprocessing
+import os
 import re
+import select
+import socket
 import subprocess
-from contextlib import contextmanager
+import threading
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
 from io import StringIO
 from pathlib import Path
+from time import monotonic, sleep
 from typing import (
     Any,
     Optional,
 )
 
 import kombu
-from django.db import transaction
+from django.db import connection, connections
 
 from lando.api.legacy.commit_message import bug_list_to_commit_string, parse_bugs
 from lando.api.legacy.hgexports import HgPatchHelper
@@ -26,10 +32,16 @@ from lando.api.legacy.uplift import (
     update_bugs_for_uplift,
 )
 from lando.api.legacy.workers.base import Worker
-from lando.main.models.configuration import ConfigurationKey
-from lando.main.models.landing_job import LandingJob, LandingJobAction, LandingJobStatus
+from lando.main.models.configuration import ConfigurationKey, ConfigurationVariable
+from lando.main.models.landing_job import (
+    DEFAULT_GRACE_SECONDS,
+    DEFAULT_LEASE_SECONDS,
+    LandingJob,
+    LandingJobAction,
+    LandingJobStatus,
+)
 from lando.main.models.repo import Repo
-from lando.main.scm.abstract_scm import AbstractSCM
+from lando.main.scm.abstract_scm import AbstractSCM, Patch
 from lando.main.scm.exceptions import (
     AutoformattingException,
     PatchConflict,
@@ -42,9 +54,13 @@ from lando.main.scm.exceptions import (
 )
 from lando.utils.config import read_lando_config
 from lando.utils.tasks import phab_trigger_repo_update
+from lando.utils.timings import Timings
 
 logger = logging.getLogger(__name__)
 
+# Statsd metric for the time spent in each stage of a landing.
+STAGE_TIMING_METRIC = "lando-api.landing_job.stage"
+
 AUTOFORMAT_COMMIT_MESSAGE = """
 {bugs}: apply code formatting via Lando
 
@@ -70,6 +86,102 @@ def job_processing(job: LandingJob):
         job.save()
 
 
+@contextmanager
+def job_lease(job: LandingJob, worker_id: str, lease_seconds: int):
+    """Keep the lease on a claimed job alive while it is being processed.
+
+    A heartbeat thread renews the lease at a third of its duration, so that the job
+    is only reclaimed by another worker if this one dies. The lease is released once
+    the job has been processed; the job needs to be saved afterwards. If processing
+    raises, the lease is kept, so that the job is reclaimed once it expires.
+    """
+    stop = threading.Event()
+
+    def heartbeat():
+        try:
+            while not stop.wait(lease_seconds / 3):
+                if not job.renew_lease(worker_id, lease_seconds):
+                    logger.warning(
+                        "Lost lease on landing job",
+                        extra={"id": job.id, "worker_id": worker_id},
+                    )
+                    return
+        finally:
+            # Only closes the connections opened by this thread.
+            connections.close_all()
+
+    heartbeat_thread = threading.Thread(
+        target=heartbeat, name=f"landing-job-{job.id}-heartbeat", daemon=True
+    )
+    heartbeat_thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        heartbeat_thread.join()
+    job.release_lease()
+
+
+class JobQueueListener:
+    """Wait for job submission notifications on the queue channels of some repos.
+
+    This uses Postgres `LISTEN` on the database connection of the current thread.
+    Other database backends have no notifications, and waiting simply sleeps.
+    """
+
+    def __init__(self, repos: list[Repo]):
+        self.channels = [LandingJob.queue_channel(repo.id) for repo in repos]
+
+        # The DB-API connection on which `LISTEN` was issued. If Django reconnects,
+        # the channels need to be listened on again.
+        self._listening_connection = None
+
+    def listen(self):
+        """Start listening on the queue channels, if not already doing so."""
+        connection.ensure_connection()
+        if connection.connection is self._listening_connection:
+            return
+
+        with connection.cursor() as cursor:
+            for channel in self.channels:
+                cursor.execute(f'LISTEN "{channel}"')
+        self._listening_connection = connection.connection
+
+    def wait(self, timeout: float) -> list[str]:
+        """Block until a job is submitted or `timeout` seconds elapse.
+
+        Returns:
+            The payloads (job IDs) of received notifications, if any.
+        """
+        if connection.vendor != "postgresql":
+            sleep(timeout)
+            return []
+
+        self.listen()
+        pg_connection = connection.connection
+        pg_connection.poll()
+        if not pg_connection.notifies:
+            select.select([pg_connection], [], [], timeout)
+            pg_connection.poll()
+
+        payloads = [notify.payload for notify in pg_connection.notifies]
+        pg_connection.notifies.clear()
+        return payloads
+
+
+def run_landing_lane(repo_id: int, sleep_seconds: float, max_loops: int | None):
+    """Run a `LandingWorker` restricted to a single repository.
+
+    This is the entry point of each lane process started by
+    `LandingWorker.start_lanes`. The SSH agent is inherited from the parent
+    process, so it is not set up again here.
+    """
+    repo = Repo.objects.get(id=repo_id)
+    landing_worker = LandingWorker([repo], sleep_seconds=sleep_seconds, with_ssh=False)
+    logger.info(f"Starting landing lane for {repo}.")
+    landing_worker.start(max_loops=max_loops)
+
+
 class LandingWorker(Worker):
     @property
     def STOP_KEY(self) -> ConfigurationKey:
@@ -81,11 +193,84 @@ class LandingWorker(Worker):
         """Return the configuration key that pauses the worker."""
         return ConfigurationKey.LANDING_WORKER_PAUSED
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, lease_seconds: int = DEFAULT_LEASE_SECONDS, **kwargs):
         super().__init__(*args, **kwargs)
         self.last_job_finished = None
+
+        # Identifies this worker process when claiming jobs.
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+
+        # Job submissions are announced on a per-repo channel, so that idle workers
+        # can wake up without polling the queue.
+        self.queue_listener = JobQueueListener(self.applicable_repos)
+
+        # Monotonic times at which notified jobs leave their grace period.
+        self.pending_job_times = []
+
+        # SCM instances are kept across jobs, so that long-lived resources such as
+        # the Mercurial command server are reused.
+        self.repo_scms = {}
+
+        # Background threads fetching upstream changes, keyed by repo ID.
+        self.prefetch_threads = {}
+
         self.refresh_enabled_repos()
 
+    def start_lanes(self, max_loops: int | None = None):
+        """Run setup sequence and start one landing lane per applicable repo.
+
+        Each lane is a separate process that only processes jobs for its own
+        repository, using its own checkout, so that a slow job on one tree does not
+        hold up landings on the others. Lanes that exit abnormally are restarted
+        until the worker is stopped.
+        """
+        if ConfigurationVariable.get(self.STOP_KEY, False):
+            logger.warning(f"{self.STOP_KEY} set to True, will not start worker.")
+            return
+        self._setup()
+
+        context = multiprocessing.get_context("fork")
+        lanes = {}
+
+        def start_lane(repo: Repo):
+            # Database connections must not be shared with the forked lane
+            # processes. They may have been reopened since the last fork, e.g. to
+            # check whether the worker is still running.
+            connections.close_all()
+            lane = context.Process(
+                target=run_landing_lane,
+                args=(repo.id, self.sleep_seconds, max_loops),
+                name=f"landing-lane-{repo.name}",
+            )
+            lane.start()
+            lanes[repo] = lane
+
+        for repo in self.applicable_repos:
+            start_lane(repo)
+
+        # Repos whose lane has not exited yet, or has been restarted.
+        running = set(lanes)
+        while running:
+            for repo in list(running):
+                lane = lanes[repo]
+                lane.join(timeout=self.sleep_seconds)
+                if lane.is_alive():
+                    continue
+
+                running.remove(repo)
+                if lane.exitcode == 0:
+                    continue
+
+                logger.error(
+                    f"Landing lane for {repo} exited with code {lane.exitcode}."
+                )
+                if max_loops is None and self._running:
+                    start_lane(repo)
+                    running.add(repo)
+
+        logger.info(f"{self} exited after all {len(lanes)} lanes exited.")
+
     def loop(self):
         logger.debug(
             f"{len(self.applicable_repos)} applicable repos: {self.applicable_repos}"
@@ -100,22 +285,96 @@ class LandingWorker(Worker):
             self.throttle(self.sleep_seconds)
             self.refresh_enabled_repos()
 
-        with transaction.atomic():
-            job = LandingJob.next_job(repositories=self.enabled_repos).first()
+        # The claimed job is marked as IN_PROGRESS and its attempt count updated.
+        job = LandingJob.claim_next_job(
+            self.worker_id,
+            repositories=self.enabled_repos,
+            lease_seconds=self.lease_seconds,
+        )
 
         if job is None:
-            self.throttle(self.sleep_seconds)
+            self.wait_for_job()
             return
 
-        with job_processing(job):
-            job.status = LandingJobStatus.IN_PROGRESS
-            job.attempts += 1
-            job.save()
+        jobs = [job]
+        repo = job.target_repo
+        if repo and repo.landing_batch_size > 1 and not repo.autoformat_enabled:
+            jobs += job.claim_batch(repo.landing_batch_size - 1)
+
+        with ExitStack() as stack:
+            for job in jobs:
+                stack.enter_context(job_processing(job))
+                stack.enter_context(job_lease(job, self.worker_id, self.lease_seconds))
+                logger.info("Starting landing job", extra={"id": job.id})
+
+            self.last_job_finished = self.run_jobs(jobs)
+
+            for job in jobs:
+                logger.info("Finished processing landing job", extra={"id": job.id})
+
+    def get_scm(self, repo: Repo) -> AbstractSCM:
+        """Return the SCM for `repo`, reusing the same instance across jobs."""
+        if repo.id not in self.repo_scms:
+            self.repo_scms[repo.id] = repo.scm
+        return self.repo_scms[repo.id]
+
+    def prefetch_next_job(self, current_job: LandingJob):
+        """Fetch upstream changes for the repo of the next queued job in the background.
+
+        This overlaps the network-bound part of the next job's `update_repo` with the
+        rest of the current job (e.g. formatting and pushing).
+        """
+        next_job = (
+            LandingJob.job_queue_query(repositories=self.enabled_repos, grace_seconds=0)
+            .exclude(id=current_job.id)
+            .exclude(status=LandingJobStatus.IN_PROGRESS)
+            .select_related("target_repo")
+            .first()
+        )
+        if not next_job or not next_job.target_repo:
+            return
+
+        repo = next_job.target_repo
+        if repo.id in self.prefetch_threads:
+            # A prefetch for this repo is still pending.
+            return
+
+        scm = self.get_scm(repo)
+
+        def prefetch():
+            try:
+                scm.prefetch(repo.pull_path)
+            except Exception as e:
+                # Not fatal; the next job will pull as usual.
+                logger.warning(f"Failed to prefetch {repo.name}: {e}")
+
+        thread = threading.Thread(
+            target=prefetch, name=f"prefetch-{repo.name}", daemon=True
+        )
+        thread.start()
+        self.prefetch_threads[repo.id] = thread
+
+    def wait_for_prefetch(self, repo: Repo):
+        """Wait for any pending prefetch of `repo` to complete."""
+        if thread := self.prefetch_threads.pop(repo.id, None):
+            thread.join()
+
+    def wait_for_job(self):
+        """Wait until a queued job may be ready to be claimed.
+
+        Waiting ends when a job is submitted, when a previously submitted job leaves
+        its grace period, or after `sleep_seconds` as a fallback (e.g. for deferred
+        jobs which are retried).
+        """
+        now = monotonic()
+        self.pending_job_times = [t for t in self.pending_job_times if t > now]
+        timeout = min([self.sleep_seconds] + [t - now for t in self.pending_job_times])
 
-            # Make sure the status and attempt count are updated in the database
-            logger.info("Starting landing job", extra={"id": job.id})
-            self.last_job_finished = self.run_job(job)
-            logger.info("Finished processing landing job", extra={"id": job.id})
+        submitted_jobs = self.queue_listener.wait(timeout)
+        if submitted_jobs:
+            logger.debug(f"Landing jobs submitted: {submitted_jobs}")
+            # New jobs can only be claimed once their grace period has passed.
+            self.pending_job_times.append(monotonic() + DEFAULT_GRACE_SECONDS)
 
     @staticmethod
     def notify_user_of_landing_failure(job: LandingJob):
@@ -286,99 +545,97 @@ class LandingWorker(Worker):
             True: The job finished processing and is in a permanent state.
             False: The job encountered a temporary failure and should be tried again.
         """
-        repo: Repo = job.target_repo
-        scm = repo.scm
+        return self.run_jobs([job])
 
-        if not self.treestatus_client.is_open(repo.tree):
-            job.transition_status(
-                LandingJobAction.DEFER,
-                message=f"Tree {repo.tree} is closed - retrying later.",
+    def run_jobs(
+        self, jobs: list[LandingJob], timings: Optional[Timings] = None
+    ) -> bool:
+        """Run a batch of LandingJobs for the same repo, and push them at once.
+
+        The patches of each job are applied on top of those of the previous job. A
+        job whose patches fail to apply is failed, and the other jobs still land. If
+        pushing the batch fails permanently, the batch is bisected so that only the
+        offending job ends up failing.
+
+        Code formatting is only supported when landing a single job.
+
+        The time spent in each stage, and in each SCM command, is recorded in the
+        `stage_timings` of the jobs, and emitted as statsd timings.
+
+        Returns:
+            True: The jobs finished processing and are in a permanent state.
+            False: The jobs encountered a temporary failure and should be tried again.
+        """
+        if timings is None:
+            timings = Timings(
+                STAGE_TIMING_METRIC, tags=[f"repo:{jobs[0].target_repo.name}"]
             )
+
+        try:
+            return self._run_jobs(jobs, timings)
+        finally:
+            for job in jobs:
+                job.stage_timings = timings.serialize()
+
+    def _run_jobs(self, jobs: list[LandingJob], timings: Timings) -> bool:
+        """Run a batch of LandingJobs, timing each stage with `timings`."""
+        repo: Repo = jobs[0].target_repo
+        scm = self.get_scm(repo)
+
+        with timings.stage("treestatus"):
+            is_open = self.treestatus_client.is_open(repo.tree)
+        if not is_open:
+            self.defer_jobs(jobs, f"Tree {repo.tree} is closed - retrying later.")
             return False
 
-        with scm.for_push(job.requester_email):
+        # The repo must not be updated while a prefetch is still running.
+        with timings.stage("wait_for_prefetch"):
+            self.wait_for_prefetch(repo)
+
+        # All jobs of a batch share the same requester, on whose behalf it is pushed.
+        with scm.for_push(jobs[0].requester_email):
             # Update local repo.
             repo_pull_info = f"tree: {repo.tree}, pull path: {repo.pull_path}"
             try:
-                scm.update_repo(repo.pull_path, target_cset=job.target_commit_hash)
+                with timings.stage("update_repo"):
+                    scm.update_repo(
+                        repo.pull_path, target_cset=jobs[0].target_commit_hash
+                    )
             except SCMInternalServerError as e:
                 message = (
                     f"`Temporary error ({e.__class__}) "
                     f"encountered while pulling from {repo_pull_info}"
                 )
                 logger.exception(message)
-                job.transition_status(LandingJobAction.DEFER, message=message)
+                self.defer_jobs(jobs, message)
 
                 # Try again, this is a temporary failure.
                 return False
             except Exception as e:
                 message = f"Unexpected error while fetching repo from {repo.name}."
                 logger.exception(message)
-                job.transition_status(
-                    LandingJobAction.FAIL,
-                    message=message + f"\n{e}",
-                )
-                self.notify_user_of_landing_failure(job)
+                self.fail_jobs(jobs, message + f"\n{e}")
                 return True
 
-            # Run through the patches one by one and try to apply them.
-            for revision in job.revisions.all():
-                # TODO: Rather than parsing the patch details from the full HG patch
-                # stored in the job, we should read the revision's metadata (and
-                # move to only store the diff in the patch_string, rather than an
-                # export).
-                # https://bugzilla.mozilla.org/show_bug.cgi?id=1936171
-                patch_helper = HgPatchHelper(StringIO(revision.patch_string))
-                if not patch_helper.diff_start_line:
-                    message = (
-                        "Lando encountered a malformed patch, please try again. "
-                        "If this error persists please file a bug: "
-                        "Patch without a diff start line."
-                    )
-                    logger.error(message)
-                    job.transition_status(
-                        LandingJobAction.FAIL,
-                        message=message,
-                    )
-                    self.notify_user_of_landing_failure(job)
-                    return True
-
-                date = patch_helper.get_header("Date")
-                user = patch_helper.get_header("User")
-
-                try:
-                    scm.apply_patch(
-                        patch_helper.get_diff(),
-                        patch_helper.get_commit_description(),
-                        user,
-                        date,
-                    )
-                except PatchConflict as exc:
-                    breakdown = self.process_merge_conflict(
-                        exc, repo, scm, revision.revision_id
-                    )
-                    job.error_breakdown = breakdown
+            # Apply each job on top of the previous ones, and note the commit at the
+            # tip of each job.
+            commit_ids = {}
+            with timings.stage("apply_patches"):
+                for job in jobs:
+                    base_commit = scm.head_ref()
+                    if self.apply_job_patches(job, repo, scm):
+                        commit_ids[job.id] = scm.head_ref()
+                    elif len(jobs) > 1:
+                        # Discard any partially applied patches of the failed job.
+                        scm.rewind_to(base_commit)
+
+            applied_jobs = [job for job in jobs if job.id in commit_ids]
+            if not applied_jobs:
+                return True
 
-                    message = (
-                        f"Problem while applying patch in revision {revision.revision_id}:\n\n"
-                        f"{str(exc)}"
-                    )
-                    logger.exception(message)
-                    job.transition_status(LandingJobAction.FAIL, message=message)
-                    self.notify_user_of_landing_failure(job)
-                    return True
-                except Exception as e:
-                    message = (
-                        f"Aborting, could not apply patch buffer for {revision.revision_id}."
-                        f"\n{e}"
-                    )
-                    logger.exception(message)
-                    job.transition_status(
-                        LandingJobAction.FAIL,
-                        message=message,
-                    )
-                    self.notify_user_of_landing_failure(job)
-                    return True
+            # All patches applied; fetch ahead for the next job while this one is
+            # being formatted and pushed.
+            self.prefetch_next_job(jobs[0])
 
             # Get the changeset titles for the stack.
             changeset_titles = scm.changeset_descriptions()
@@ -389,23 +646,27 @@ class LandingWorker(Worker):
             ]
 
             # Run automated code formatters if enabled.
-            if repo.autoformat_enabled and (
-                message := self.autoformat(job, scm, bug_ids, changeset_titles)
-            ):
-                job.transition_status(LandingJobAction.FAIL, message=message)
-                self.notify_user_of_landing_failure(job)
-                return False
+            if repo.autoformat_enabled and len(applied_jobs) == 1:
+                with timings.stage("autoformat"):
+                    message = self.autoformat(
+                        applied_jobs[0], scm, bug_ids, changeset_titles
+                    )
+                if message:
+                    self.fail_jobs(applied_jobs, message)
+                    return False
 
-            # Get the changeset hash of the first node.
-            commit_id = scm.head_ref()
+            # Get the changeset hash of the head, which is the tip of the last job.
+            commit_ids[applied_jobs[-1].id] = scm.head_ref()
 
             repo_push_info = f"tree: {repo.tree}, push path: {repo.push_path}"
+            bisect = False
             try:
-                scm.push(
-                    repo.push_path,
-                    push_target=repo.push_target,
-                    force_push=repo.force_push,
-                )
+                with timings.stage("push"):
+                    scm.push(
+                        repo.push_path,
+                        push_target=repo.push_target,
+                        force_push=repo.force_push,
+                    )
             except (
                 TreeClosed,
                 TreeApprovalRequired,
@@ -418,18 +679,126 @@ class LandingWorker(Worker):
                     f"encountered while pushing to {repo_push_info}"
                 )
                 logger.exception(message)
-                job.transition_status(LandingJobAction.DEFER, message=message)
+                self.defer_jobs(applied_jobs, message)
                 return False  # Try again, this is a temporary failure.
             except Exception as e:
                 message = f"Unexpected error while pushing to {repo.name}.\n{e}"
                 logger.exception(message)
-                job.transition_status(
-                    LandingJobAction.FAIL,
-                    message=message,
+                if len(applied_jobs) == 1:
+                    self.fail_jobs(applied_jobs, message)
+                    return True  # Do not try again, this is a permanent failure.
+
+                # Find the offending job by pushing each half of the batch in turn.
+                bisect = True
+
+        if bisect:
+            middle = len(applied_jobs) // 2
+            return all(
+                [
+                    self.run_jobs(applied_jobs[:middle], timings),
+                    self.run_jobs(applied_jobs[middle:], timings),
+                ]
+            )
+
+        for job in applied_jobs:
+            if len(applied_jobs) > 1:
+                # Only update the bugs referenced by this job's own revisions.
+                bug_ids = [
+                    str(bug)
+                    for revision in job.revisions.all()
+                    for bug in parse_bugs(
+                        HgPatchHelper(StringIO(revision.patch_string))
+                        .get_commit_description()
+                        .partition("\n")[0]
+                    )
+                ]
+            with timings.stage("complete_landing"):
+                self.complete_landing(job, repo, scm, commit_ids[job.id], bug_ids)
+
+        # Trigger update of repo in Phabricator so patches are closed quicker.
+        # Especially useful on low-traffic repositories.
+        if repo.phab_identifier:
+            self.phab_trigger_repo_update(repo.phab_identifier)
+
+        return True
+
+    def apply_job_patches(self, job: LandingJob, repo: Repo, scm: AbstractSCM) -> bool:
+        """Apply the patches of each revision of the job, in order.
+
+        The patches are handed to the SCM all at once, so it can apply the whole
+        stack in a single operation.
+
+        Returns:
+            True: All patches were applied and committed.
+            False: A patch could not be applied; the job was failed and the requester
+                notified.
+        """
+        revisions = list(job.revisions.all())
+        patches = []
+        for revision in revisions:
+            # TODO: Rather than parsing the patch details from the full HG patch
+            # stored in the job, we should read the revision's metadata (and
+            # move to only store the diff in the patch_string, rather than an
+            # export).
+            # https://bugzilla.mozilla.org/show_bug.cgi?id=1936171
+            patch_helper = HgPatchHelper(StringIO(revision.patch_string))
+            if not patch_helper.diff_start_line:
+                message = (
+                    "Lando encountered a malformed patch, please try again. "
+                    "If this error persists please file a bug: "
+                    "Patch without a diff start line."
                 )
-                self.notify_user_of_landing_failure(job)
-                return True  # Do not try again, this is a permanent failure.
+                logger.error(message)
+                self.fail_jobs([job], message)
+                return False
+
+            patches.append(
+                Patch(
+                    patch_helper.get_diff(),
+                    patch_helper.get_commit_description(),
+                    patch_helper.get_header("User"),
+                    patch_helper.get_header("Date"),
+                    revision.data.get("base_revision"),
+                )
+            )
+
+        try:
+            scm.apply_patches(patches)
+        except PatchConflict as exc:
+            revision = revisions[getattr(exc, "patch_index", 0)]
+            breakdown = self.process_merge_conflict(
+                exc, repo, scm, revision.revision_id
+            )
+            job.error_breakdown = breakdown
+
+            message = (
+                f"Problem while applying patch in revision {revision.revision_id}:\n\n"
+                f"{str(exc)}"
+            )
+            logger.exception(message)
+            self.fail_jobs([job], message)
+            return False
+        except Exception as e:
+            revision = revisions[getattr(e, "patch_index", 0)]
+            message = (
+                f"Aborting, could not apply patch buffer for {revision.revision_id}."
+                f"\n{e}"
+            )
+            logger.exception(message)
+            self.fail_jobs([job], message)
+            return False
 
+        return True
+
+    def complete_landing(
+        self,
+        job: LandingJob,
+        repo: Repo,
+        scm: AbstractSCM,
+        commit_id: str,
+        bug_ids: list[str],
+    ):
+        """Mark a pushed job as landed, and perform post-landing steps."""
         job.transition_status(LandingJobAction.LAND, commit_id=commit_id)
 
         mots_path = Path(repo.path) / "mots.yaml"
@@ -455,12 +824,16 @@ class LandingWorker(Worker):
                 # the landing user so they are aware and can update the bugs themselves.
                 self.notify_user_of_bug_update_failure(job, e)
 
-        # Trigger update of repo in Phabricator so patches are closed quicker.
-        # Especially useful on low-traffic repositories.
-        if repo.phab_identifier:
-            self.phab_trigger_repo_update(repo.phab_identifier)
+    def defer_jobs(self, jobs: list[LandingJob], message: str):
+        """Defer the given jobs, so that they are tried again later."""
+        for job in jobs:
+            job.transition_status(LandingJobAction.DEFER, message=message)
 
-        return True
+    def fail_jobs(self, jobs: list[LandingJob], message: str):
+        """Fail the given jobs, and notify their requesters."""
+        for job in jobs:
+            job.transition_status(LandingJobAction.FAIL, message=message)
+            self.notify_user_of_landing_failure(job)
 
     def apply_autoformatting(
         self,
@@ -472,10 +845,15 @@ class LandingWorker(Worker):
         try:
             self.format_stack(landoini_config, scm.path)
         except AutoformattingException as exc:
+            # The formatters may have changed anything in the working copy.
+            scm.mark_paths_touched(None)
             logger.warning("Failed to format the stack.")
             logger.exception(exc)
             raise exc
 
+        # Note the paths changed by the formatters, so they are cleaned up after.
+        scm.mark_paths_touched(scm.changed_paths())
+
         try:
             replacements = self.commit_autoformatting_changes(
                 scm, len(changeset_titles), bug_ids
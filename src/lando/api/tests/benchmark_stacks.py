@@ -0,0 +1,185 @@
+"""
+Benchmarks of the revision stack graph operations, on synthetic stacks.
+
+Run with `python -m lando.api.tests.benchmark_stacks`. Walking each stack with
+`RevisionStack` is benchmarked, along with `calculate_landable_subgraphs`. If
+`networkx` is installed, the `networkx` based implementation `RevisionStack` used
+to have is benchmarked too, for comparison.
+
+The test suite checks these operations stay within a coarse time bound on the same
+stacks, see `test_stack_operations_time_bound`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import os
+import timeit
+from typing import Callable, Iterator
+
+# Synthetic stacks, as (nodes, edges, head) where edges are (child, parent) and
+# `head` is the revision to iterate the stack to.
+Stack = tuple[set[str], set[tuple[str, str]], str]
+
+
+def linear_stack(length: int) -> Stack:
+    """Return a stack of `length` revisions, each depending on the previous one."""
+    nodes = {f"PHID-DREV-{i}" for i in range(length)}
+    edges = {(f"PHID-DREV-{i}", f"PHID-DREV-{i - 1}") for i in range(1, length)}
+    return nodes, edges, f"PHID-DREV-{length - 1}"
+
+
+def binary_tree_stack(depth: int) -> Stack:
+    """Return a stack where every revision has two dependent revisions."""
+    count = 2**depth - 1
+    nodes = {f"PHID-DREV-{i}" for i in range(count)}
+    edges = {(f"PHID-DREV-{i}", f"PHID-DREV-{(i - 1) // 2}") for i in range(1, count)}
+    return nodes, edges, f"PHID-DREV-{count - 1}"
+
+
+def wide_stack(width: int) -> Stack:
+    """Return a stack of `width` revisions all depending on the same root."""
+    nodes = {f"PHID-DREV-{i}" for i in range(width + 1)}
+    edges = {(f"PHID-DREV-{i}", "PHID-DREV-0") for i in range(1, width + 1)}
+    return nodes, edges, f"PHID-DREV-{width}"
+
+
+def diamond_chain_stack(diamonds: int) -> Stack:
+    """Return a chain of diamonds, which has `2**diamonds` paths to its head."""
+    nodes = {"PHID-DREV-0"}
+    edges = set()
+    for i in range(diamonds):
+        top, left, right, bottom = (f"PHID-DREV-{3 * i + j}" for j in range(4))
+        nodes.update((left, right, bottom))
+        edges.update({(left, top), (right, top), (bottom, left), (bottom, right)})
+    return nodes, edges, f"PHID-DREV-{3 * diamonds}"
+
+
+STACKS: dict[str, Callable[[], Stack]] = {
+    "linear-500": lambda: linear_stack(500),
+    "binary-tree-depth-10": lambda: binary_tree_stack(10),
+    "wide-1000": lambda: wide_stack(1000),
+    "diamond-chain-12": lambda: diamond_chain_stack(12),
+}
+
+
+def networkx_revision_stack_class() -> type | None:
+    """Return the `networkx` based implementation of `RevisionStack`, if available."""
+    try:
+        import networkx as nx
+    except ImportError:
+        return None
+
+    class NetworkxRevisionStack(nx.DiGraph):
+        def __init__(self, nodes: set[str], edges: set[tuple[str, str]]):
+            super().__init__(
+                (successor, predecessor) for predecessor, successor in edges
+            )
+            self.add_nodes_from(nodes)
+
+        def root_revisions(self) -> Iterator[str]:
+            return (node for node, degree in self.in_degree if degree == 0)
+
+        def iter_stack_from_root(self, dest: str) -> Iterator[str]:
+            root = next(self.root_revisions())
+            if root == dest:
+                yield root
+                return
+
+            paths = list(nx.all_simple_paths(self, root, dest))
+            if not paths:
+                raise ValueError(f"Graph has no paths from {root} to {dest}.")
+            if len(paths) > 1:
+                raise ValueError(f"Graph has multiple paths from {root} to {dest}.")
+            yield from paths[0]
+
+    return NetworkxRevisionStack
+
+
+def walk_stack(stack_class: type, stack: Stack):
+    """Build a stack, find its roots and iterate over it up to its head."""
+    nodes, edges, head = stack
+    revision_stack = stack_class(nodes, edges)
+    list(revision_stack.root_revisions())
+    try:
+        list(revision_stack.iter_stack_from_root(head))
+    except ValueError:
+        # Stacks with multiple paths to their head are expected to raise.
+        pass
+
+
+def landable_stack_data(stack: Stack) -> dict:
+    """Return the revision data of an open, landable `stack`, for a single repo."""
+    nodes, edges, head = stack
+    repo_phid = "PHID-REPO-1"
+    revisions = {
+        phid: {
+            "id": i,
+            "phid": phid,
+            "fields": {
+                "status": {"value": "accepted"},
+                "repositoryPHID": repo_phid,
+                "diffPHID": f"PHID-DIFF-{i}",
+            },
+        }
+        for i, phid in enumerate(sorted(nodes))
+    }
+    diffs = {
+        revision["fields"]["diffPHID"]: {"fields": {}}
+        for revision in revisions.values()
+    }
+    repositories = {repo_phid: {"fields": {"shortName": "mozilla-central"}}}
+    return {"revisions": revisions, "diffs": diffs, "repositories": repositories}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=5, help="runs per benchmark")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "lando.test_settings")
+    import django
+
+    django.setup()
+
+    from lando.api.legacy.stacks import (
+        RevisionData,
+        RevisionStack,
+        calculate_landable_subgraphs,
+    )
+
+    implementations = {"RevisionStack": RevisionStack}
+    if networkx_stack := networkx_revision_stack_class():
+        implementations["networkx"] = networkx_stack
+
+    for name, build in STACKS.items():
+        stack = build()
+        for implementation, stack_class in implementations.items():
+            seconds = timeit.timeit(
+                functools.partial(walk_stack, stack_class, stack), number=args.number
+            )
+            print(
+                f"{name:<24} {implementation:<16} "
+                f"{seconds / args.number * 1000:10.3f} ms/run"
+            )
+
+    for name, build in STACKS.items():
+        stack = build()
+        revision_data = RevisionData(**landable_stack_data(stack))
+        seconds = timeit.timeit(
+            functools.partial(
+                calculate_landable_subgraphs,
+                revision_data,
+                stack[1],
+                {"PHID-REPO-1"},
+            ),
+            number=args.number,
+        )
+        print(
+            f"{name:<24} {'landable':<16} {seconds / args.number * 1000:10.3f} ms/run"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -200,6 +200,19 @@ def request_mocker():
         yield m
 
 
+@pytest.fixture
+def locmem_cache(request, settings):
+    """Use an empty in-memory cache, private to the test, instead of the dummy one."""
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": request.node.name,
+        }
+    }
+    cache.clear()
+    yield cache
+
+
 @pytest.fixture
 def phabdouble(monkeypatch):
     """Mock the Phabricator service and build fake response objects."""
@@ -239,6 +239,18 @@ class PhabricatorDouble:
         def philter(edge):
             return phid not in (edge["sourcePHID"], edge["destinationPHID"])
 
+        modified = {
+            edge_phid
+            for edge in self._edges
+            if not philter(edge)
+            for edge_phid in (edge["sourcePHID"], edge["destinationPHID"])
+        }
+        modified.add(phid)
+        modified.update(rev["phid"] for rev in depends_on)
+        for revision in self._revisions:
+            if revision["phid"] in modified:
+                self._touch(revision)
+
         self._edges = list(filter(philter, self._edges))
 
         for rev in depends_on:
@@ -319,6 +331,7 @@ class PhabricatorDouble:
         }
 
         for rev in depends_on:
+            self._touch(rev)
             self._edges.append(
                 {
                     "edgeType": "revision.parent",
@@ -481,6 +494,8 @@ class PhabricatorDouble:
         }
 
         self._diffs.append(diff)
+        if revision is not None:
+            self._touch(revision)
         self._phids.append(
             {
                 "phid": phid,
@@ -584,6 +599,7 @@ class PhabricatorDouble:
             current_reviewers[0].update(reviewer)
         else:
             self._reviewers.append(reviewer)
+        self._touch(revision)
 
         return reviewer
 
@@ -686,6 +702,7 @@ class PhabricatorDouble:
             "fields": fields,
         }
         self._transactions.append(transaction)
+        self._touch(object)
         self._phids.append(
             {
                 "phid": phid,
@@ -1236,6 +1253,9 @@ class PhabricatorDouble:
                 error_info, error_code="ERR-CONDUIT-CORE", error_info=error_info
             )
 
+        if revision is not None:
+            self._touch(revision)
+
         # WARNING: This assumes all transactions actually applied. If a
         # transaction is a NOOP (such as a projects.remove which attempts
         # to remove a project that isn't there) it will not be listed
@@ -1774,6 +1794,11 @@ class PhabricatorDouble:
         self._phid_counters[prefix] = self._phid_counters.get(prefix, 0) + 1
         return "PHID-{}{}".format(prefix, suffix)
 
+    @staticmethod
+    def _touch(item: dict):
+        """Bump the `dateModified` of an object, as Phabricator does on any change."""
+        item["dateModified"] += 1
+
     @staticmethod
     def _new_id(items, *, field="id"):
         return max([i[field] for i in items] + [0]) + 1
@@ -10,6 +10,7 @@ from lando.main.scm import (
     HgCommandError,
     HgException,
     HgSCM,
+    Patch,
     PatchConflict,
     SCMInternalServerError,
     SCMLostPushRace,
@@ -71,6 +72,56 @@ def test_integrated_hgrepo_clean_repo(hg_clone):
         assert not repo.run_hg_cmds([["status"]])
 
 
+def test_integrated_hgrepo_clean_repo_incremental(hg_clone):
+    repo = HgSCM(hg_clone.strpath)
+
+    with repo.for_pull(), hg_clone.as_cwd():
+        # A full clean leaves the repo in a known state.
+        repo.clean_repo()
+        assert repo.touched_paths == set()
+
+        ph = HgPatchHelper(io.StringIO(PATCH_NORMAL))
+        repo.apply_patch(
+            ph.get_diff(),
+            ph.get_commit_description(),
+            ph.get_header("User"),
+            ph.get_header("Date"),
+        )
+        assert repo.touched_paths == {"test.txt"}
+
+        hg_clone.join("test.txt").write("Extra data", mode="a")
+        hg_clone.join("test.txt.orig").write("backup", mode="w+")
+        untouched_file = hg_clone.join("untouched.txt")
+        untouched_file.write("text", mode="w+")
+
+        # Only the touched paths are cleaned.
+        repo.clean_repo(strip_non_public_commits=False)
+        assert repo.touched_paths == set()
+        assert repo.run_hg(["outgoing"])
+        assert repo.run_hg(["status"]).decode() == "? untouched.txt\n"
+
+        # Stripping changesets doesn't need a full clean either.
+        repo.clean_repo()
+        with pytest.raises(HgCommandError, match="no changes found"):
+            repo.run_hg_cmds([["outgoing"]])
+        assert repo.run_hg(["status"]).decode() == "? untouched.txt\n"
+
+        repo.apply_patch(
+            ph.get_diff(),
+            ph.get_commit_description(),
+            ph.get_header("User"),
+            ph.get_header("Date"),
+        )
+        repo.run_hg(["add", untouched_file.strpath])
+
+        # Other local changes prevent stripping, and fall back to a full clean.
+        repo.clean_repo()
+        with pytest.raises(HgCommandError, match="no changes found"):
+            repo.run_hg_cmds([["outgoing"]])
+        assert not untouched_file.exists()
+        assert not repo.run_hg(["status"])
+
+
 def test_integrated_hgrepo_can_log(hg_clone):
     repo = HgSCM(hg_clone.strpath)
     with repo.for_pull():
@@ -245,6 +296,83 @@ def test_integrated_hgrepo_apply_patch_newline_bug(hg_clone):
         assert "file removed" in str(repo.run_hg(["outgoing"]))
 
 
+PATCH_NORMAL_FOLLOWUP = r"""
+# HG changeset patch
+# User Other User <other@example.com>
+# Date 1 0
+#      Thu Jan 01 00:00:01 1970 +0000
+# Diff Start Line 9
+add a third line.
+
+Bug 1 - こんにちは
+diff --git a/test.txt b/test.txt
+--- a/test.txt
++++ b/test.txt
+@@ -1,2 +1,3 @@
+ TEST
+ adding another line
++adding a third line
+""".strip()
+
+
+def _patches(*exports: str) -> list[Patch]:
+    patches = []
+    for export in exports:
+        ph = HgPatchHelper(io.StringIO(export))
+        patches.append(
+            Patch(
+                ph.get_diff(),
+                ph.get_commit_description(),
+                ph.get_header("User"),
+                ph.get_header("Date"),
+            )
+        )
+    return patches
+
+
+def test_integrated_hgrepo_apply_patches(monkeypatch, hg_clone):
+    repo = HgSCM(hg_clone.strpath)
+    run_hg = mock.MagicMock(side_effect=repo.run_hg)
+    monkeypatch.setattr(repo, "run_hg", run_hg)
+
+    with repo.for_pull():
+        # Start from a clean repo, so that the touched paths are tracked.
+        repo.clean_repo()
+        run_hg.reset_mock()
+
+        repo.apply_patches(_patches(PATCH_NORMAL, PATCH_NORMAL_FOLLOWUP))
+
+        commands = [call.args[0][0] for call in run_hg.call_args_list]
+        assert commands.count("import") == 1, "The stack should be imported at once"
+        assert "commit" not in commands
+        assert repo.touched_paths == {"test.txt"}
+
+        log = repo.run_hg(
+            ["log", "-r", "outgoing()", "-T", "{author}|{desc}|{extras}\n"]
+        ).decode("utf-8")
+        assert [line.split("|", 2)[:2] for line in log.splitlines()] == [
+            ["Test User <test@example.com>", "add another file."],
+            [
+                "Other User <other@example.com>",
+                "add a third line.\n\nBug 1 - こんにちは",
+            ],
+        ]
+        assert log.count("moz-landing-system=lando") == 2
+
+
+def test_integrated_hgrepo_apply_patches_conflict(hg_clone):
+    repo = HgSCM(hg_clone.strpath)
+
+    with repo.for_pull():
+        with pytest.raises(PatchConflict) as exc:
+            repo.apply_patches(
+                _patches(PATCH_NORMAL, PATCH_WITH_CONFLICT, PATCH_NORMAL_FOLLOWUP)
+            )
+
+        assert exc.value.patch_index == 1, "The conflicting patch should be reported"
+        assert repo.changeset_descriptions() == ["add another file."]
+
+
 def test_hg_exceptions():
     """Ensure the correct exception is raised if a particular snippet is present."""
     snippet_exception_mapping = {
@@ -263,15 +391,68 @@ def test_hg_exceptions():
 
 
 def test_hgrepo_request_user(hg_clone):
-    """Test that the request user environment variable is set and unset correctly."""
+    """Test that the request user is passed to the push command only."""
     repo = HgSCM(hg_clone.strpath)
     request_user_email = "test@example.com"
 
-    assert REQUEST_USER_ENV_VAR not in os.environ
+    with pytest.raises(ValueError, match=REQUEST_USER_ENV_VAR):
+        repo.push(hg_clone.strpath)
+
+    repo.run_hg = mock.MagicMock()
     with repo.for_push(request_user_email):
-        assert REQUEST_USER_ENV_VAR in os.environ
-        assert os.environ[REQUEST_USER_ENV_VAR] == "test@example.com"
-    assert REQUEST_USER_ENV_VAR not in os.environ
+        assert REQUEST_USER_ENV_VAR not in os.environ
+        repo.push(hg_clone.strpath)
+    assert repo.request_user is None
+
+    push_args = repo.run_hg.call_args_list[0][0][0]
+    ssh_config = push_args[push_args.index("--config") + 1]
+    assert ssh_config.startswith(f"ui.ssh={REQUEST_USER_ENV_VAR}=test@example.com ssh")
+
+
+def test_hgrepo_command_server_reused(hg_clone):
+    """Test that the command server is reused across jobs, and restarted as needed."""
+    repo = HgSCM(hg_clone.strpath)
+
+    with repo.for_pull():
+        server_pid = repo.hg_repo.server.pid
+    with repo.for_push("test@example.com"):
+        assert repo.hg_repo.server.pid == server_pid
+
+    # A dead command server is replaced on the next command.
+    repo.hg_repo.server.kill()
+    repo.hg_repo.server.wait()
+    repo.run_hg(["status"])
+    assert repo.hg_repo.server.pid != server_pid
+
+    # The command server is recycled after running too many commands.
+    server_pid = repo.hg_repo.server.pid
+    repo.server_commands = repo.SERVER_MAX_COMMANDS
+    repo.run_hg(["status"])
+    assert repo.hg_repo.server.pid != server_pid
+    assert repo.server_commands == 1
+
+
+def test_integrated_hgrepo_clone_bootstrap(hg_server, hg_clone, hg_test_bundle, tmpdir):
+    # Push a commit the bundle doesn't have, to be pulled after unbundling.
+    upstream = HgSCM(hg_clone.strpath)
+    with upstream.for_pull(), hg_clone.as_cwd():
+        new_file = hg_clone.join("new-file.txt")
+        new_file.write("text", mode="w+")
+        upstream.run_hg_cmds(
+            [
+                ["add", new_file.strpath],
+                ["commit", "-m", "new public commit"],
+                ["push", hg_server],
+            ]
+        )
+        upstream_head = upstream.head_ref()
+
+    clone_dir = tmpdir.join("hg_bootstrap_clone")
+    repo = HgSCM(clone_dir.strpath)
+    repo.clone(hg_server, bootstrap_source=str(hg_test_bundle))
+
+    assert repo.head_ref() == upstream_head
+    assert repo.run_hg(["paths", "default"]).decode().strip() == hg_server
 
 
 @pytest.mark.parametrize(
@@ -1,4 +1,5 @@
 import json
+import unittest.mock as mock
 
 import pytest
 
@@ -170,3 +171,154 @@ def test_landing_job_acquire_job_job_queue_query(db, mocked_repo_config):
     assert queue_items[0].id == jobs[2].id
     assert queue_items[1].id == jobs[0].id
     assert jobs[1] not in queue_items
+
+
+def test_landing_job_claim_next_job(db, mocked_repo_config):
+    repo = Repo.objects.create(name="test-repo", scm_type=SCM_TYPE_HG)
+    jobs = [
+        LandingJob.objects.create(
+            status=LandingJobStatus.SUBMITTED,
+            requester_email="test@example.com",
+            target_repo=repo,
+        )
+        for _ in range(2)
+    ]
+
+    job = LandingJob.claim_next_job("worker-1", repositories=[repo], grace_seconds=0)
+    assert job.id == jobs[0].id
+    job.refresh_from_db()
+    assert job.status == LandingJobStatus.IN_PROGRESS
+    assert job.attempts == 1
+    assert job.claimed_by == "worker-1"
+    assert job.lease_expires_at is not None
+
+    # Only one job per repository can be claimed at a time.
+    assert (
+        LandingJob.claim_next_job("worker-2", repositories=[repo], grace_seconds=0)
+        is None
+    )
+
+    assert job.renew_lease("worker-1")
+    assert not job.renew_lease("worker-2"), "Only the claiming worker may renew."
+
+
+def test_landing_job_claim_next_job_expired_lease(db, mocked_repo_config):
+    repo = Repo.objects.create(name="test-repo", scm_type=SCM_TYPE_HG)
+    job = LandingJob.objects.create(
+        status=LandingJobStatus.SUBMITTED,
+        requester_email="test@example.com",
+        target_repo=repo,
+    )
+
+    LandingJob.claim_next_job(
+        "worker-1", repositories=[repo], lease_seconds=-1, grace_seconds=0
+    )
+
+    # The lease has expired, e.g. because the worker died mid-job, so another
+    # worker can pick the job up.
+    claimed_job = LandingJob.claim_next_job(
+        "worker-2", repositories=[repo], grace_seconds=0
+    )
+    assert claimed_job.id == job.id
+    assert claimed_job.claimed_by == "worker-2"
+    assert claimed_job.attempts == 2
+
+
+def test_landing_job_claim_next_job_without_lease(db, mocked_repo_config):
+    repo = Repo.objects.create(name="test-repo", scm_type=SCM_TYPE_HG)
+    job = LandingJob.objects.create(
+        status=LandingJobStatus.IN_PROGRESS,
+        requester_email="test@example.com",
+        target_repo=repo,
+    )
+    LandingJob.objects.create(
+        status=LandingJobStatus.SUBMITTED,
+        requester_email="test@example.com",
+        target_repo=repo,
+    )
+
+    # Jobs without a lease, e.g. left over by an older worker, are claimed again.
+    claimed_job = LandingJob.claim_next_job(
+        "worker-1", repositories=[repo], grace_seconds=0
+    )
+    assert claimed_job.id == job.id
+    assert claimed_job.lease_expires_at is not None
+
+
+def test_landing_job_claim_batch(db, mocked_repo_config):
+    repo = Repo.objects.create(
+        name="test-repo", scm_type=SCM_TYPE_HG, landing_batch_size=3
+    )
+    jobs = [
+        LandingJob.objects.create(
+            status=LandingJobStatus.SUBMITTED,
+            requester_email=email,
+            target_repo=repo,
+        )
+        for email in (
+            "test@example.com",
+            "test@example.com",
+            "other@example.com",
+            "test@example.com",
+        )
+    ]
+
+    job = LandingJob.claim_next_job("worker-1", repositories=[repo], grace_seconds=0)
+    assert job.id == jobs[0].id
+
+    # The batch stops at the first job from another requester.
+    batch = job.claim_batch(repo.landing_batch_size - 1, grace_seconds=0)
+    assert [batch_job.id for batch_job in batch] == [jobs[1].id]
+    batch[0].refresh_from_db()
+    assert batch[0].status == LandingJobStatus.IN_PROGRESS
+    assert batch[0].claimed_by == "worker-1"
+
+    for queued_job in jobs[2:]:
+        queued_job.refresh_from_db()
+        assert queued_job.status == LandingJobStatus.SUBMITTED
+
+
+def test_landing_job_claim_batch_deferred(db, mocked_repo_config):
+    repo = Repo.objects.create(
+        name="test-repo", scm_type=SCM_TYPE_HG, landing_batch_size=3
+    )
+    job = LandingJob.objects.create(
+        status=LandingJobStatus.SUBMITTED,
+        requester_email="test@example.com",
+        target_repo=repo,
+    )
+    job = LandingJob.claim_next_job("worker-1", repositories=[repo], grace_seconds=0)
+    LandingJob.objects.create(
+        status=LandingJobStatus.DEFERRED,
+        requester_email="test@example.com",
+        target_repo=repo,
+    )
+    LandingJob.objects.create(
+        status=LandingJobStatus.SUBMITTED,
+        requester_email="test@example.com",
+        target_repo=repo,
+    )
+
+    # Jobs queued behind a deferred job don't land ahead of it.
+    assert job.claim_batch(repo.landing_batch_size - 1, grace_seconds=0) == []
+
+
+def test_landing_job_notify_submitted(db, mocked_repo_config, monkeypatch):
+    repo = Repo.objects.create(name="test-repo", scm_type=SCM_TYPE_HG)
+    mock_notify = mock.MagicMock()
+    monkeypatch.setattr(LandingJob, "notify_submitted", mock_notify)
+
+    job = LandingJob.objects.create(
+        requester_email="test@example.com", target_repo=repo
+    )
+    assert mock_notify.call_count == 0, "Jobs are only announced once submitted."
+
+    job.status = LandingJobStatus.SUBMITTED
+    job.save()
+    job.save()
+    assert mock_notify.call_count == 1
+
+    job = LandingJob.objects.get(id=job.id)
+    job.status = LandingJobStatus.IN_PROGRESS
+    job.save()
+    assert mock_notify.call_count == 1
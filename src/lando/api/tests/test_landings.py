@@ -1,3 +1,4 @@
+import datetime
 import io
 import textwrap
 import unittest.mock as mock
@@ -281,6 +282,10 @@ def test_integrated_execute_job(
     assert (
         mock_trigger_update.call_count == 1
     ), "Successful landing should trigger Phab repo update."
+    assert {"update_repo", "apply_patches", "push"} <= set(
+        job.stage_timings["stages"]
+    ), "Landing stages should be timed"
+    assert "hg push" in job.stage_timings["commands"]
 
 
 @pytest.mark.django_db
@@ -519,6 +524,68 @@ def test_merge_conflict(
         ), f"Empty or missing reject content for failed path {fp}"
 
 
+@pytest.mark.django_db
+def test_run_jobs_batch_with_conflict(
+    hg_server,
+    hg_clone,
+    treestatusdouble,
+    monkeypatch,
+    create_patch_revision,
+    normal_patch,
+):
+    treestatusdouble.open_tree("mozilla-central")
+    repo = Repo.objects.create(
+        scm_type=SCM_TYPE_HG,
+        name="mozilla-central",
+        url=hg_server,
+        required_permission=SCM_LEVEL_3,
+        push_path=hg_server,
+        pull_path=hg_server,
+        system_path=hg_clone.strpath,
+        landing_batch_size=3,
+    )
+    job_params = {
+        "status": LandingJobStatus.IN_PROGRESS,
+        "requester_email": "test@example.com",
+        "target_repo": repo,
+        "attempts": 1,
+    }
+    jobs = [
+        add_job_with_revisions(
+            [create_patch_revision(number, patch=patch)], **job_params
+        )
+        for number, patch in (
+            (1, normal_patch(0)),
+            (2, PATCH_FORMATTED_2),
+            (3, normal_patch(1)),
+        )
+    ]
+
+    worker = LandingWorker(repos=Repo.objects.all(), sleep_seconds=0.01)
+    mock_trigger_update = mock.MagicMock()
+    monkeypatch.setattr(
+        "lando.api.legacy.workers.landing_worker.LandingWorker.phab_trigger_repo_update",
+        mock_trigger_update,
+    )
+    mock_notify = mock.MagicMock()
+    monkeypatch.setattr(
+        "lando.api.legacy.workers.landing_worker.LandingWorker.notify_user_of_landing_failure",
+        mock_notify,
+    )
+
+    assert worker.run_jobs(jobs)
+
+    # The conflicting job fails, and does not prevent the others from landing.
+    assert jobs[0].status == LandingJobStatus.LANDED, jobs[0].error
+    assert jobs[1].status == LandingJobStatus.FAILED
+    assert jobs[2].status == LandingJobStatus.LANDED, jobs[2].error
+    assert jobs[0].landed_commit_id != jobs[2].landed_commit_id
+    assert mock_notify.call_count == 1
+    assert (
+        mock_trigger_update.call_count == 1
+    ), "A batch should trigger a single Phab repo update."
+
+
 @pytest.mark.django_db
 def test_failed_landing_job_notification(
     hg_server,
@@ -573,9 +640,171 @@ def test_failed_landing_job_notification(
     assert mock_notify.call_count == 1
 
 
+@pytest.mark.django_db
+def test_landing_worker_keeps_lease_on_error(treestatusdouble, monkeypatch):
+    treestatusdouble.open_tree("mozilla-central")
+    repo = Repo.objects.create(
+        scm_type=SCM_TYPE_HG,
+        name="mozilla-central",
+        url="http://hg.test",
+        required_permission=SCM_LEVEL_3,
+    )
+    job = LandingJob.objects.create(
+        status=LandingJobStatus.SUBMITTED,
+        requester_email="test@example.com",
+        target_repo=repo,
+    )
+    LandingJob.objects.filter(id=job.id).update(
+        created_at=job.created_at - datetime.timedelta(hours=1)
+    )
+
+    worker = LandingWorker(repos=Repo.objects.all(), sleep_seconds=0.01)
+    monkeypatch.setattr(
+        worker, "run_jobs", mock.MagicMock(side_effect=RuntimeError("worker died"))
+    )
+    with pytest.raises(RuntimeError):
+        worker.loop()
+
+    # The job is kept claimed until its lease expires, then claimed again.
+    job.refresh_from_db()
+    assert job.status == LandingJobStatus.IN_PROGRESS
+    assert job.lease_expires_at is not None
+    assert LandingJob.claim_next_job("other-worker", grace_seconds=0) is None
+
+    LandingJob.objects.filter(id=job.id).update(
+        lease_expires_at=job.lease_expires_at - datetime.timedelta(days=1)
+    )
+    claimed_job = LandingJob.claim_next_job("other-worker", grace_seconds=0)
+    assert claimed_job.id == job.id
+    assert claimed_job.attempts == 2
+
+
+@pytest.mark.django_db
+def test_landing_worker_start_lanes(treestatusdouble, monkeypatch):
+    repos = [
+        Repo.objects.create(
+            scm_type=SCM_TYPE_HG,
+            name=name,
+            url=f"http://hg.test/{name}",
+            required_permission=SCM_LEVEL_3,
+        )
+        for name in ("mozilla-central", "mozilla-beta")
+    ]
+    for repo in repos:
+        treestatusdouble.open_tree(repo.name)
+
+    mock_context = mock.MagicMock()
+    lane = mock_context.Process.return_value
+    lane.is_alive.return_value = False
+    lane.exitcode = 0
+    monkeypatch.setattr(
+        "lando.api.legacy.workers.landing_worker.multiprocessing.get_context",
+        mock.MagicMock(return_value=mock_context),
+    )
+
+    worker = LandingWorker(repos=Repo.objects.all(), sleep_seconds=0.01)
+    worker.start_lanes(max_loops=1)
+
+    assert mock_context.Process.call_count == len(
+        repos
+    ), "One lane should be started per repo."
+    lane_repo_ids = {
+        call.kwargs["args"][0] for call in mock_context.Process.call_args_list
+    }
+    assert lane_repo_ids == {repo.id for repo in repos}
+    assert lane.start.call_count == len(repos)
+
+
+@pytest.mark.django_db
+def test_landing_worker_start_lanes_restart(treestatusdouble, monkeypatch):
+    repo = Repo.objects.create(
+        scm_type=SCM_TYPE_HG,
+        name="mozilla-central",
+        url="http://hg.test/mozilla-central",
+        required_permission=SCM_LEVEL_3,
+    )
+    treestatusdouble.open_tree(repo.name)
+
+    events = []
+    crashed_lane = mock.MagicMock(exitcode=1)
+    crashed_lane.is_alive.return_value = False
+    exited_lane = mock.MagicMock(exitcode=0)
+    exited_lane.is_alive.return_value = False
+    lanes = iter([crashed_lane, exited_lane])
+
+    def process(**kwargs):
+        events.append("fork")
+        return next(lanes)
+
+    mock_context = mock.MagicMock()
+    mock_context.Process.side_effect = process
+    monkeypatch.setattr(
+        "lando.api.legacy.workers.landing_worker.multiprocessing.get_context",
+        mock.MagicMock(return_value=mock_context),
+    )
+    monkeypatch.setattr(
+        "lando.api.legacy.workers.landing_worker.connections.close_all",
+        lambda: events.append("close_all"),
+    )
+
+    worker = LandingWorker(repos=Repo.objects.all(), sleep_seconds=0.01)
+    worker.start_lanes()
+
+    assert events == [
+        "close_all",
+        "fork",
+        "close_all",
+        "fork",
+    ], "Database connections should be closed before each fork."
+
+
+def test_landing_worker_wait_for_job(treestatusdouble, monkeypatch):
+    monkeypatch.setattr(
+        "lando.api.legacy.workers.landing_worker.DEFAULT_GRACE_SECONDS", 0.5
+    )
+    worker = LandingWorker(repos=[], sleep_seconds=5)
+    worker.queue_listener = mock.MagicMock()
+
+    # A job submission wakes the worker up before the fallback timeout.
+    worker.queue_listener.wait.return_value = ["1"]
+    worker.wait_for_job()
+    assert worker.queue_listener.wait.call_args[0][0] == 5
+
+    # The next wait ends when the submitted job leaves its grace period.
+    worker.queue_listener.wait.return_value = []
+    worker.wait_for_job()
+    assert worker.queue_listener.wait.call_args[0][0] <= 0.5
+
+
+@pytest.mark.django_db
+def test_landing_worker_prefetch_next_job(treestatusdouble, monkeypatch):
+    treestatusdouble.open_tree("mozilla-central")
+    repo = Repo.objects.create(
+        scm_type=SCM_TYPE_HG,
+        name="mozilla-central",
+        url="http://hg.test/mozilla-central",
+        required_permission=SCM_LEVEL_3,
+    )
+    current_job, next_job = (
+        LandingJob.objects.create(
+            status=status, requester_email="test@example.com", target_repo=repo
+        )
+        for status in (LandingJobStatus.IN_PROGRESS, LandingJobStatus.SUBMITTED)
+    )
+
+    worker = LandingWorker(repos=Repo.objects.all(), sleep_seconds=0.01)
+    scm = worker.get_scm(repo)
+    scm.prefetch = mock.MagicMock()
+
+    worker.prefetch_next_job(current_job)
+    worker.wait_for_prefetch(repo)
+
+    scm.prefetch.assert_called_once_with(repo.pull_path)
+    assert not worker.prefetch_threads
+
+
 def test_landing_worker__extract_error_data():
-    exception_message = textwrap.dedent(
-        """\
+    exception_message = textwrap.dedent("""\
     patching file toolkit/moz.configure
     Hunk #1 FAILED at 2075
     Hunk #2 FAILED at 2325
@@ -601,8 +830,7 @@ def test_landing_worker__extract_error_data():
     1 out of 1 hunks FAILED -- saving rejects to file abc/def.rej
     patching file browser/locales/en-US/browser/browserContext.ftl
     Hunk #1 succeeded at 300 with fuzz 2 (offset -4 lines).
-    abort: patch failed to apply"""
-    )
+    abort: patch failed to apply""")
 
     expected_failed_paths = [
         "toolkit/moz.configure",
@@ -1,8 +1,12 @@
+import unittest.mock as mock
+
 import pytest
 
 from lando.utils.phabricator import (
+    CONDUIT_PAGE_LIMIT,
     PhabricatorCommunicationException,
     PhabricatorRevisionStatus,
+    PhidCache,
     result_list_to_phid_dict,
 )
 
@@ -63,3 +67,90 @@ def test_result_list_to_phid_dict_duplicate_phids_raises():
         result_list_to_phid_dict(
             [{"phid": "PHID-DREV-1", "data": [1]}, {"phid": "PHID-DREV-1", "data": [2]}]
         )
+
+
+def test_phid_cache_fetches_only_misses(phabdouble, locmem_cache, monkeypatch):
+    phab = phabdouble.get_phabricator_client()
+    call_conduit = mock.MagicMock(side_effect=phabdouble.call_conduit)
+    monkeypatch.setattr(phab, "call_conduit", call_conduit)
+
+    user_cache = PhidCache("user.search")
+    alice = phabdouble.user(username="alice")
+    bob = phabdouble.user(username="bob")
+    missing_phid = "PHID-USER-missing"
+
+    result = user_cache.search(phab, [alice["phid"], missing_phid])
+    assert set(result) == {alice["phid"]}
+    assert call_conduit.call_args.kwargs["constraints"]["phids"] == [
+        alice["phid"],
+        missing_phid,
+    ]
+
+    result = user_cache.search(phab, [alice["phid"], bob["phid"], missing_phid])
+    assert set(result) == {alice["phid"], bob["phid"]}
+    assert call_conduit.call_count == 2
+    assert call_conduit.call_args.kwargs["constraints"]["phids"] == [
+        bob["phid"],
+        missing_phid,
+    ], "Only the PHIDs missing from the cache should be searched for."
+
+    assert user_cache.search(phab, [alice["phid"], bob["phid"]]).keys() == {
+        alice["phid"],
+        bob["phid"],
+    }
+    assert call_conduit.call_count == 2
+    assert (user_cache.hits, user_cache.misses) == (3, 4)
+
+
+def test_phid_cache_per_api_token(phabdouble, locmem_cache, monkeypatch):
+    phab = phabdouble.get_phabricator_client()
+    other_phab = phabdouble.get_phabricator_client()
+    other_phab.api_token = "api-otherapitoken"
+    call_conduit = mock.MagicMock(side_effect=phabdouble.call_conduit)
+    monkeypatch.setattr(phab, "call_conduit", call_conduit)
+    monkeypatch.setattr(other_phab, "call_conduit", call_conduit)
+
+    user_cache = PhidCache("user.search")
+    alice = phabdouble.user(username="alice")
+
+    user_cache.search(phab, [alice["phid"]])
+    user_cache.search(phab, [alice["phid"]])
+    assert call_conduit.call_count == 1
+
+    user_cache.search(other_phab, [alice["phid"]])
+    assert (
+        call_conduit.call_count == 2
+    ), "Objects cached for a token should not be used with another token."
+
+
+def test_phid_cache_chunks_searches(phabdouble, locmem_cache, monkeypatch):
+    phab = phabdouble.get_phabricator_client()
+    call_conduit = mock.MagicMock(side_effect=phabdouble.call_conduit)
+    monkeypatch.setattr(phab, "call_conduit", call_conduit)
+
+    user_cache = PhidCache("user.search")
+    phids = [f"PHID-USER-{i}" for i in range(CONDUIT_PAGE_LIMIT + 1)]
+
+    user_cache.search(phab, phids)
+    assert sorted(
+        len(call.kwargs["constraints"]["phids"]) for call in call_conduit.call_args_list
+    ) == [1, CONDUIT_PAGE_LIMIT]
+    for call in call_conduit.call_args_list:
+        assert call.kwargs["limit"] <= CONDUIT_PAGE_LIMIT
+
+
+def test_phid_cache_versions(phabdouble, locmem_cache, monkeypatch):
+    phab = phabdouble.get_phabricator_client()
+    call_conduit = mock.MagicMock(side_effect=phabdouble.call_conduit)
+    monkeypatch.setattr(phab, "call_conduit", call_conduit)
+
+    diff_cache = PhidCache("differential.diff.search", attachments={"commits": True})
+    diff = phabdouble.diff()
+
+    diff_cache.search(phab, [diff["phid"]], versions={diff["phid"]: 1})
+    diff_cache.search(phab, [diff["phid"]], versions={diff["phid"]: 1})
+    assert call_conduit.call_count == 1
+
+    result = diff_cache.search(phab, [diff["phid"]], versions={diff["phid"]: 2})
+    assert call_conduit.call_count == 2, "A new version should be fetched again."
+    assert result[diff["phid"]]["id"] == diff["id"]
@@ -7,7 +7,7 @@ import requests
 import requests_mock
 
 from lando.api.tests.utils import phab_url
-from lando.utils.phabricator import PhabricatorAPIException
+from lando.utils.phabricator import PhabricatorAPIException, PhabricatorClient
 
 pytestmark = pytest.mark.usefixtures("docker_env_vars")
 
@@ -83,3 +83,120 @@ def test_phabricator_exception(get_phab_client):
             phab.call_conduit("differential.query", ids=["1"])[0]
         assert e_info.value.error_code == error["error_code"]
         assert e_info.value.error_info == error["error_info"]
+
+
+def test_call_conduit_many_returns_results_in_order(get_phab_client):
+    phab = get_phab_client(api_key="api-key")
+    with requests_mock.mock() as m:
+        for method in ("user.search", "project.search", "conduit.ping"):
+            m.get(
+                phab_url(method),
+                status_code=200,
+                json={"result": method, "error_code": None, "error_info": None},
+            )
+
+        results = phab.call_conduit_many(
+            ("user.search", {"constraints": {"phids": ["PHID-USER-1"]}}),
+            ("project.search", {}),
+            ("conduit.ping", {}),
+        )
+
+    assert results == ["user.search", "project.search", "conduit.ping"]
+    assert m.call_count == 3
+
+
+@pytest.mark.parametrize("max_concurrent_calls", [1, 8])
+def test_gather_raises_first_exception(get_phab_client, settings, max_concurrent_calls):
+    settings.PHABRICATOR_MAX_CONCURRENT_CALLS = max_concurrent_calls
+    phab = get_phab_client(api_key="api-key")
+    error_json = {
+        "result": None,
+        "error_code": "ERR-CONDUIT-CORE",
+        "error_info": "BOOM",
+    }
+
+    with requests_mock.mock() as m:
+        m.get(
+            phab_url("conduit.ping"),
+            status_code=200,
+            json={"result": [], "error_code": None, "error_info": None},
+        )
+        m.get(phab_url("user.search"), status_code=500, json=error_json)
+
+        with pytest.raises(PhabricatorAPIException) as e_info:
+            phab.gather(
+                lambda: phab.call_conduit("conduit.ping"),
+                lambda: phab.call_conduit("user.search"),
+            )
+
+    assert e_info.value.error_info == "BOOM"
+
+
+def test_clients_share_session_per_host():
+    phab = PhabricatorClient("http://phabricator.test", "api-key")
+    other = PhabricatorClient("http://phabricator.test/", "other-api-key")
+    elsewhere = PhabricatorClient("http://elsewhere.test", "api-key")
+
+    assert phab.session is other.session
+    assert phab.session is not elsewhere.session
+
+
+def test_search_retried_after_connection_error(get_phab_client):
+    phab = get_phab_client(api_key="api-key")
+    with requests_mock.mock() as m:
+        m.get(
+            phab_url("user.search"),
+            [
+                {"exc": requests.ConnectionError},
+                {"status_code": 503, "text": "Service Unavailable"},
+                {
+                    "status_code": 200,
+                    "json": {"result": [], "error_code": None, "error_info": None},
+                },
+            ],
+        )
+
+        assert phab.call_conduit("user.search") == []
+        assert m.call_count == 3
+
+
+def test_edit_not_retried_after_connection_error(get_phab_client):
+    phab = get_phab_client(api_key="api-key")
+    with requests_mock.mock() as m:
+        m.get(phab_url("differential.revision.edit"), exc=requests.ConnectionError)
+
+        with pytest.raises(PhabricatorAPIException):
+            phab.call_conduit("differential.revision.edit")
+        assert m.call_count == 1
+
+
+def test_verify_api_token_caches_valid_tokens(get_phab_client, locmem_cache):
+    with requests_mock.mock() as m:
+        m.get(
+            phab_url("user.whoami"),
+            [
+                {
+                    "status_code": 200,
+                    "json": {"result": {}, "error_code": None, "error_info": None},
+                },
+                {
+                    "status_code": 200,
+                    "json": {
+                        "result": None,
+                        "error_code": "ERR-INVALID-AUTH",
+                        "error_info": "API token is not valid.",
+                    },
+                },
+            ],
+        )
+
+        phab = get_phab_client(api_key="api-key")
+        assert phab.verify_api_token(cache_seconds=60)
+        assert phab.verify_api_token(cache_seconds=60)
+        assert m.call_count == 1
+
+        assert not phab.verify_api_token(), "Verification should not be cached."
+        assert not get_phab_client(api_key="other-key").verify_api_token(
+            cache_seconds=60
+        )
+        assert m.call_count == 3
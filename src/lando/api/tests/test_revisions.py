@@ -4,6 +4,7 @@ from lando.api.legacy.revisions import (
     check_author_planned_changes,
     check_diff_author_is_known,
     check_uplift_approval,
+    get_diff_base_revision,
     revision_is_secure,
     revision_needs_testing_tag,
 )
@@ -34,6 +35,20 @@ def test_check_diff_author_is_known_with_unknown_author(phabdouble):
     assert check_diff_author_is_known(diff=diff) is not None
 
 
+def test_get_diff_base_revision(phabdouble):
+    d = phabdouble.diff()
+    phabdouble.revision(diff=d, repo=phabdouble.repo())
+    diff = phabdouble.api_object_for(d)
+
+    assert get_diff_base_revision(diff) == "cff9ba1622714e0dd82c39f912f405210489fce8"
+
+    d = phabdouble.diff(refs=[])
+    phabdouble.revision(diff=d, repo=phabdouble.repo())
+    diff = phabdouble.api_object_for(d)
+
+    assert get_diff_base_revision(diff) is None
+
+
 @pytest.mark.parametrize(
     "status",
     [
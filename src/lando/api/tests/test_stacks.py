@@ -1,14 +1,28 @@
+import time
+import unittest.mock as mock
+
 import pytest
 from django.http import Http404
 
 from lando.api.legacy.stacks import (
+    RevisionData,
     RevisionStack,
     build_stack_graph,
     calculate_landable_subgraphs,
     get_landable_repos_for_revision_data,
+    get_landable_subgraphs,
     request_extended_revision_data,
 )
-from lando.main.models import Repo
+from lando.api.tests.benchmark_stacks import (
+    STACKS,
+    binary_tree_stack,
+    diamond_chain_stack,
+    landable_stack_data,
+    linear_stack,
+    walk_stack,
+    wide_stack,
+)
+from lando.main.models import Repo, StackIndex
 from lando.utils.phabricator import PhabricatorRevisionStatus
 
 
@@ -158,6 +172,27 @@ def test_request_extended_revision_data_single_revision_with_repo(phabdouble):
     assert repo["phid"] in data.repositories
 
 
+def test_request_extended_revision_data_memoized_for_request(phabdouble, monkeypatch):
+    phab = phabdouble.get_phabricator_client()
+    repo = phabdouble.repo()
+    revision = phabdouble.revision(diff=phabdouble.diff(), repo=repo)
+
+    call_conduit = mock.MagicMock(side_effect=phabdouble.call_conduit)
+    monkeypatch.setattr(phab, "call_conduit", call_conduit)
+
+    request_extended_revision_data(phab, [revision["phid"]])
+    request_extended_revision_data(phab, [revision["phid"]])
+    assert call_conduit.call_count == 6, "Results are not memoized outside requests"
+
+    call_conduit.reset_mock()
+    phab.request_cache = {}
+    data = request_extended_revision_data(phab, [revision["phid"]])
+    assert request_extended_revision_data(phab, [revision["phid"]]) is data
+    assert (
+        call_conduit.call_count == 3
+    ), "Each conduit call should be made once per request"
+
+
 def test_request_extended_revision_data_no_revisions(phabdouble):
     phab = phabdouble.get_phabricator_client()
     data = request_extended_revision_data(phab, [])
@@ -578,6 +613,43 @@ def test_calculate_landable_subgraphs_extra_check(phabdouble):
     assert blocked[r3["phid"]] == REASON
 
 
+def test_get_landable_subgraphs_stack_index(db, phabdouble, settings):
+    settings.STACK_INDEX_ENABLED = True
+    phab = phabdouble.get_phabricator_client()
+
+    repo = phabdouble.repo()
+    r1 = phabdouble.revision(repo=repo)
+    r2 = phabdouble.revision(repo=repo, depends_on=[r1])
+    r3 = phabdouble.revision(repo=repo, depends_on=[r2])
+
+    nodes, edges = build_stack_graph(phabdouble.api_object_for(r1))
+    ext_data = request_extended_revision_data(phab, list(nodes))
+
+    checked = []
+
+    def custom_check(*, revision, diff, repo):
+        checked.append(revision["phid"])
+        return "Blocked by custom check." if revision["id"] == r3["id"] else None
+
+    expected = ([[r1["phid"], r2["phid"]]], {r3["phid"]: "Blocked by custom check."})
+    result = get_landable_subgraphs(
+        ext_data, edges, {repo["phid"]}, other_checks=[custom_check]
+    )
+    assert result == expected
+    assert len(checked) == 3
+
+    result = get_landable_subgraphs(
+        ext_data, edges, {repo["phid"]}, other_checks=[custom_check]
+    )
+    assert result == expected
+    assert len(checked) == 3, "An unchanged stack should be read from the index."
+
+    ext_data.revisions[r2["phid"]]["fields"]["dateModified"] += 1
+    get_landable_subgraphs(ext_data, edges, {repo["phid"]}, other_checks=[custom_check])
+    assert len(checked) == 6, "A modified stack should be computed again."
+    assert StackIndex.objects.count() == 1, "Outdated indexes should be replaced."
+
+
 def test_calculate_landable_subgraphs_missing_repo(phabdouble):
     """Test to assert a missing repository for a revision is
     blocked with an appropriate error
@@ -663,6 +735,44 @@ def test_integrated_stack_endpoint_simple(
     )
 
 
+def test_integrated_stack_endpoint_stack_index(
+    db,
+    proxy_client,
+    phabdouble,
+    mocked_repo_config,
+    release_management_project,
+    sec_approval_project,
+    secure_project,
+    settings,
+):
+    settings.STACK_INDEX_ENABLED = True
+    repo = phabdouble.repo()
+    r1 = phabdouble.revision(repo=repo)
+    r2 = phabdouble.revision(repo=repo, depends_on=[r1])
+
+    response = proxy_client.get("/stacks/D{}".format(r2["id"]))
+    assert response.status_code == 200
+    assert response.json["landable_paths"] == [[r1["phid"], r2["phid"]]]
+    assert StackIndex.objects.count() == 1
+    assert StackIndex.objects.get().edges == [[r2["phid"], r1["phid"]]]
+
+    response = proxy_client.get("/stacks/D{}".format(r2["id"]))
+    assert response.status_code == 200
+    assert response.json["landable_paths"] == [[r1["phid"], r2["phid"]]]
+    assert StackIndex.objects.count() == 1
+
+    # Phabricator bumps `dateModified` whenever a revision changes.
+    r2["status"] = PhabricatorRevisionStatus.CHANGES_PLANNED
+    r2["dateModified"] += 1
+
+    response = proxy_client.get("/stacks/D{}".format(r2["id"]))
+    assert response.status_code == 200
+    assert response.json["landable_paths"] == [[r1["phid"]]]
+    revisions = {r["phid"]: r for r in response.json["revisions"]}
+    assert revisions[r2["phid"]]["blocked_reason"]
+    assert StackIndex.objects.count() == 1, "Outdated indexes should be replaced."
+
+
 def test_integrated_stack_endpoint_repos(
     db,
     proxy_client,
@@ -789,3 +899,73 @@ def test_revisionstack_stack():
         "Iterating over the stack from the root to a non-tip node should "
         "result in only the path from root to `head` as the response."
     )
+
+
+def test_revisionstack_multiple_paths():
+    # A diamond: 456 and 789 both depend on 123, and 000 depends on both.
+    nodes = {"000", "123", "456", "789"}
+    edges = {("456", "123"), ("789", "123"), ("000", "456"), ("000", "789")}
+
+    stack = RevisionStack(nodes, edges)
+
+    assert list(stack.root_revisions()) == ["123"]
+    assert list(stack.iter_stack_from_root("456")) == ["123", "456"]
+
+    with pytest.raises(ValueError, match="multiple paths"):
+        list(stack.iter_stack_from_root("000"))
+
+
+def test_revisionstack_no_path():
+    nodes = {"123", "456", "789"}
+    edges = {("456", "123")}
+
+    stack = RevisionStack(nodes, edges)
+
+    assert list(stack.root_revisions()) == ["123", "789"]
+    with pytest.raises(ValueError, match="no paths"):
+        list(stack.iter_stack_from_root("789"))
+
+
+@pytest.mark.parametrize(
+    "stack,path_count,path_length",
+    [
+        (linear_stack(500), 1, 500),
+        (binary_tree_stack(10), 2**9, 10),
+        (wide_stack(1000), 1000, 2),
+    ],
+)
+def test_calculate_landable_subgraphs_synthetic_stacks(stack, path_count, path_length):
+    nodes, edges, head = stack
+    revision_data = RevisionData(**landable_stack_data(stack))
+
+    landable, blocked = calculate_landable_subgraphs(
+        revision_data, edges, {"PHID-REPO-1"}
+    )
+
+    assert not blocked
+    assert len(landable) == path_count
+    assert all(len(path) == path_length for path in landable)
+    assert head in {path[-1] for path in landable}
+    assert {phid for path in landable for phid in path} == nodes
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "build",
+    [
+        *STACKS.values(),
+        # Too many paths to its head for any implementation enumerating them.
+        lambda: diamond_chain_stack(40),
+    ],
+    ids=[*STACKS, "diamond-chain-40"],
+)
+def test_stack_operations_time_bound(build):
+    # These take a few milliseconds each, the bound only catches regressions in
+    # complexity, e.g. going back to enumerating every path of a stack.
+    stack = build()
+    revision_data = RevisionData(**landable_stack_data(stack))
+
+    start = time.perf_counter()
+    walk_stack(RevisionStack, stack)
+    calculate_landable_subgraphs(revision_data, stack[1], {"PHID-REPO-1"})
+    assert time.perf_counter() - start < 1
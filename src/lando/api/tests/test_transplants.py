@@ -6,7 +6,9 @@ import pytest
 from lando.api.legacy.reviews import get_collated_reviewers
 from lando.api.legacy.transplants import (
     RevisionWarning,
+    RevisionWarningCheck,
     TransplantAssessment,
+    check_landing_warnings,
     warning_not_accepted,
     warning_previously_landed,
     warning_reviews_not_current,
@@ -21,7 +23,7 @@ from lando.main.models.landing_job import (
     add_job_with_revisions,
 )
 from lando.main.models.revision import Revision
-from lando.main.scm import SCM_TYPE_HG
+from lando.main.scm import SCM_TYPE_HG, HgSCM
 from lando.utils.phabricator import PhabricatorRevisionStatus, ReviewerStatus
 from lando.utils.tasks import admin_remove_phab_project
 
@@ -497,6 +499,46 @@ def test_warning_previously_landed_landed_landing(phabdouble, create_landing_job
     assert warning_previously_landed(revision=revision, diff=diff) is not None
 
 
+def test_check_landing_warnings_prefetches_once_per_stack(phabdouble):
+    to_land = []
+    for _ in range(3):
+        d = phabdouble.diff()
+        r = phabdouble.revision(diff=d)
+        to_land.append((phabdouble.api_object_for(r), phabdouble.api_object_for(d)))
+
+    prefetch = MagicMock(
+        side_effect=lambda to_land, **kwargs: {r["id"] for r, _ in to_land}
+    )
+
+    @RevisionWarningCheck(0, "Test warning.", prefetch={"prefetched_ids": prefetch})
+    def warning_prefetched(*, revision, prefetched_ids, **kwargs):
+        assert revision["id"] in prefetched_ids
+        return "Warning."
+
+    assessment = check_landing_warnings(
+        None,
+        None,
+        to_land,
+        None,
+        None,
+        {revision["phid"]: {} for revision, _ in to_land},
+        {},
+        {},
+        None,
+        [],
+        None,
+        revision_warnings=[warning_prefetched],
+    )
+
+    assert len(assessment.warnings) == 3
+    assert prefetch.call_count == 1, "Prefetches should run once for all revisions."
+
+    # Checks called on their own prefetch for their revision.
+    revision, diff = to_land[0]
+    assert warning_prefetched(revision=revision, diff=diff) is not None
+    assert prefetch.call_count == 2
+
+
 def test_warning_revision_secure_project_none(phabdouble):
     revision = phabdouble.api_object_for(
         phabdouble.revision(),
@@ -787,6 +829,69 @@ def test_integrated_transplant_records_approvers_peers_and_owners(
             assert revision.data["peers_and_owners"] == [102]
 
 
+@pytest.mark.django_db(transaction=True)
+def test_integrated_transplant_passes_base_revision_to_worker(
+    proxy_client,
+    hg_server,
+    hg_clone,
+    treestatusdouble,
+    register_codefreeze_uri,
+    monkeypatch,
+    normal_patch,
+    phabdouble,
+    checkin_project,
+    mock_permissions,
+):
+    treestatusdouble.open_tree("mozilla-central")
+    Repo.objects.create(
+        scm_type=SCM_TYPE_HG,
+        name="mozilla-central",
+        url=hg_server,
+        required_permission=SCM_LEVEL_3,
+        push_path=hg_server,
+        pull_path=hg_server,
+        system_path=hg_clone.strpath,
+    )
+    phabrepo = phabdouble.repo(name="mozilla-central")
+    user = phabdouble.user(username="reviewer")
+
+    d1 = phabdouble.diff(rawdiff=normal_patch(1))
+    r1 = phabdouble.revision(diff=d1, repo=phabrepo)
+    phabdouble.reviewer(r1, user)
+
+    response = proxy_client.post(
+        "/transplants",
+        json={
+            "landing_path": [
+                {"revision_id": "D{}".format(r1["id"]), "diff_id": d1["id"]},
+            ]
+        },
+        permissions=mock_permissions,
+    )
+    assert response.status_code == 202
+    job = LandingJob.objects.get(pk=response.json["id"])
+
+    # Recording the approvers keeps the base revision of the diff.
+    revision = job.revisions.get()
+    assert revision.data["approved_by"] == [user["id"]]
+    assert revision.data["base_revision"] == "cff9ba1622714e0dd82c39f912f405210489fce8"
+
+    applied_patches = []
+    apply_patches = HgSCM.apply_patches
+
+    def record_patches(scm, patches):
+        applied_patches.extend(patches)
+        return apply_patches(scm, patches)
+
+    monkeypatch.setattr(HgSCM, "apply_patches", record_patches)
+
+    worker = LandingWorker(repos=Repo.objects.all(), sleep_seconds=0.01)
+    assert worker.run_job(job)
+    assert [patch.base_revision for patch in applied_patches] == [
+        "cff9ba1622714e0dd82c39f912f405210489fce8"
+    ]
+
+
 @pytest.mark.django_db(transaction=True)
 def test_integrated_transplant_updated_diff_id_reflected_in_landed_revisions(
     proxy_client,
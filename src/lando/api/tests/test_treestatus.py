@@ -108,3 +108,81 @@ def test_is_open_for_approval_required_tree(treestatusdouble):
     ts = treestatusdouble.get_treestatus_client()
     treestatusdouble.set_tree("mozilla-central", status="approval required")
     assert ts.is_open("mozilla-central")
+
+
+def test_is_open_cached_bulk_fetch(treestatus_url):
+    api = TreeStatus(url=treestatus_url, cache_seconds=60)
+    trees = {
+        "result": {
+            "mozilla-central": {"status": "open", "tree": "mozilla-central"},
+            "autoland": {"status": "closed", "tree": "autoland"},
+        }
+    }
+    with requests_mock.mock() as m:
+        m.get(treestatus_url + "/trees", json=trees)
+
+        assert api.is_open("mozilla-central")
+        assert not api.is_open("autoland")
+        assert api.is_open("unknown-tree"), "Missing trees should be assumed open"
+        assert m.call_count == 1, "All trees should be fetched in a single request"
+
+        # An expired cache is refreshed.
+        api.cache_expires_at = 0
+        assert api.is_open("mozilla-central")
+        assert m.call_count == 2
+
+
+def test_is_open_cached_serves_stale_data_on_error(treestatus_url):
+    api = TreeStatus(url=treestatus_url, cache_seconds=60)
+    with requests_mock.mock() as m:
+        m.get(treestatus_url + "/trees", exc=requests.ConnectionError)
+
+        with pytest.raises(TreeStatusCommunicationException):
+            api.is_open("autoland")
+
+        m.get(
+            treestatus_url + "/trees",
+            json={"result": {"autoland": {"status": "open", "tree": "autoland"}}},
+        )
+        assert api.is_open("autoland")
+
+        m.get(treestatus_url + "/trees", status_code=500, json={})
+        api.cache_expires_at = 0
+        assert api.is_open("autoland"), "Stale data should be used during an outage"
+        assert m.call_count == 3
+
+        # The next attempt to refresh is delayed.
+        assert api.is_open("autoland")
+        assert m.call_count == 3
+
+
+def test_is_open_cached_stale_data_expires(treestatus_url):
+    api = TreeStatus(url=treestatus_url, cache_seconds=60, max_stale_seconds=300)
+    with requests_mock.mock() as m:
+        m.get(
+            treestatus_url + "/trees",
+            json={"result": {"autoland": {"status": "open", "tree": "autoland"}}},
+        )
+        assert api.is_open("autoland")
+
+        m.get(treestatus_url + "/trees", exc=requests.ConnectionError)
+        api.cache_expires_at = 0
+        assert api.is_open("autoland"), "Stale data should be used during an outage"
+
+        # Past the maximum staleness, the cached data isn't used anymore.
+        api.cache_fetched_at -= 300
+        api.cache_expires_at = 0
+        with pytest.raises(TreeStatusCommunicationException):
+            api.is_open("autoland")
+
+
+def test_background_refresher(treestatusdouble):
+    treestatusdouble.close_tree("mozilla-central")
+    ts = TreeStatus(url=treestatusdouble.url, cache_seconds=60)
+
+    ts.start_refresher()
+    ts.refresher_stop.wait(0.1)
+    ts.stop_refresher()
+
+    assert ts.cached_trees, "The refresher should have fetched the tree statuses"
+    assert not ts.is_open("mozilla-central")
@@ -156,7 +156,17 @@ class require_phabricator_api_key:
                 settings.PHABRICATOR_URL,
                 api_key or settings.PHABRICATOR_UNPRIVILEGED_API_KEY,
             )
-            if api_key is not None and not phab.verify_api_token():
+
+            # Rendering a single page may look up the same stack several times, so
+            # conduit results are memoized for the duration of the request.
+            if not hasattr(request, "phabricator_caches"):
+                request.phabricator_caches = {}
+            phab.request_cache = request.phabricator_caches.setdefault(
+                phab.api_token, {}
+            )
+            if api_key is not None and not phab.verify_api_token(
+                cache_seconds=settings.PHABRICATOR_API_KEY_VERIFICATION_CACHE_SECONDS
+            ):
                 return HttpResponse("Phabricator API key is invalid", status=403)
 
             if self.provide_client:
@@ -6,7 +6,7 @@ from lando.main.models.worker import Worker
 class WorkerMixin:
     @property
     def _instance(self) -> Worker:
-        return Worker.objects.get(name=self.name)
+        return Worker.get_cached(self.name)
 
     def _start(self, max_loops: int | None = None, *args, **kwargs):
         """Run the main event loop."""
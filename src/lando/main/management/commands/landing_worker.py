@@ -1,15 +1,21 @@
 from __future__ import annotations
 
 import logging
+import os
+import socket
 from contextlib import contextmanager
 from datetime import datetime
 from io import StringIO
 
 from django.core.management.base import BaseCommand
-from django.db import transaction
 
+from lando.api.legacy.workers.landing_worker import job_lease
 from lando.main.management.commands import WorkerMixin
-from lando.main.models.landing_job import LandingJob, LandingJobStatus
+from lando.main.models.landing_job import (
+    DEFAULT_LEASE_SECONDS,
+    LandingJob,
+    LandingJobStatus,
+)
 from lando.main.models.repo import Repo
 
 logger = logging.getLogger(__name__)
@@ -42,6 +48,9 @@ class Command(BaseCommand, WorkerMixin):
 
     def handle(self, *args, **options):
         self.last_job_finished = None
+
+        # Identifies this worker process when claiming jobs.
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
         self.start()
 
     def loop(self):
@@ -53,21 +62,21 @@ class Command(BaseCommand, WorkerMixin):
             if not repo.is_initialized:
                 repo.initialize()
 
-        with transaction.atomic():
-            job = LandingJob.next_job(repositories=self._instance.enabled_repos).first()
-
-            if job is None:
-                self.throttle(self._instance.sleep_seconds)
-                return
+        # The claimed job is marked as IN_PROGRESS and its attempt count updated.
+        job = LandingJob.claim_next_job(
+            self.worker_id, repositories=self._instance.enabled_repos
+        )
 
-            with job_processing(job):
-                job.status = LandingJobStatus.IN_PROGRESS
-                job.attempts += 1
-                job.save()
+        if job is None:
+            self.throttle(self._instance.sleep_seconds)
+            return
 
+        with job_processing(job):
+            with job_lease(job, self.worker_id, DEFAULT_LEASE_SECONDS):
                 self.stdout.write(f"Starting landing job {job}")
                 self.last_job_finished = self.run_job(job)
                 self.stdout.write("Finished processing landing job")
+            job.save()
 
     def run_job(self, job: LandingJob) -> bool:
         repo = job.target_repo
@@ -31,21 +31,30 @@ class Command(BaseCommand):
             default="hg",
             help=f"Enter one of {', '.join(WORKER_NAMES)}",
         )
+        parser.add_argument(
+            "--lanes",
+            action="store_true",
+            help="Run an independent landing lane (process) per repository.",
+        )
 
-    def handle_hg(self, worker: Worker):
+    def handle_hg(self, worker: Worker, lanes: bool = False):
         """Handle the starting of the Mercurial landing worker ("hg-landing-worker")."""
-        self._handle(worker, SCM_TYPE_HG)
+        self._handle(worker, SCM_TYPE_HG, lanes)
 
-    def handle_git(self, worker: Worker):
+    def handle_git(self, worker: Worker, lanes: bool = False):
         """Handle the starting of the Git landing worker ("git-landing-worker")."""
-        self._handle(worker, SCM_TYPE_GIT)
+        self._handle(worker, SCM_TYPE_GIT, lanes)
 
-    def _handle(self, worker: Worker, repo_type: str):
+    def _handle(self, worker: Worker, repo_type: str, lanes: bool = False):
         # Clone or update repos upon worker startup.
         for repo in worker.enabled_repos:
             # Check if any associated repos are unsupported, raise exception if so.
             repo.raise_for_unsupported_repo_scm(repo_type)
-            repo.scm.prepare_repo(repo.pull_path)
+            repo.scm.prepare_repo(
+                repo.pull_path,
+                bootstrap_source=repo.bootstrap_source,
+                clone_filter=repo.clone_filter,
+            )
 
         # Continue with starting the worker.
         try:
@@ -55,11 +64,14 @@ class Command(BaseCommand):
 
         logger.info(f"Starting {worker}...")
         try:
-            landing_worker.start()
+            if lanes:
+                landing_worker.start_lanes()
+            else:
+                landing_worker.start()
         finally:
             logger.info(f"{worker} shut down.")
 
-    def handle(self, name: str, **options):
+    def handle(self, name: str, lanes: bool = False, **options):
         """Select a landing worker based on provided argument and start it up."""
         handlers = {
             SCM_TYPE_GIT: self.handle_git,
@@ -67,4 +79,4 @@ class Command(BaseCommand):
         }
 
         worker = self.get_worker(name)
-        handlers[worker.scm](worker)
+        handlers[worker.scm](worker, lanes)
@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-17 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0013_alter_repo_scm_type_alter_worker_scm"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="landingjob",
+            name="claimed_by",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="landingjob",
+            name="lease_expires_at",
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+    ]
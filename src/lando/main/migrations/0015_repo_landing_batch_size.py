@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 02:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0014_landingjob_claimed_by_landingjob_lease_expires_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="repo",
+            name="landing_batch_size",
+            field=models.IntegerField(default=1),
+        ),
+    ]
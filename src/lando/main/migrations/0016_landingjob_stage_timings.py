@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-17 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0015_repo_landing_batch_size"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="landingjob",
+            name="stage_timings",
+            field=models.JSONField(blank=True, default=dict, null=True),
+        ),
+    ]
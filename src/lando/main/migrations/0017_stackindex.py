@@ -0,0 +1,50 @@
+# Generated by Django 5.0 on 2026-10-17 02:42
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0016_landingjob_stage_timings"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StackIndex",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("key", models.CharField(max_length=64, unique=True)),
+                (
+                    "revision_phids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.CharField(max_length=64),
+                        default=list,
+                        size=None,
+                    ),
+                ),
+                ("edges", models.JSONField(blank=True, default=list)),
+                ("landable_paths", models.JSONField(blank=True, default=list)),
+                ("blockers", models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["revision_phids"], name="main_stacki_revisio_b9e629_gin"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-17 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0017_stackindex"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="repo",
+            name="bootstrap_source",
+            field=models.CharField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="repo",
+            name="clone_filter",
+            field=models.CharField(blank=True, default=""),
+        ),
+    ]
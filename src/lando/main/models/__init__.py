@@ -5,4 +5,5 @@ from lando.main.models.landing_job import *
 from lando.main.models.profile import *
 from lando.main.models.revision import *
 from lando.main.models.repo import *
+from lando.main.models.stack_index import *
 from lando.main.models.worker import *
@@ -2,8 +2,12 @@ from __future__ import annotations
 
 import logging
 import os
+import threading
 from contextlib import ContextDecorator
+from time import monotonic
+from typing import Any, Callable, Hashable
 
+from django.conf import settings
 from django.db import connection, models, transaction
 
 logger = logging.getLogger(__name__)
@@ -32,6 +36,43 @@ class LockTableContextManager(ContextDecorator):
         pass
 
 
+class ConfigurationCache:
+    """A per-process cache of rows which are read often, and rarely change.
+
+    Entries expire after `settings.CONFIGURATION_CACHE_SECONDS`, so that changes
+    made by other processes are picked up promptly. Models using this cache should
+    invalidate the relevant entries when saved, so that changes made in the same
+    process are seen immediately.
+    """
+
+    def __init__(self):
+        self.entries: dict[Hashable, tuple[float, Any]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """Return the cached value for `key`, calling `fetch` if it has expired."""
+        now = monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+
+        value = fetch()
+        ttl = settings.CONFIGURATION_CACHE_SECONDS
+        if ttl > 0:
+            with self.lock:
+                self.entries[key] = (now + ttl, value)
+        return value
+
+    def invalidate(self, key: Hashable | None = None):
+        """Drop the entry for `key`, or all entries if no key is given."""
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -6,9 +6,11 @@ from typing import (
 )
 
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy
 
-from lando.main.models.base import BaseModel
+from lando.main.models.base import BaseModel, ConfigurationCache
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +38,9 @@ class VariableTypeChoices(models.TextChoices):
 class ConfigurationVariable(BaseModel):
     """An arbitrary key-value table store that can be used to configure the system."""
 
+    # Variables read through `get_cached`, keyed by `key`.
+    cache = ConfigurationCache()
+
     key = models.TextField(unique=True)
     raw_value = models.TextField(default="", blank=True)
 
@@ -88,6 +93,19 @@ class ConfigurationVariable(BaseModel):
         except cls.DoesNotExist:
             return default
 
+    @classmethod
+    def get_cached(
+        cls, key: ConfigurationKey, default: ConfigurationValueType
+    ) -> ConfigurationValueType:
+        """Like `get`, but served from an in-process cache.
+
+        This is meant for values checked in tight loops, or on every request.
+        """
+        record = cls.cache.get(key.value, lambda: cls.one_or_none(key=key.value))
+        if record is None:
+            return default
+        return record.value
+
     @classmethod
     def set(
         cls,
@@ -135,3 +153,9 @@ class ConfigurationVariable(BaseModel):
         )
         record.save()
         return record
+
+
+@receiver([post_save, post_delete], sender=ConfigurationVariable)
+def invalidate_configuration_cache(sender, instance: ConfigurationVariable, **kwargs):
+    """Make changes to a variable visible to this process immediately."""
+    ConfigurationVariable.cache.invalidate(instance.key)
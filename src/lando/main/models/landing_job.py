@@ -11,7 +11,7 @@ from typing import (
     Optional,
 )
 
-from django.db import models
+from django.db import connection, models, transaction
 from django.db.models import Case, IntegerField, Q, QuerySet, When
 from django.utils.translation import gettext_lazy
 from mots.config import FileConfig
@@ -24,6 +24,12 @@ logger = logging.getLogger(__name__)
 
 DEFAULT_GRACE_SECONDS = int(os.environ.get("DEFAULT_GRACE_SECONDS", 60 * 2))
 
+# Prefix of the Postgres NOTIFY channels on which job submissions are announced.
+QUEUE_CHANNEL_PREFIX = "landing_job_queue"
+
+# How long a claim on a job is valid for, unless it is renewed by the worker.
+DEFAULT_LEASE_SECONDS = int(os.environ.get("DEFAULT_LEASE_SECONDS", 60 * 5))
+
 
 class LandingJobStatus(models.TextChoices):
     SUBMITTED = "SUBMITTED", gettext_lazy("Submitted")
@@ -55,6 +61,9 @@ class LandingJobAction(enum.Enum):
 
 
 class LandingJob(BaseModel):
+    # The status of the job as last read from or written to the database.
+    _saved_status: Optional[str] = None
+
     def __str__(self):
         return f"LandingJob {self.id} [{self.status}]"
 
@@ -95,6 +104,15 @@ class LandingJob(BaseModel):
     # Duration of job from start to finish
     duration_seconds = models.IntegerField(default=0)
 
+    # Time spent in each stage of the last landing attempt, and in the SCM commands
+    # it ran, in seconds.
+    # eg.
+    #    {
+    #        "stages": {"update_repo": 1.234, "push": 5.678},
+    #        "commands": {"hg pull": {"count": 1, "seconds": 1.1}},
+    #    }
+    stage_timings = models.JSONField(null=True, blank=True, default=dict)
+
     # JSON array of changeset hashes which replaced reviewed changesets
     # after autoformatting.
     # eg.
@@ -115,6 +133,50 @@ class LandingJob(BaseModel):
     # New field in lieu of deprecated repository fields.
     target_repo = models.ForeignKey("Repo", on_delete=models.SET_NULL, null=True)
 
+    # Identifier of the worker which claimed the job, and the time until which the
+    # claim is valid. The worker periodically renews the lease while processing the
+    # job; an IN_PROGRESS job with an expired lease can be claimed by another worker.
+    claimed_by = models.CharField(blank=True, default="", max_length=255)
+    lease_expires_at = models.DateTimeField(null=True, blank=True, default=None)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_status = instance.__dict__.get("status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save the job, and announce it to the workers if it was just submitted."""
+        submitted = (
+            self.status == LandingJobStatus.SUBMITTED
+            and self._saved_status != LandingJobStatus.SUBMITTED
+        )
+        super().save(*args, **kwargs)
+        self._saved_status = self.status
+
+        if submitted:
+            self.notify_submitted()
+
+    @staticmethod
+    def queue_channel(repo_id: int) -> str:
+        """Return the name of the NOTIFY channel for jobs targeting a repository."""
+        return f"{QUEUE_CHANNEL_PREFIX}_{repo_id}"
+
+    def notify_submitted(self):
+        """Notify workers listening on the repository channel of this job.
+
+        The notification is delivered when the current transaction commits, and is
+        discarded if it rolls back.
+        """
+        if self.target_repo_id is None or connection.vendor != "postgresql":
+            return
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, %s)",
+                [self.queue_channel(self.target_repo_id), str(self.id)],
+            )
+
     @property
     def landed_revisions(self) -> dict:
         """Return revision and diff ID mapping associated with the landing job."""
@@ -249,6 +311,150 @@ class LandingJob(BaseModel):
         # job can be claimed.
         return query.select_for_update()
 
+    @classmethod
+    def claim_next_job(
+        cls,
+        worker_id: str,
+        repositories: Optional[Iterable[str]] = None,
+        lease_seconds: int = DEFAULT_LEASE_SECONDS,
+        grace_seconds: int = DEFAULT_GRACE_SECONDS,
+    ) -> Optional[LandingJob]:
+        """Claim the next queued job for `worker_id`, and return it.
+
+        Rows locked by other workers are skipped (`SELECT ... FOR UPDATE SKIP
+        LOCKED`) rather than waited on, so that several workers can share the same
+        queue. At most one job per repository is claimed at any time. Jobs left
+        IN_PROGRESS by a worker whose lease has expired, or without a lease, are
+        claimed again.
+
+        Returns:
+            The claimed job, marked as IN_PROGRESS, or `None` if no job is available.
+        """
+        Repo = cls._meta.get_field("target_repo").related_model
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        busy_repos = cls.objects.filter(
+            status=LandingJobStatus.IN_PROGRESS,
+            lease_expires_at__gt=now,
+            target_repo__isnull=False,
+        ).values("target_repo")
+
+        skipped_repos = []
+        with transaction.atomic():
+            while True:
+                job = (
+                    cls.job_queue_query(
+                        repositories=repositories, grace_seconds=grace_seconds
+                    )
+                    .exclude(target_repo__in=busy_repos)
+                    .exclude(target_repo__in=skipped_repos)
+                    .select_for_update(skip_locked=True, of=("self",))
+                    .first()
+                )
+                if job is None:
+                    return None
+
+                if job.target_repo_id is None:
+                    break
+
+                # Lock the repository row to serialise claims for the same
+                # repository, then check again that no other job has been claimed
+                # for it in the meantime.
+                repo_locked = (
+                    Repo.objects.filter(id=job.target_repo_id)
+                    .select_for_update(skip_locked=True)
+                    .exists()
+                )
+                if (
+                    repo_locked
+                    and not busy_repos.filter(target_repo=job.target_repo_id)
+                    .exclude(id=job.id)
+                    .exists()
+                ):
+                    break
+
+                skipped_repos.append(job.target_repo_id)
+
+            job.status = LandingJobStatus.IN_PROGRESS
+            job.attempts += 1
+            job.claimed_by = worker_id
+            job.lease_expires_at = now + datetime.timedelta(seconds=lease_seconds)
+            job.save()
+
+        return job
+
+    def claim_batch(
+        self, limit: int, grace_seconds: int = DEFAULT_GRACE_SECONDS
+    ) -> list[LandingJob]:
+        """Claim up to `limit` more jobs to be landed together with this one.
+
+        This job must already be claimed. The jobs directly following it in the
+        queue of its repository are claimed in order, stopping at the first one which
+        can't be, e.g. because it is DEFERRED, locked by another worker or requested
+        by someone else, so that jobs never land ahead of those queued before them.
+        A batch is pushed at once on behalf of its requester. Claimed jobs share this
+        job's lease.
+
+        Returns:
+            The additionally claimed jobs, in queue order.
+        """
+        if limit < 1 or self.target_repo_id is None:
+            return []
+
+        with transaction.atomic():
+            queue = list(
+                LandingJob.job_queue_query(
+                    repositories=[self.target_repo_id], grace_seconds=grace_seconds
+                )
+                .exclude(id=self.id)
+                .values_list("id", flat=True)[:limit]
+            )
+            claimable = LandingJob.objects.filter(
+                id__in=queue, status=LandingJobStatus.SUBMITTED
+            ).select_for_update(skip_locked=True)
+            claimable = {job.id: job for job in claimable}
+
+            batch = []
+            for job_id in queue:
+                job = claimable.get(job_id)
+                if job is None or job.requester_email != self.requester_email:
+                    # Only consecutive jobs from the same requester are batched.
+                    break
+                job.status = LandingJobStatus.IN_PROGRESS
+                job.attempts += 1
+                job.claimed_by = self.claimed_by
+                job.lease_expires_at = self.lease_expires_at
+                job.save()
+                batch.append(job)
+
+        return batch
+
+    def renew_lease(
+        self, worker_id: str, lease_seconds: int = DEFAULT_LEASE_SECONDS
+    ) -> bool:
+        """Extend the lease on this job, if it is still claimed by `worker_id`.
+
+        Only the lease columns are updated, so that this can safely be called from a
+        heartbeat thread while the job is being processed.
+
+        Returns:
+            True if the lease was renewed, False if the claim has been lost.
+        """
+        lease_expires_at = datetime.datetime.now(
+            datetime.timezone.utc
+        ) + datetime.timedelta(seconds=lease_seconds)
+        renewed = LandingJob.objects.filter(
+            id=self.id, claimed_by=worker_id, status=LandingJobStatus.IN_PROGRESS
+        ).update(lease_expires_at=lease_expires_at)
+        if renewed:
+            self.lease_expires_at = lease_expires_at
+        return bool(renewed)
+
+    def release_lease(self):
+        """Clear the claim on this job. The job needs to be saved afterwards."""
+        self.claimed_by = ""
+        self.lease_expires_at = None
+
     def add_revisions(self, revisions: list[Revision]):
         """Associate a list of revisions with job."""
         for revision in revisions:
@@ -360,6 +566,7 @@ class LandingJob(BaseModel):
                 else self.landed_commit_id or self.error
             ),
             "requester_email": self.requester_email,
+            "stage_timings": self.stage_timings,
             "tree": self.repository_name,
             "repository_url": self.repository_url,
             "created_at": (
@@ -111,13 +111,21 @@ class Profile(BaseModel):
 
     @property
     def phabricator_api_key(self) -> str:
-        """Decrypt and return the value of the Phabricator API key."""
+        """Decrypt and return the value of the Phabricator API key.
+
+        The decrypted key is kept on the instance, which usually lives for a single
+        request, until the encrypted key changes.
+        """
         encrypted_key = bytes(self.encrypted_phabricator_api_key)
-        if encrypted_key:
-            return self._decrypt_value(encrypted_key)
-        else:
+        if not encrypted_key:
             return ""
 
+        decrypted = getattr(self, "_decrypted_phabricator_api_key", None)
+        if decrypted is None or decrypted[0] != encrypted_key:
+            decrypted = (encrypted_key, self._decrypt_value(encrypted_key))
+            self._decrypted_phabricator_api_key = decrypted
+        return decrypted[1]
+
     def clear_phabricator_api_key(self):
         """Set the phabricator API key to an empty string and save."""
         self.save_phabricator_api_key("")
@@ -102,6 +102,20 @@ class Repo(BaseModel):
     # string as falsey.
     push_target = models.CharField(blank=True, default="")
 
+    # Maximum number of queued landing jobs from the same requester which are applied
+    # on top of each other and pushed together. Batching is disabled when set to 1,
+    # and is not used for repos with autoformatting enabled.
+    landing_batch_size = models.IntegerField(default=1)
+
+    # Source to obtain most of the history from when first cloning the repo, before
+    # pulling the rest from `pull_path`: a local bundle file, a local reference repo
+    # (Git), or a mirror to stream clone from (Mercurial).
+    bootstrap_source = models.CharField(blank=True, default="")
+
+    # Object filter for the first clone of Git repos, e.g. `blob:none` for a
+    # partial clone.
+    clone_filter = models.CharField(blank=True, default="")
+
     @classmethod
     def get_mapping(cls) -> dict[str, "Repo"]:
         return {repo.tree: repo for repo in cls.objects.all()}
@@ -0,0 +1,113 @@
+"""
+This module provides the definition of the stack index.
+
+The `StackIndex` model stores the graph of a revision stack, and the landable
+paths and blockers last computed for it, so that repeated views of an unchanged
+stack don't need to compute them again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import Iterable, Optional
+
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models, transaction
+
+from lando.main.models.base import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+class StackIndex(BaseModel):
+    """The graph, landable paths and blockers of a revision stack.
+
+    Indexes are looked up by a key derived from the PHID and `dateModified` of every
+    revision and repository in the stack, and from anything else the landable paths
+    depend on. Any change to the stack in Phabricator therefore leads to a new
+    index, which replaces the indexes of the revisions it contains.
+    """
+
+    class Meta:
+        # Indexes are replaced by those of any stack sharing a revision with them.
+        indexes = [GinIndex(fields=["revision_phids"])]
+
+    def __str__(self):
+        return f"StackIndex {self.key} ({len(self.revision_phids)} revisions)"
+
+    key = models.CharField(max_length=64, unique=True)
+
+    # PHIDs of the revisions in the stack, used to find the outdated indexes a new
+    # index replaces.
+    revision_phids = ArrayField(models.CharField(max_length=64), default=list)
+
+    # Edges of the stack graph, as a list of [child, parent] PHIDs.
+    edges = models.JSONField(default=list, blank=True)
+
+    # Landable paths, as lists of revision PHIDs, and blocker reasons by PHID.
+    landable_paths = models.JSONField(default=list, blank=True)
+    blockers = models.JSONField(default=dict, blank=True)
+
+    @staticmethod
+    def build_key(
+        revisions: dict[str, dict],
+        repositories: dict[str, dict],
+        edges: Iterable[tuple[str, str]],
+        context: Iterable[str] = (),
+    ) -> str:
+        """Return the index key for a stack.
+
+        Args:
+            revisions: Phabricator revision data, by PHID.
+            repositories: Phabricator repository data, by PHID.
+            edges: The edges of the stack graph, as (child, parent) PHIDs.
+            context: Any other strings the indexed data depends on, such as the
+                PHIDs of the landable repositories.
+        """
+        state = {
+            "revisions": sorted(
+                (phid, revision["fields"]["dateModified"])
+                for phid, revision in revisions.items()
+            ),
+            "repositories": sorted(
+                (phid, repository["fields"].get("dateModified"))
+                for phid, repository in repositories.items()
+            ),
+            "edges": sorted(edges),
+            "context": sorted(context),
+        }
+        return hashlib.sha256(json.dumps(state).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def lookup(cls, key: str) -> Optional[StackIndex]:
+        """Return the index stored under `key`, if any."""
+        return cls.one_or_none(key=key)
+
+    @classmethod
+    def store(
+        cls,
+        key: str,
+        revision_phids: Iterable[str],
+        edges: Iterable[tuple[str, str]],
+        landable_paths: list[list[str]],
+        blockers: dict[str, str],
+    ) -> StackIndex:
+        """Store the index of a stack, replacing outdated indexes of its revisions."""
+        revision_phids = sorted(revision_phids)
+        with transaction.atomic():
+            cls.objects.filter(revision_phids__overlap=revision_phids).exclude(
+                key=key
+            ).delete()
+            index, _created = cls.objects.update_or_create(
+                key=key,
+                defaults={
+                    "revision_phids": revision_phids,
+                    "edges": sorted([child, parent] for child, parent in edges),
+                    "landable_paths": landable_paths,
+                    "blockers": blockers,
+                },
+            )
+        return index
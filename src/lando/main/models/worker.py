@@ -1,9 +1,14 @@
+from __future__ import annotations
+
 import logging
 import os
 
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 from lando.main.models import BaseModel, Repo
+from lando.main.models.base import ConfigurationCache
 from lando.main.scm import SCM_TYPE_CHOICES, SCM_TYPE_HG
 
 logger = logging.getLogger(__name__)
@@ -12,6 +17,9 @@ DEFAULT_GRACE_SECONDS = int(os.environ.get("DEFAULT_GRACE_SECONDS", 60 * 2))
 
 
 class Worker(BaseModel):
+    # Workers read through `get_cached`, keyed by `name`.
+    cache = ConfigurationCache()
+
     name = models.CharField(max_length=255, unique=True)
     is_paused = models.BooleanField(default=False)
     is_stopped = models.BooleanField(default=False)
@@ -30,6 +38,15 @@ class Worker(BaseModel):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def get_cached(cls, name: str) -> Worker:
+        """Return the worker called `name`, served from an in-process cache.
+
+        Raises:
+            Worker.DoesNotExist: If no such worker exists.
+        """
+        return cls.cache.get(name, lambda: cls.objects.get(name=name))
+
     @property
     def enabled_repos(self) -> list[Repo]:
         return self.applicable_repos.all()
@@ -37,3 +54,9 @@ class Worker(BaseModel):
     @property
     def enabled_repo_names(self) -> list[str]:
         return self.enabled_repos.values_list("name", flat=True)
+
+
+@receiver([post_save, post_delete], sender=Worker)
+def invalidate_worker_cache(sender, instance: Worker, **kwargs):
+    """Make changes to a worker visible to this process immediately."""
+    Worker.cache.invalidate(instance.name)
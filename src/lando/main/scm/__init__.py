@@ -1,4 +1,4 @@
-from lando.main.scm.abstract_scm import AbstractSCM
+from lando.main.scm.abstract_scm import AbstractSCM, Patch
 from lando.main.scm.consts import (
     SCM_TYPE_GIT,
     SCM_TYPE_HG,
@@ -35,6 +35,7 @@ SCM_IMPLEMENTATIONS = {
 __all__ = [
     # abstract_scm
     "AbstractSCM",
+    "Patch",
     # consts
     "SCM_TYPE_HG",
     "SCM_TYPE_GIT",
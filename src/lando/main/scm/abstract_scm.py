@@ -1,19 +1,40 @@
 import logging
 from abc import abstractmethod
 from pathlib import Path
-from typing import ContextManager, Optional
+from typing import ContextManager, Iterable, NamedTuple, Optional, Self
+
+import rs_parsepatch
+from datadog import statsd
 
 logger = logging.getLogger(__name__)
 
 
+class Patch(NamedTuple):
+    """A patch to apply and commit, with the arguments of `apply_patch`."""
+
+    diff: str
+    commit_description: str
+    commit_author: str
+    commit_date: str
+
+    # The commit the patch was created on top of, if known.
+    base_revision: Optional[str] = None
+
+
 class AbstractSCM:
     """An abstract class defining the interface an SCM needs to expose use by the Repo and LandingWorkers."""
 
     # The path to the repository.
     path: str
 
+    # Paths changed in the working copy since it was last cleaned, relative to the
+    # root of the repository. None if unknown, in which case the next clean goes
+    # through the whole working copy.
+    touched_paths: Optional[set[str]]
+
     def __init__(self, path: str):
         self.path = path
+        self.touched_paths = None
 
     def __str__(self):
         return f"{self.scm_name()} repo at {self.path}"
@@ -41,10 +62,15 @@ class AbstractSCM:
         return Path(".")
 
     @abstractmethod
-    def clone(self, source: str):
+    def clone(self, source: str, bootstrap_source: str = "", clone_filter: str = ""):
         """Clone a repository from a source.
         Args:
             source: The source to clone the repository from.
+            bootstrap_source: A local bundle file, reference repository or mirror to
+                obtain most of the history from, before pulling the rest from
+                `source`.
+            clone_filter: A filter for the objects to clone, e.g. `blob:none`, for
+                SCMs supporting partial clones.
         Returns:
             None
         """
@@ -72,9 +98,67 @@ class AbstractSCM:
     def clean_repo(self, *, strip_non_public_commits: bool = True):
         """Clean the local working copy from all extraneous files.
 
+        Only the `touched_paths` are cleaned, unless they are unknown.
+
         If `strip_non_public_commits` is set, also rewind any commit not present on the
         origin."""
 
+    def mark_paths_touched(self, paths: Optional[Iterable[str]]):
+        """Record paths changed in the working copy, for the next `clean_repo`.
+
+        Args:
+            paths: The changed paths, relative to the root of the repository, or None
+                if the changes are unknown.
+        """
+        if paths is None:
+            self.touched_paths = None
+        elif self.touched_paths is not None:
+            self.touched_paths.update(paths)
+
+    @staticmethod
+    def paths_from_diff(diff: str) -> Optional[set[str]]:
+        """Return the paths changed by a diff, or None if it can't be parsed."""
+        try:
+            files = rs_parsepatch.get_diffs(diff)
+        except Exception as e:
+            logger.warning(f"Could not parse diff for changed paths: {e}")
+            return None
+
+        if not files and diff.strip():
+            return None
+
+        paths = set()
+        for file in files:
+            paths.add(file["filename"])
+            if file["renamed_from"]:
+                paths.add(file["renamed_from"])
+        return paths
+
+    def clean_timer(self, incremental: bool) -> ContextManager:
+        """Return a context manager reporting the time spent in `clean_repo`."""
+        mode = "incremental" if incremental else "full"
+        return statsd.timed(
+            "lando-api.scm.clean_repo",
+            tags=[f"scm:{self.scm_type()}", f"mode:{mode}"],
+            use_ms=True,
+        )
+
+    @abstractmethod
+    def changed_paths(self) -> list[str]:
+        """Return the paths with uncommitted changes, including untracked files.
+
+        Returns:
+            list[str]: Paths relative to the root of the repository.
+        """
+
+    @abstractmethod
+    def rewind_to(self, commit_id: str):
+        """Discard all commits and local changes on top of `commit_id`.
+
+        Args:
+            commit_id (str): The commit to reset the working copy to.
+        """
+
     @abstractmethod
     def last_commit_for_path(self, path: str) -> str:
         """Find last commit to touch a path.
@@ -102,6 +186,52 @@ class AbstractSCM:
             None
         """
 
+    def apply_patches(self, patches: list[Patch]):
+        """Apply the given patches to the current repository, committing each in turn.
+
+        SCMs able to apply a whole stack of patches at once should override this
+        default implementation, which calls `apply_patch` for each patch. Patches
+        which don't apply are merged from their base with `merge_patch_from_base`.
+
+        Args:
+            patches (list[Patch]): The patches to apply, in order.
+
+        Raises:
+            Exception: The exception raised for the first patch that could not be
+                applied, with its index in `patches` as `patch_index`. The patches
+                before it may have been committed.
+        """
+        for index, patch in enumerate(patches):
+            try:
+                self.apply_patch(
+                    patch.diff,
+                    patch.commit_description,
+                    patch.commit_author,
+                    patch.commit_date,
+                )
+            except Exception as exc:
+                if not self.merge_patch_from_base(patch):
+                    exc.patch_index = index
+                    raise
+
+    def merge_patch_from_base(self, patch: Patch) -> bool:
+        """Commit a patch on its base revision, and merge it onto the current commit.
+
+        This is used for patches which don't apply to the current commit, e.g. because
+        their context changed since they were created. Merging them from their base
+        is a three-way merge, which only fails if the changes truly conflict.
+
+        Args:
+            patch (Patch): The patch which failed to apply. Any uncommitted changes
+                left by the failure are discarded.
+
+        Returns:
+            bool: True if the patch was committed on top of the current commit.
+                False if its base revision is unknown or the merge failed, in which
+                case the current commit is left as it was.
+        """
+        return False
+
     @abstractmethod
     def for_pull(self) -> ContextManager:
         """Context manager to prepare the repo with the correct environment variables set for pulling."""
@@ -152,12 +282,55 @@ class AbstractSCM:
         """
 
     @abstractmethod
-    def prepare_repo(self, pull_path: str):
-        """Either clone or update the repo."""
+    def prefetch(self, pull_path: str):
+        """Fetch upstream changes into the local repository in the background.
+
+        This only does the network-bound part of `update_repo`, and neither touches
+        the working copy nor the current commit. It is safe to call from another
+        thread while a job is using the repository, so that the next `update_repo`
+        has little left to do.
+
+        Args:
+            pull_path (str): The path to pull from.
+        """
+
+    @abstractmethod
+    def prepare_repo(
+        self, pull_path: str, bootstrap_source: str = "", clone_filter: str = ""
+    ):
+        """Either clone or update the repo.
+
+        See `clone` for the `bootstrap_source` and `clone_filter` arguments.
+        """
         if not self.repo_is_initialized:
             Path(self.path).mkdir(parents=True, exist_ok=True)
-            logger.info(f"Cloning {self} from pull path.")
-            self.clone(pull_path)
+            logger.info(
+                f"Cloning {self} from pull path.",
+                extra={"bootstrap_source": bootstrap_source},
+            )
+            self.clone(
+                pull_path, bootstrap_source=bootstrap_source, clone_filter=clone_filter
+            )
+
+    @abstractmethod
+    def get_worktree(self, path: str) -> Self:
+        """Return the SCM of a working copy at `path`, sharing this repository's store.
+
+        The working copy is created if needed. Working copies only take the space of
+        their checked out files, so a repository can have several of them, e.g. to
+        process jobs in parallel, without being cloned again.
+
+        Args:
+            path (str): The path of the working copy.
+        """
+
+    @abstractmethod
+    def remove_worktree(self, path: str):
+        """Remove a working copy created with `get_worktree`.
+
+        Args:
+            path (str): The path of the working copy.
+        """
 
     @property
     @abstractmethod
@@ -6,16 +6,19 @@ import subprocess
 import tempfile
 import uuid
 from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parseaddr
 from pathlib import Path
-from typing import ContextManager, Optional
+from typing import ContextManager, Optional, Self
 
 from django.conf import settings
 from simple_github import AppAuth, AppInstallationAuth
 
 from lando.main.scm.consts import SCM_TYPE_GIT
 from lando.main.scm.exceptions import SCMException
+from lando.utils.timings import command_name, time_command
 
-from .abstract_scm import AbstractSCM
+from .abstract_scm import AbstractSCM, Patch
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +42,23 @@ GITHUB_URL_RE = re.compile(
     f"https://{URL_USERINFO_RE.pattern}?github.com/(?P<owner>[-A-Za-z0-9]+)/(?P<repo>[^/]+)"
 )
 
+# Commit dates in Git's internal format, e.g. `1686621879 +0100`.
+GIT_RAW_DATE_RE = re.compile(
+    r"(?P<timestamp>\d+) (?P<sign>[-+])(?P<hours>\d\d)(?P<minutes>\d\d)"
+)
+
+# Authors `git mailinfo` parses back unchanged from a `From:` header.
+MBOX_AUTHOR_RE = re.compile(r"[^<>\"\\()\n]+ <[^<>\s]+>")
+
+# Lines of a commit message `git mailinfo` would take as the start of the diff.
+MBOX_PATCH_BREAK_RE = re.compile(r"^(---|diff -|Index: )", flags=re.MULTILINE)
+
+# Lines at the start of a message body `git mailinfo` would take as headers.
+MBOX_BODY_HEADER_RE = re.compile(r"(From|Subject|Date):", flags=re.IGNORECASE)
+
+# Lines to escape in an mboxrd mailbox, so they aren't taken as message separators.
+MBOXRD_FROM_RE = re.compile(r"^(>*From )", flags=re.MULTILINE)
+
 
 class GitSCM(AbstractSCM):
     """An implementation of the AbstractVCS for Git, for use by the Repo and LandingWorkers."""
@@ -51,8 +71,13 @@ class GitSCM(AbstractSCM):
 
     default_branch: str
 
+    # Whether HEAD is detached, in which case pushes without a target go to the
+    # default branch.
+    detached_head: bool
+
     def __init__(self, path: str, default_branch: str = "main"):
         self.default_branch = default_branch
+        self.detached_head = False
         super().__init__(path)
 
     @classmethod
@@ -65,10 +90,32 @@ class GitSCM(AbstractSCM):
         """Return a _human-friendly_ string identifying the supported SCM."""
         return "Git"
 
-    def clone(self, source: str):
-        """Clone a repository from a source."""
+    def clone(self, source: str, bootstrap_source: str = "", clone_filter: str = ""):
+        """Clone a repository from a source.
+
+        If `bootstrap_source` is a bundle file, e.g. from `git bundle create --all`,
+        the repository is cloned from it, and then pulled from `source`. Otherwise,
+        it is used as a reference repository, whose objects are copied locally
+        rather than fetched from `source`, if it exists.
+
+        `clone_filter` is only used when cloning from `source`, since later fetches
+        only get the new objects anyway.
+        """
         # When cloning, self.path doesn't exist yet, so we need to use another CWD.
-        self._git_run("clone", source, self.path, cwd="/")
+        if bootstrap_source and Path(bootstrap_source).is_file():
+            self._git_run("clone", bootstrap_source, self.path, cwd="/")
+            self._git_run("remote", "set-url", "origin", source, cwd=self.path)
+            self._git_run("pull", "--ff-only", cwd=self.path)
+            return
+
+        command = ["clone"]
+        if bootstrap_source:
+            # Objects are copied from the reference, rather than linked to it, so
+            # that the clone doesn't break if the reference is removed.
+            command += ["--reference-if-able", bootstrap_source, "--dissociate"]
+        if clone_filter:
+            command += [f"--filter={clone_filter}"]
+        self._git_run(*command, source, self.path, cwd="/")
 
     def push(
         self,
@@ -103,9 +150,34 @@ class GitSCM(AbstractSCM):
 
         if push_target:
             command += [f"HEAD:{push_target}"]
+        elif self.detached_head:
+            command += [f"HEAD:{self.default_branch}"]
 
         self._git_run(*command, cwd=self.path)
 
+    def get_worktree(self, path: str) -> Self:
+        """Return the SCM of a `git worktree` at `path`, creating it if needed.
+
+        The worktree has a detached HEAD, which `update_repo` moves to the upstream
+        branch checked out in this repository. It pushes to that branch unless given
+        another target.
+        """
+        branch = self._git_run("symbolic-ref", "--short", "HEAD", cwd=self.path)
+        worktree = GitSCM(path, default_branch=branch)
+        # A branch can only be checked out in one worktree.
+        worktree.detached_head = True
+        if not worktree.repo_is_initialized:
+            logger.info(f"Adding worktree at {path} to {self}.")
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            # Forget any worktree which was deleted without `remove_worktree`.
+            self._git_run("worktree", "prune", cwd=self.path)
+            self._git_run("worktree", "add", "--detach", path, "HEAD", cwd=self.path)
+        return worktree
+
+    def remove_worktree(self, path: str):
+        """Remove a worktree created with `get_worktree`."""
+        self._git_run("worktree", "remove", "--force", path, cwd=self.path)
+
     @staticmethod
     def _get_github_token(repo_owner: str, repo_name: str) -> Optional[str]:
         """Obtain a fresh GitHub token to push to the specified repo.
@@ -153,6 +225,8 @@ class GitSCM(AbstractSCM):
             f_diff.write(diff)
             f_diff.flush()
 
+            self.mark_paths_touched(self.paths_from_diff(diff))
+
             cmds = [
                 ["apply", f_diff.name],
                 ["add", "-A"],
@@ -170,6 +244,194 @@ class GitSCM(AbstractSCM):
             for c in cmds:
                 self._git_run(*c, cwd=self.path)
 
+    def apply_patches(self, patches: list[Patch]):
+        """Apply the given patches with a single `git am`, committing each in turn.
+
+        Patches that can't be represented exactly in a mailbox, e.g. because their
+        commit message contains a line `git am` would take as the start of the diff,
+        are applied one at a time instead. A patch which fails to apply is merged
+        from its base with `merge_patch_from_base`.
+        """
+        if not patches:
+            return
+
+        messages = [self._mbox_message(patch) for patch in patches]
+        if None in messages:
+            return super().apply_patches(patches)
+
+        for patch in patches:
+            self.mark_paths_touched(self.paths_from_diff(patch.diff))
+
+        base_commit = self.head_ref()
+        try:
+            self._git_run(
+                "am",
+                "--3way",
+                "--keep",
+                "--patch-format=mboxrd",
+                cwd=self.path,
+                input="".join(messages),
+            )
+        except SCMException as exc:
+            index = self._quit_am()
+            if not self.merge_patch_from_base(patches[index]):
+                exc.patch_index = index
+                raise
+
+            # Apply the rest of the stack on top of the merged patch.
+            try:
+                self.apply_patches(patches[index + 1 :])
+            except Exception as rest_exc:
+                rest_exc.patch_index = getattr(rest_exc, "patch_index", 0) + index + 1
+                raise
+            return
+
+        # `git am --3way` skips patches whose changes are already present, rather
+        # than failing like `git apply` does.
+        subjects = self._git_run(
+            "log", "--reverse", "--format=%s", f"{base_commit}..HEAD", cwd=self.path
+        ).splitlines()
+        for index, patch in enumerate(patches):
+            subject = patch.commit_description.strip().partition("\n")[0]
+            if index >= len(subjects) or subjects[index] != subject:
+                exc = SCMException(
+                    f"Patch {subject!r} is already applied and would create no commit.",
+                    "",
+                )
+                exc.patch_index = index
+                raise exc
+
+    def merge_patch_from_base(self, patch: Patch) -> bool:
+        """Commit a patch on its base revision, and cherry-pick it onto HEAD.
+
+        The patch is committed using a temporary index, without touching the working
+        copy, and the cherry-pick merges it with the changes made since its base.
+        """
+        base = patch.base_revision
+        if not base:
+            return False
+
+        self._git_run("reset", "--hard", "HEAD", cwd=self.path)
+        self.clean_repo(strip_non_public_commits=False)
+        self.mark_paths_touched(self.paths_from_diff(patch.diff))
+
+        try:
+            if not self._has_commit(base):
+                self._git_run("fetch", "origin", base, cwd=self.path)
+            commit = self._commit_on_base(patch)
+        except SCMException as exc:
+            logger.info(f"could not commit patch on its base {base}", exc_info=exc)
+            return False
+
+        try:
+            self._git_run("cherry-pick", commit, cwd=self.path)
+        except SCMException as exc:
+            logger.info(f"could not merge patch from its base {base}", exc_info=exc)
+            self._git_run("cherry-pick", "--abort", cwd=self.path)
+            return False
+
+        return True
+
+    def _commit_on_base(self, patch: Patch) -> str:
+        """Commit `patch` on top of its base revision, and return the commit hash."""
+        author_name, author_email = parseaddr(patch.commit_author)
+        with tempfile.TemporaryDirectory() as index_dir:
+            env = {"GIT_INDEX_FILE": str(Path(index_dir) / "index")}
+            self._git_run("read-tree", patch.base_revision, cwd=self.path, env=env)
+            self._git_run("apply", "--cached", cwd=self.path, env=env, input=patch.diff)
+            tree = self._git_run("write-tree", cwd=self.path, env=env)
+
+        return self._git_run(
+            "commit-tree",
+            tree,
+            "-p",
+            patch.base_revision,
+            "-F",
+            "-",
+            cwd=self.path,
+            env={
+                "GIT_AUTHOR_NAME": author_name,
+                "GIT_AUTHOR_EMAIL": author_email,
+                "GIT_AUTHOR_DATE": patch.commit_date,
+            },
+            input=patch.commit_description,
+        )
+
+    def _has_commit(self, commit_id: str) -> bool:
+        """Return True if the commit is present in the local repository."""
+        try:
+            self._git_run("cat-file", "-e", f"{commit_id}^{{commit}}", cwd=self.path)
+        except SCMException:
+            return False
+        return True
+
+    def _quit_am(self) -> int:
+        """Stop a failed `git am`, keeping the commits of the patches it applied.
+
+        Returns:
+            int: The index of the patch `git am` stopped at.
+        """
+        next_path = Path(self.path) / self._git_run(
+            "rev-parse", "--git-path", "rebase-apply/next", cwd=self.path
+        )
+        if not next_path.exists():
+            # The mailbox could not be split, so no patch was applied.
+            return 0
+
+        index = int(next_path.read_text()) - 1
+        self._git_run("am", "--quit", cwd=self.path)
+        return index
+
+    @staticmethod
+    def _mbox_message(patch: Patch) -> Optional[str]:
+        """Return `patch` as a message of an mboxrd mailbox, for `git am --keep`.
+
+        Returns:
+            The message, or None if `git am` would not commit the patch with the
+            exact same author, date and commit message.
+        """
+        date_match = GIT_RAW_DATE_RE.fullmatch(patch.commit_date.strip())
+        if (
+            not date_match
+            or not MBOX_AUTHOR_RE.fullmatch(patch.commit_author)
+            or "\r" in patch.commit_description
+            or MBOX_PATCH_BREAK_RE.search(patch.commit_description)
+        ):
+            return None
+
+        subject, _newline, body = patch.commit_description.strip().partition("\n")
+        # `git am` always separates the subject from the body with a blank line.
+        if body and not body.startswith("\n"):
+            return None
+        body = body.lstrip("\n")
+        if MBOX_BODY_HEADER_RE.match(body):
+            return None
+        if not subject or subject != subject.strip():
+            return None
+
+        offset = timedelta(
+            hours=int(date_match["hours"]), minutes=int(date_match["minutes"])
+        )
+        date = datetime.fromtimestamp(
+            int(date_match["timestamp"]),
+            timezone(-offset if date_match["sign"] == "-" else offset),
+        )
+        diff = patch.diff if patch.diff.endswith("\n") else patch.diff + "\n"
+        message = (
+            f"From: {patch.commit_author}\n"
+            f"Date: {format_datetime(date)}\n"
+            f"Subject: {subject}\n"
+            "Content-Type: text/plain; charset=UTF-8\n"
+            "\n"
+            f"{body}\n"
+            "---\n"
+            f"{diff}\n"
+        )
+        return (
+            "From 0000000000000000000000000000000000000000 Mon Sep 17 00:00:00 2001\n"
+            + MBOXRD_FROM_RE.sub(r">\1", message)
+        )
+
     @contextmanager
     def for_pull(self) -> ContextManager:
         """Context manager to prepare the repo with the correct environment variables set for pulling."""
@@ -210,17 +472,62 @@ class GitSCM(AbstractSCM):
         """
         branch = target_cset or self.default_branch
         self.clean_repo()
+        if self.detached_head:
+            # The branch is checked out in the main repository, and can't be
+            # checked out in a worktree as well.
+            self._git_run(
+                "fetch", "--prune", pull_path, self.default_branch, cwd=self.path
+            )
+            self._git_run(
+                "checkout",
+                "--force",
+                "--detach",
+                target_cset or "FETCH_HEAD",
+                cwd=self.path,
+            )
+            return self.head_ref()
+
         self._git_run("pull", "--prune", pull_path, cwd=self.path)
         self._git_run("checkout", "--force", "-B", branch, cwd=self.path)
         return self.head_ref()
 
+    def prefetch(self, pull_path: str):
+        """Fetch upstream objects, without updating any local branch."""
+        self._git_run("fetch", pull_path, cwd=self.path)
+
     def clean_repo(self, *, strip_non_public_commits: bool = True):
-        """Reset the local repository to the origin"""
-        if strip_non_public_commits:
-            self._git_run(
-                "reset", "--hard", f"origin/{self.default_branch}", cwd=self.path
-            )
-        self._git_run("clean", "-fdx", cwd=self.path)
+        """Reset the local repository to the origin.
+
+        If the paths touched since the last clean are known, only those are checked
+        for untracked files, rather than walking the whole working copy.
+        """
+        paths = self.touched_paths
+        with self.clean_timer(incremental=paths is not None):
+            if strip_non_public_commits:
+                self._git_run(
+                    "reset", "--hard", f"origin/{self.default_branch}", cwd=self.path
+                )
+            if paths is None:
+                self._git_run("clean", "-fdx", cwd=self.path)
+            elif paths:
+                # Without any pathspec, `clean` would go through the whole working copy.
+                pathspecs = [f":(literal){path}" for path in sorted(paths)]
+                self._git_run("clean", "-fdx", "--", *pathspecs, cwd=self.path)
+
+        self.touched_paths = set()
+
+    def changed_paths(self) -> list[str]:
+        """Return the paths with uncommitted changes, including untracked files."""
+        changed = self._git_run("diff", "--name-only", "HEAD", cwd=self.path)
+        untracked = self._git_run(
+            "ls-files", "--others", "--exclude-standard", cwd=self.path
+        )
+        return changed.splitlines() + untracked.splitlines()
+
+    def rewind_to(self, commit_id: str):
+        """Discard all commits and local changes on top of `commit_id`."""
+        self._git_run("reset", "--hard", commit_id, cwd=self.path)
+        self.clean_repo(strip_non_public_commits=False)
 
     def format_stack_amend(self) -> Optional[list[str]]:
         """Amend the top commit in the patch stack with changes from formatting."""
@@ -260,7 +567,13 @@ class GitSCM(AbstractSCM):
         return True
 
     @classmethod
-    def _git_run(cls, *args, cwd: Optional[str] = None) -> str:
+    def _git_run(
+        cls,
+        *args,
+        cwd: Optional[str] = None,
+        input: Optional[str] = None,
+        env: Optional[dict[str, str]] = None,
+    ) -> str:
         """Run a git command and return full output.
 
         Parameters:
@@ -271,6 +584,12 @@ class GitSCM(AbstractSCM):
         cwd: str
             Optional path to work in, default to '/'
 
+        input: str
+            Optional data to send to the standard input of the command
+
+        env: dict[str, str]
+            Optional environment variables to set for the command
+
         Returns:
             str: the standard output of the command
         """
@@ -287,9 +606,15 @@ class GitSCM(AbstractSCM):
             },
         )
 
-        result = subprocess.run(
-            command, cwd=path, capture_output=True, text=True, env=cls._git_env()
-        )
+        with time_command(f"git {command_name(args)}"):
+            result = subprocess.run(
+                command,
+                cwd=path,
+                capture_output=True,
+                text=True,
+                env={**cls._git_env(), **(env or {})},
+                input=input,
+            )
 
         if result.returncode:
             redacted_stderr = cls._redact_url_userinfo(result.stderr)
@@ -1,6 +1,8 @@
 import copy
+import itertools
 import logging
 import os
+import re
 import shlex
 import shutil
 import subprocess
@@ -17,7 +19,7 @@ from typing import (
 import hglib
 from django.conf import settings
 
-from lando.main.scm.abstract_scm import AbstractSCM
+from lando.main.scm.abstract_scm import AbstractSCM, Patch
 from lando.main.scm.consts import SCM_TYPE_HG
 from lando.main.scm.exceptions import (
     PatchConflict,
@@ -28,11 +30,33 @@ from lando.main.scm.exceptions import (
     TreeApprovalRequired,
     TreeClosed,
 )
+from lando.utils.timings import command_name, time_command
 
 logger = logging.getLogger(__name__)
 
 REQUEST_USER_ENV_VAR = "AUTOLAND_REQUEST_USER"
 
+# A full or short changeset hash.
+NODE_RE = re.compile(r"^[0-9a-f]{12,40}$")
+
+# Lines `hg import` takes as the start of the diff, borrowed from `patch.extract`.
+IMPORT_DIFF_START_RE = re.compile(
+    r"^(?:Index:[ \t]|diff[ \t]-|RCS file: |"
+    r"retrieving revision [0-9]+(\.[0-9]+)*$|"
+    r"---[ \t].*?^\+\+\+[ \t]|"
+    r"\*\*\*[ \t].*?^---[ \t])",
+    flags=re.MULTILINE | re.DOTALL,
+)
+
+# Output of `hg import --verbose` for each changeset it commits.
+IMPORT_CREATED_RE = re.compile(r"^created [0-9a-f]+$", flags=re.MULTILINE)
+
+HG_EXPORT_TEMPLATE = """# HG changeset patch
+# User {commit_author}
+# Date {commit_date}
+{commit_description}
+{diff}"""
+
 
 class HgException(SCMException):
     """
@@ -156,13 +180,27 @@ class HgSCM(AbstractSCM):
         / "api/legacy/hgext/set_landing_system.py",
     }
 
+    # The command server is restarted after running this many commands, to bound
+    # any state accumulating in the long-lived process.
+    SERVER_MAX_COMMANDS = 1000
+
     config: dict
 
-    hg_repo: hglib.client.hgclient
+    hg_repo: Optional[hglib.client.hgclient]
+
+    # Number of commands run by the current command server.
+    server_commands: int
+
+    # Email of the user requesting the landing, set while in `for_push`.
+    request_user: Optional[str]
 
     def __init__(self, path: str, config: Optional[dict] = None):
         self.config = copy.copy(self.DEFAULT_CONFIGS)
 
+        self.hg_repo = None
+        self.server_commands = 0
+        self.request_user = None
+
         # Somewhere to store patch headers for testing.
         self.patch_header = None
 
@@ -193,16 +231,23 @@ class HgSCM(AbstractSCM):
         force_push: bool = False,
     ) -> None:
         """Push local code to the remote repository."""
-        if not os.getenv(REQUEST_USER_ENV_VAR):
+        if not self.request_user:
             raise ValueError(f"{REQUEST_USER_ENV_VAR} not set while attempting to push")
 
-        extra_args = []
+        # The command server is shared between jobs, so the request user is passed
+        # to ssh through the environment of this push only.
+        ssh_command = "{}={} {}".format(
+            REQUEST_USER_ENV_VAR,
+            shlex.quote(self.request_user),
+            self.config.get("ui.ssh") or "ssh",
+        )
+        extra_args = ["--config", f"ui.ssh={ssh_command}"]
 
         if force_push:
             extra_args.append("-f")
 
         if not push_target:
-            self.run_hg(["push", "-r", "tip", push_path] + extra_args)
+            self.run_hg(["push", "-r", ".", push_path] + extra_args)
         else:
             self.run_hg_cmds(
                 [
@@ -251,6 +296,11 @@ class HgSCM(AbstractSCM):
             # Using 95 as the similarity to match automv's default.
             import_cmd = ["import", "--no-commit"] + similarity_args
 
+            # Note the paths of the patch before importing it, so they are cleaned
+            # even if it only partially applies.
+            diff_paths = self.paths_from_diff(diff)
+            self.mark_paths_touched(diff_paths)
+
             try:
                 self.run_hg(import_cmd + [f_diff.name])
             except HgPatchConflict as exc:
@@ -260,6 +310,7 @@ class HgSCM(AbstractSCM):
                 logger.info("import failed, retrying with 'patch'", exc_info=exc)
                 import_cmd += ["--config", "ui.patch=patch"]
                 self.clean_repo(strip_non_public_commits=False)
+                self.mark_paths_touched(diff_paths)
 
                 # When using an external patch util mercurial won't
                 # automatically handle add/remove/renames.
@@ -279,21 +330,160 @@ class HgSCM(AbstractSCM):
                 + ["--logfile", f_msg.name]
             )
 
+    def apply_patches(self, patches: list[Patch]):
+        """Apply the given patches, importing as many as possible in one `hg import`.
+
+        The patches are streamed as exports to a single `hg import` through the
+        command server. A patch which can't be imported that way, because it
+        conflicts or its commit message would not be parsed back exactly, is
+        applied on its own with `apply_patch`, or merged from its base with
+        `merge_patch_from_base`, and the following patches are imported together
+        again.
+        """
+        index = 0
+        while index < len(patches):
+            stack = list(itertools.takewhile(self._can_import_exactly, patches[index:]))
+            if stack:
+                index += self._import_patches(stack)
+                if index == len(patches):
+                    break
+
+            patch = patches[index]
+            try:
+                self.apply_patch(
+                    patch.diff,
+                    patch.commit_description,
+                    patch.commit_author,
+                    patch.commit_date,
+                )
+            except Exception as exc:
+                if not self.merge_patch_from_base(patch):
+                    exc.patch_index = index
+                    raise
+            index += 1
+
+    def merge_patch_from_base(self, patch: Patch) -> bool:
+        """Commit a patch on its base revision, and rebase it onto the current commit.
+
+        The patch is imported on its base revision, then rebased, which merges it
+        with the changes made since its base using `ui.merge`.
+        """
+        base = patch.base_revision
+        if not base:
+            return False
+
+        self.clean_repo(strip_non_public_commits=False)
+        tip = self.head_ref()
+        node = None
+        try:
+            if not self._has_revision(base):
+                self.run_hg(["pull", "-r", base])
+            self.run_hg(["update", "--clean", "-r", base])
+            self.apply_patch(
+                patch.diff,
+                patch.commit_description,
+                patch.commit_author,
+                patch.commit_date,
+            )
+            node = self.head_ref()
+            self.run_hg(["rebase", "-s", node, "-d", tip])
+        except HgException as exc:
+            logger.info(f"could not merge patch from its base {base}", exc_info=exc)
+            try:
+                self.run_hg(["rebase", "--abort"])
+            except HgException:
+                pass
+            self.run_hg(["update", "--clean", "-r", tip])
+            if node:
+                self.run_hg(["strip", "--no-backup", "-r", node])
+            self.clean_repo(strip_non_public_commits=False)
+            return False
+
+        return True
+
+    def _import_patches(self, patches: list[Patch]) -> int:
+        """Import and commit the given patches with a single `hg import`.
+
+        Returns:
+            int: The number of patches committed, from the start of `patches`. If
+                not all of them, the next patch failed to import.
+        """
+        import_cmd = [
+            "import",
+            "--verbose",
+            "--landing_system",
+            "lando",
+            "-s",
+            "95",
+            "-",
+        ]
+        for patch in patches:
+            self.mark_paths_touched(self.paths_from_diff(patch.diff))
+
+        try:
+            self.run_hg(import_cmd, input=self._export_patches(patches))
+        except HgException as exc:
+            imported = len(IMPORT_CREATED_RE.findall(exc.out))
+            logger.info(
+                f"import of {len(patches)} patches failed after {imported}",
+                exc_info=exc,
+            )
+        else:
+            return len(patches)
+
+        # The import is a single transaction, so it rolled back all the patches.
+        # Clean up after the failed patch, and only import those before it.
+        self.clean_repo(strip_non_public_commits=False)
+        if imported:
+            for patch in patches[:imported]:
+                self.mark_paths_touched(self.paths_from_diff(patch.diff))
+            self.run_hg(import_cmd, input=self._export_patches(patches[:imported]))
+        return imported
+
+    def _export_patches(self, patches: list[Patch]) -> bytes:
+        """Return the given patches as concatenated `hg export`s."""
+        exports = []
+        for patch in patches:
+            export = HG_EXPORT_TEMPLATE.format(**patch._asdict())
+            # The next export must start on its own line.
+            exports.append(export if export.endswith("\n") else export + "\n")
+        return "".join(exports).encode(self.ENCODING)
+
+    @staticmethod
+    def _can_import_exactly(patch: Patch) -> bool:
+        """Return True if `hg import` would commit `patch` with its exact metadata.
+
+        `hg import` takes the commit message of an export to end where the diff
+        starts, so it must not contain anything looking like a diff or an export.
+        """
+        description = patch.commit_description
+        return not (
+            "\n" in patch.commit_author
+            or "\n" in patch.commit_date
+            or "\r" in description
+            or description.startswith("# ")
+            or "# HG changeset patch" in description
+            or "\n---\n" in f"\n{description}\n"
+            or IMPORT_DIFF_START_RE.search(description)
+            or not IMPORT_DIFF_START_RE.match(patch.diff)
+        )
+
     @contextmanager
     def for_push(self, requester_email: str):
         """Prepare the repo with the correct environment variables set for pushing.
 
-        The request user's email address needs to be present before initializing a repo
-        if the repo is to be used for pushing remotely.
+        The request user's email address needs to be present if the repo is to be
+        used for pushing remotely. It is passed to the push command, rather than to
+        the command server, which is reused across jobs.
         """
-        os.environ[REQUEST_USER_ENV_VAR] = requester_email
+        self.request_user = requester_email
         logger.debug(f"{REQUEST_USER_ENV_VAR} set to {requester_email}")
         self._open()
         try:
             yield self
         finally:
-            del os.environ[REQUEST_USER_ENV_VAR]
-            self._clean_and_close()
+            self.request_user = None
+            self._clean()
 
     @contextmanager
     def for_pull(self) -> ContextManager:
@@ -306,7 +496,7 @@ class HgSCM(AbstractSCM):
         try:
             yield self
         finally:
-            self._clean_and_close()
+            self._clean()
 
     def head_ref(self) -> str:
         """Get the current revision_id."""
@@ -334,14 +524,58 @@ class HgSCM(AbstractSCM):
         self._update_from_upstream(source, target_cset)
         return self.head_ref()
 
+    def prefetch(self, pull_path: str):
+        """Pull upstream changes, without updating the working directory.
+
+        This runs in a separate `hg` process rather than through the command server,
+        so that it can be used concurrently with the current job.
+        """
+        command = ["hg", "--repository", self.path, "pull", pull_path]
+        for config in self._config_to_list():
+            command += ["--config", config]
+
+        logger.info("prefetching hg repo", extra={"path": self.path})
+        with time_command("hg pull"):
+            result = subprocess.run(
+                command,
+                capture_output=True,
+                env={**os.environ, "HGPLAIN": "1", "HGENCODING": self.ENCODING},
+            )
+        if result.returncode:
+            raise HgCommandError(
+                command[1:],
+                result.stdout.decode(errors="replace"),
+                result.stderr.decode(errors="replace"),
+                f"hg error while prefetching {self.path}",
+            )
+
+    def _has_revision(self, rev: str | bytes) -> bool:
+        """Return True if the changeset hash is present in the local repository.
+
+        Symbolic names (branches, bookmarks, ...) may move upstream, so they are
+        never considered present.
+        """
+        if isinstance(rev, bytes):
+            rev = rev.decode(self.ENCODING)
+        if not NODE_RE.match(rev):
+            return False
+
+        try:
+            self.run_hg(["log", "-r", rev, "-T", "{node}"])
+        except HgCommandError:
+            return False
+        return True
+
     def _update_from_upstream(self, source, remote_rev):
         """Update the repository to the specified changeset (not optional)."""
-        # Pull and update to remote tip.
+        # Pull and update to remote tip. Pulling is skipped if the changeset is
+        # already known locally, e.g. after a `prefetch`.
         cmds = [
-            ["pull", source],
             ["rebase", "--abort"],
             ["update", "--clean", "-r", remote_rev],
         ]
+        if not self._has_revision(remote_rev):
+            cmds.insert(0, ["pull", source])
 
         for cmd in cmds:
             try:
@@ -402,18 +636,88 @@ class HgSCM(AbstractSCM):
         """Return the currently checked out node."""
         return self.run_hg(["identify", "-r", ".", "-i"])
 
-    def clone(self, source: str):
-        """Clone a repository from a source."""
+    def clone(self, source: str, bootstrap_source: str = "", clone_filter: str = ""):
+        """Clone a repository from a source.
+
+        If `bootstrap_source` is a bundle file, e.g. from `hg bundle --all`, it is
+        unbundled into a new repository. Otherwise, it is taken as a mirror to stream
+        clone from. In both cases, the rest of the history is then pulled from
+        `source`. Without a `bootstrap_source`, the clone bundles `source` advertises,
+        if any, are used.
+
+        `clone_filter` is not supported, and ignored.
+        """
         # Use of robustcheckout here would work, but is probably not worth
         # the hassle as most of the benefits come from repeated working
         # directory creation. Since this is a one-time clone and is unlikely
         # to happen very often, we can get away with a standard clone.
-        hglib.clone(
-            source=source,
-            dest=self.path,
-            encoding=self.ENCODING,
-            configs=self._config_to_list(),
-        )
+        if not bootstrap_source:
+            hglib.clone(
+                source=source,
+                dest=self.path,
+                encoding=self.ENCODING,
+                configs=self._config_to_list(),
+            )
+            return
+
+        bundle = Path(bootstrap_source).is_file()
+        if bundle:
+            hglib.init(
+                dest=self.path, encoding=self.ENCODING, configs=self._config_to_list()
+            )
+        else:
+            hglib.clone(
+                source=bootstrap_source,
+                dest=self.path,
+                noupdate=True,
+                uncompressed=True,
+                encoding=self.ENCODING,
+                configs=self._config_to_list(),
+            )
+
+        # Pull from, and later push to, `source` rather than the bootstrap source.
+        # This must be written before the command server starts, as it only reads
+        # the configuration once.
+        Path(self.path, ".hg", "hgrc").write_text(f"[paths]\ndefault = {source}\n")
+        if bundle:
+            self.run_hg(["unbundle", bootstrap_source])
+        self.run_hg(["pull", "--update", source])
+
+    def get_worktree(self, path: str) -> Self:
+        """Return the SCM of a `hg share` of this repository at `path`.
+
+        The share is created if needed. It uses the store of this repository, but has
+        its own bookmarks, so that pushes from different shares don't interfere.
+        """
+        worktree = HgSCM(path, config=self.config)
+        if not Path(path, ".hg").exists():
+            logger.info(f"Sharing {self} at {path}.")
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            command = ["hg", "share", "--config", "extensions.share=", self.path, path]
+            for config in self._config_to_list():
+                command += ["--config", config]
+
+            with time_command("hg share"):
+                result = subprocess.run(
+                    command,
+                    capture_output=True,
+                    env={**os.environ, "HGPLAIN": "1", "HGENCODING": self.ENCODING},
+                )
+            if result.returncode:
+                raise HgCommandError(
+                    command[1:],
+                    result.stdout.decode(errors="replace"),
+                    result.stderr.decode(errors="replace"),
+                    f"hg error while sharing {self.path} at {path}",
+                )
+        return worktree
+
+    def remove_worktree(self, path: str):
+        """Remove a share created with `get_worktree`.
+
+        The share only holds a working copy, and a pointer to the shared store.
+        """
+        shutil.rmtree(path)
 
     @property
     def repo_is_initialized(self) -> bool:
@@ -445,17 +749,22 @@ class HgSCM(AbstractSCM):
             last_result = self.run_hg(cmd)
         return last_result
 
-    def run_hg(self, args: list[str]) -> bytes:
+    def run_hg(self, args: list[str], input: Optional[bytes] = None) -> bytes:
         """Run a single Mercurial command, and return its output.
 
+        If `input` is given, it is sent to the command as its standard input.
+
         A specific HgException will be raised on error."""
         try:
-            return self._run_hg(args)
+            return self._run_hg(args, input=input)
         except hglib.error.CommandError as exc:
             raise HgException.from_hglib_error(exc) from exc
 
-    def _run_hg(self, args: list[str]) -> bytes:
+    def _run_hg(self, args: list[str], input: Optional[bytes] = None) -> bytes:
         """Use hglib to run a Mercurial command, and return its output."""
+        self._open()
+        self.server_commands += 1
+
         correlation_id = str(uuid.uuid4())
         logger.info(
             "running hg command",
@@ -470,14 +779,19 @@ class HgSCM(AbstractSCM):
         out = hglib.util.BytesIO()
         err = hglib.util.BytesIO()
         out_channels = {b"o": out.write, b"e": err.write}
-        ret = self.hg_repo.runcommand(
-            [
-                arg.encode(self.ENCODING) if isinstance(arg, str) else arg
-                for arg in args
-            ],
-            {},
-            out_channels,
-        )
+        in_channels = {}
+        if input is not None:
+            stdin = hglib.util.BytesIO(input)
+            in_channels = {b"I": stdin.read, b"L": stdin.readline}
+        with time_command(f"hg {command_name(args)}"):
+            ret = self.hg_repo.runcommand(
+                [
+                    arg.encode(self.ENCODING) if isinstance(arg, str) else arg
+                    for arg in args
+                ],
+                in_channels,
+                out_channels,
+            )
 
         out = out.getvalue()
         err = err.getvalue()
@@ -498,32 +812,142 @@ class HgSCM(AbstractSCM):
         return out
 
     def _open(self):
-        """Initialiase hglib to run Mercurial commands."""
+        """Ensure a healthy hglib command server is available to run commands.
+
+        The command server is long-lived and reused across jobs. It is (re)started
+        if it is not running, has died, or has run `SERVER_MAX_COMMANDS` commands.
+        """
+        if self._server_is_healthy():
+            return
+
+        self._close()
         self.hg_repo = hglib.open(
             self.path, encoding=self.ENCODING, configs=self._config_to_list()
         )
+        self.server_commands = 0
+        logger.info(
+            "started hg command server",
+            extra={"path": self.path, "hg_pid": self.hg_repo.server.pid},
+        )
+
+    def _server_is_healthy(self) -> bool:
+        """Return True if the current command server can be reused."""
+        return (
+            self.hg_repo is not None
+            and self.hg_repo.server is not None
+            and self.hg_repo.server.poll() is None
+            and self.server_commands < self.SERVER_MAX_COMMANDS
+        )
+
+    def _close(self):
+        """Stop the command server, if any."""
+        if self.hg_repo is None:
+            return
+
+        try:
+            self.hg_repo.close()
+        except Exception as e:
+            logger.exception(e)
+        self.hg_repo = None
 
     def _config_to_list(self):
         """Reformat the object's config, to a list of strings suitable for hglib"""
         return ["{}={}".format(k, v) for k, v in self.config.items() if v is not None]
 
-    def _clean_and_close(self):
-        """Perform closing activities when exiting any context managers."""
+    def _clean(self):
+        """Perform cleaning activities when exiting any context managers.
+
+        The command server is left running, to be reused by the next job.
+        """
         try:
             self.clean_repo()
         except Exception as e:
             logger.exception(e)
-        self.hg_repo.close()
 
     def clean_repo(self, *, strip_non_public_commits: bool = True):
-        """Clean the local working copy from all extraneous files."""
+        """Clean the local working copy from all extraneous files.
+
+        If the paths touched since the last clean are known, only those paths are
+        cleaned, rather than walking the whole working copy. Should stripping
+        changesets then fail because of other local changes, e.g. made outside of
+        Lando, the whole working copy is cleaned before trying again.
+        """
+        paths = self.touched_paths
+        with self.clean_timer(incremental=paths is not None):
+            self._clean_working_copy(paths)
+
+            # Strip any lingering draft changesets. Only those of this working copy
+            # are stripped, as the store may be shared with other working copies.
+            if strip_non_public_commits:
+                try:
+                    self._strip_non_public_commits()
+                except HgException as e:
+                    # Depending on the version of Mercurial, strip reports
+                    # either message.
+                    local_changes = any(
+                        message in e.err
+                        for message in ("uncommitted changes", "local changes found")
+                    )
+                    if paths is None or not local_changes:
+                        raise
+                    # The rejects of the touched paths were already saved.
+                    self._clean_working_copy(None, save_rejects=False)
+                    self._strip_non_public_commits()
+
+        self.touched_paths = set()
+
+    def _clean_working_copy(
+        self, paths: Optional[set[str]], *, save_rejects: bool = True
+    ):
+        """Revert and purge the given `paths`, or the whole working copy if None.
+
+        Unless `save_rejects` is unset, the `.rej` files are first copied to the
+        rejects directory.
+        """
+        if save_rejects:
+            self._save_rejects(paths)
+
+        # Clean working directory.
+        if paths is None:
+            revert_args = ["--all"]
+            purge_args = []
+        else:
+            revert_args = [f"path:{path}" for path in sorted(paths)]
+            purge_args = [
+                f"path:{path}{suffix}"
+                for path in sorted(paths)
+                for suffix in ("", ".orig", ".rej")
+            ]
+
+        # Without any path, `purge` would go through the whole working copy.
+        if paths is not None and not paths:
+            return
+
+        try:
+            self.run_hg(["--quiet", "revert", "--no-backup"] + revert_args)
+        except HgException:
+            pass
+        try:
+            self.run_hg(["purge"] + purge_args)
+        except HgException:
+            pass
+
+    def _save_rejects(self, paths: Optional[set[str]]):
+        """Copy the `.rej` files of `paths`, or of the whole working copy if None."""
         # Reset rejects directory
         if self.get_rejects_path().is_dir():
             shutil.rmtree(self.get_rejects_path())
         self.get_rejects_path().mkdir()
 
         # Copy .rej files to a temporary folder.
-        rejects = Path(f"{self.path}/").rglob("*.rej")
+        if paths is None:
+            rejects = Path(f"{self.path}/").rglob("*.rej")
+        else:
+            rejects = [
+                reject
+                for reject in (Path(self.path) / f"{path}.rej" for path in paths)
+                if reject.is_file()
+            ]
         for reject in rejects:
             os.makedirs(
                 self.get_rejects_path().joinpath(reject.parents[0].as_posix()[1:]),
@@ -531,19 +955,46 @@ class HgSCM(AbstractSCM):
             )
             shutil.copy(reject, self.get_rejects_path().joinpath(reject.as_posix()[1:]))
 
-        # Clean working directory.
+    def _strip_non_public_commits(self):
+        """Strip the draft changesets of the working copy, if any."""
         try:
-            self.run_hg(["--quiet", "revert", "--no-backup", "--all"])
-        except HgException:
-            pass
+            self.run_hg(["strip", "--no-backup", "-r", "not public() and ::."])
+        except HgException as e:
+            # Having no draft changesets to strip is fine.
+            if "empty revision set" not in e.err:
+                raise
+
+    def changed_paths(self) -> list[str]:
+        """Return the paths with uncommitted changes, including untracked files."""
+        return (
+            self.run_hg(
+                [
+                    "status",
+                    "--no-status",
+                    "--modified",
+                    "--added",
+                    "--removed",
+                    "--deleted",
+                    "--unknown",
+                ]
+            )
+            .decode(self.ENCODING)
+            .splitlines()
+        )
+
+    def rewind_to(self, commit_id: str):
+        """Discard all commits and local changes on top of `commit_id`."""
+        self.run_hg(["update", "--clean", "-r", commit_id])
+        self.clean_repo(strip_non_public_commits=False)
         try:
-            self.run_hg(["purge"])
+            self.run_hg(
+                [
+                    "strip",
+                    "--no-backup",
+                    "-r",
+                    f"descendants({commit_id}) - {commit_id}",
+                ]
+            )
         except HgException:
+            # Nothing was committed on top of `commit_id`.
             pass
-
-        # Strip any lingering draft changesets.
-        if strip_non_public_commits:
-            try:
-                self.run_hg(["strip", "--no-backup", "-r", "not public()"])
-            except HgException:
-                pass
@@ -5,6 +5,7 @@ from unittest.mock import MagicMock
 
 import pytest
 
+from lando.main.scm.abstract_scm import Patch
 from lando.main.scm.exceptions import SCMException
 from lando.main.scm.git import GitSCM
 
@@ -63,6 +64,73 @@ def test_GitSCM_clone(git_repo: Path, tmp_path: Path, monkeypatch):
     ).exists(), f"New git clone {clone_path} doesn't contain a .git directory"
 
 
+@pytest.mark.parametrize("bootstrap", ("bundle", "reference", "filter"))
+def test_GitSCM_clone_bootstrap(git_repo: Path, tmp_path: Path, bootstrap: str):
+    bootstrap_source = ""
+    clone_filter = ""
+    if bootstrap == "bundle":
+        bootstrap_source = str(tmp_path / "repo.bundle")
+        subprocess.run(
+            ["git", "bundle", "create", bootstrap_source, "--all"],
+            cwd=str(git_repo),
+            check=True,
+        )
+    elif bootstrap == "reference":
+        bootstrap_source = str(tmp_path / "reference")
+        subprocess.run(
+            ["git", "clone", "--bare", str(git_repo), bootstrap_source], check=True
+        )
+    else:
+        clone_filter = "blob:none"
+        subprocess.run(
+            ["git", "config", "uploadpack.allowFilter", "true"],
+            cwd=str(git_repo),
+            check=True,
+        )
+
+    # The bootstrap source is missing the latest commit of the repository.
+    subprocess.run(
+        [
+            "git",
+            "-c",
+            "user.name=Test User",
+            "-c",
+            "user.email=test@example.com",
+            "commit",
+            "--allow-empty",
+            "-m",
+            "latest commit",
+        ],
+        cwd=str(git_repo),
+        check=True,
+    )
+    source = f"file://{git_repo}"
+    clone_path = tmp_path / "repo_test_GitSCM_clone_bootstrap"
+    scm = GitSCM(str(clone_path))
+
+    scm.clone(source, bootstrap_source=bootstrap_source, clone_filter=clone_filter)
+
+    assert scm.head_ref() == GitSCM(str(git_repo)).head_ref()
+    remote_url = subprocess.run(
+        ["git", "remote", "get-url", "origin"],
+        cwd=str(clone_path),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    assert remote_url == source, "The clone should pull from the source"
+    assert not (
+        clone_path / ".git" / "objects" / "info" / "alternates"
+    ).exists(), "The clone should not depend on the reference repository"
+    partial_clone_filter = subprocess.run(
+        ["git", "config", "--get", "remote.origin.partialclonefilter"],
+        cwd=str(clone_path),
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    assert partial_clone_filter == clone_filter
+
+
 @pytest.mark.parametrize(
     "strip_non_public_commits",
     (True, False),
@@ -139,6 +207,454 @@ def test_GitSCM_clean_repo(
     ), f"strip_non_public_commits not honoured for {new_file}"
 
 
+def test_GitSCM_clean_repo_incremental(
+    git_repo: Path, tmp_path: Path, git_setup_user: Callable, monkeypatch
+):
+    clone_path = tmp_path / "repo_test_GitSCM_clean_repo_incremental"
+    clone_path.mkdir()
+    scm = GitSCM(str(clone_path))
+    scm.clone(str(git_repo))
+    git_setup_user(str(clone_path))
+    assert scm.touched_paths is None, "A new repo should be fully cleaned first"
+
+    scm.clean_repo()
+    assert scm.touched_paths == set()
+
+    scm.apply_patch(
+        "diff --git a/new_file b/new_file\n"
+        "new file mode 100644\n"
+        "--- /dev/null\n"
+        "+++ b/new_file\n"
+        "@@ -0,0 +1,1 @@\n"
+        "+test\n",
+        "add new_file",
+        "Test User <test@example.com>",
+        "0 +0000",
+    )
+    assert scm.touched_paths == {"new_file"}
+
+    new_dir = clone_path / "new_dir"
+    new_dir.mkdir()
+    touched_file = new_dir / "touched_file"
+    touched_file.write_text("test", encoding="utf-8")
+    untouched_file = clone_path / "untouched_file"
+    untouched_file.write_text("test", encoding="utf-8")
+    scm.mark_paths_touched(["new_dir/touched_file"])
+
+    mock_git_run = _monkeypatch_scm(monkeypatch, scm, "_git_run")
+
+    # Only the touched paths are cleaned.
+    scm.clean_repo()
+    mock_git_run.assert_called_with(
+        "clean",
+        "-fdx",
+        "--",
+        ":(literal)new_dir/touched_file",
+        ":(literal)new_file",
+        cwd=str(clone_path),
+    )
+    assert scm.touched_paths == set()
+    assert not (clone_path / "new_file").exists()
+    assert not touched_file.exists()
+    assert untouched_file.exists()
+
+    # When the touched paths are unknown, the whole repo is cleaned.
+    scm.mark_paths_touched(None)
+    scm.clean_repo()
+    assert not untouched_file.exists()
+
+
+def test_GitSCM_prefetch(
+    git_repo: Path, tmp_path: Path, git_setup_user: Callable, monkeypatch
+):
+    clone_path = tmp_path / "repo_test_GitSCM_prefetch"
+    clone_path.mkdir()
+    scm = GitSCM(str(clone_path))
+    scm.clone(str(git_repo))
+
+    # Add a new commit upstream.
+    git_setup_user(str(git_repo))
+    subprocess.run(
+        ["git", "commit", "--allow-empty", "-m", "upstream commit"],
+        cwd=str(git_repo),
+        check=True,
+    )
+    upstream_commit = subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=str(git_repo), capture_output=True, text=True
+    ).stdout.strip()
+    original_commit = scm.head_ref()
+
+    mock_git_run = _monkeypatch_scm(monkeypatch, scm, "_git_run")
+
+    scm.prefetch(str(git_repo))
+
+    mock_git_run.assert_called_with("fetch", str(git_repo), cwd=str(clone_path))
+    assert (
+        scm.head_ref() == original_commit
+    ), "Prefetching should not move the current commit"
+    assert (
+        subprocess.run(
+            ["git", "cat-file", "-e", upstream_commit], cwd=str(clone_path)
+        ).returncode
+        == 0
+    ), "Upstream commit missing from the local repo after prefetch"
+
+
+def test_GitSCM_rewind_to(git_repo: Path, tmp_path: Path, git_setup_user: Callable):
+    clone_path = tmp_path / "repo_test_GitSCM_rewind_to"
+    clone_path.mkdir()
+    scm = GitSCM(str(clone_path))
+    scm.clone(str(git_repo))
+    git_setup_user(str(clone_path))
+    base_commit = scm.head_ref()
+
+    new_file = clone_path / "new_file"
+    new_file.write_text("test", encoding="utf-8")
+    subprocess.run(["git", "add", new_file.name], cwd=str(clone_path), check=True)
+    subprocess.run(
+        ["git", "commit", "-m", "adding new_file"], cwd=str(clone_path), check=True
+    )
+    untracked_file = clone_path / "untracked_file"
+    untracked_file.write_text("test", encoding="utf-8")
+
+    scm.rewind_to(base_commit)
+
+    assert scm.head_ref() == base_commit
+    assert not new_file.exists(), "Commit on top of the base was not discarded"
+    assert not untracked_file.exists(), "Untracked file was not cleaned"
+
+
+NEW_FILE_DIFF = (
+    "diff --git a/new_file b/new_file\n"
+    "new file mode 100644\n"
+    "--- /dev/null\n"
+    "+++ b/new_file\n"
+    "@@ -0,0 +1,1 @@\n"
+    "+test\n"
+)
+CHANGE_NEW_FILE_DIFF = (
+    "diff --git a/new_file b/new_file\n"
+    "--- a/new_file\n"
+    "+++ b/new_file\n"
+    "@@ -1,1 +1,1 @@\n"
+    "-test\n"
+    "+changed\n"
+)
+
+
+@pytest.mark.parametrize(
+    "description,single_command",
+    (
+        (
+            "Bug 1 - [PATCH] add ünïcode\n\nFrom here on.\n\nDifferential Revision: 1",
+            True,
+        ),
+        ("Bug 1 - add new_file", True),
+        ("Bug 1 - add new_file\nwithout a blank line", False),
+        ("Bug 1 - add new_file\n\n---\nnot a diff", False),
+    ),
+)
+def test_GitSCM_apply_patches(
+    git_repo: Path,
+    tmp_path: Path,
+    git_setup_user: Callable,
+    monkeypatch,
+    description: str,
+    single_command: bool,
+):
+    clone_path = tmp_path / "repo_test_GitSCM_apply_patches"
+    clone_path.mkdir()
+    scm = GitSCM(str(clone_path))
+    scm.clone(str(git_repo))
+    git_setup_user(str(clone_path))
+    scm.clean_repo()
+
+    mock_git_run = _monkeypatch_scm(monkeypatch, scm, "_git_run")
+
+    scm.apply_patches(
+        [
+            Patch(
+                NEW_FILE_DIFF,
+                description,
+                "Tëst User <test@example.com>",
+                "1686621879 +0100",
+            ),
+            Patch(
+                CHANGE_NEW_FILE_DIFF,
+                "Bug 2 - change new_file",
+                "Other User <other@example.com>",
+                "1686621880 -0200",
+            ),
+        ]
+    )
+
+    commands = [call.args[0] for call in mock_git_run.call_args_list]
+    if single_command:
+        assert commands.count("am") == 1
+        assert "apply" not in commands and "commit" not in commands
+    else:
+        assert "am" not in commands
+    assert scm.touched_paths == {"new_file"}
+    assert (clone_path / "new_file").read_text() == "changed\n"
+    log = subprocess.run(
+        [
+            "git",
+            "log",
+            "-2",
+            "--reverse",
+            "--format=%an <%ae>|%ad|%B%x00",
+            "--date=raw",
+        ],
+        cwd=str(clone_path),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert [commit.strip() for commit in log.split("\0")[:2]] == [
+        f"Tëst User <test@example.com>|1686621879 +0100|{description}",
+        "Other User <other@example.com>|1686621880 -0200|Bug 2 - change new_file",
+    ]
+
+
+@pytest.mark.parametrize(
+    "failing_diff",
+    (
+        # Already applied.
+        NEW_FILE_DIFF,
+        # Conflicting.
+        CHANGE_NEW_FILE_DIFF.replace("-test", "-other"),
+    ),
+)
+def test_GitSCM_apply_patches_failure(
+    git_repo: Path, tmp_path: Path, git_setup_user: Callable, failing_diff: str
+):
+    clone_path = tmp_path / "repo_test_GitSCM_apply_patches_failure"
+    clone_path.mkdir()
+    scm = GitSCM(str(clone_path))
+    scm.clone(str(git_repo))
+    git_setup_user(str(clone_path))
+    base_commit = scm.head_ref()
+
+    patches = [
+        Patch(NEW_FILE_DIFF, "add new_file", "Test User <test@example.com>", "1 +0000"),
+        Patch(
+            failing_diff,
+            "change new_file",
+            "Test User <test@example.com>",
+            "2 +0000",
+        ),
+    ]
+    with pytest.raises(SCMException) as exc:
+        scm.apply_patches(patches)
+
+    assert exc.value.patch_index == 1, "The failed patch should be identified"
+    assert scm.changeset_descriptions() == ["add new_file"]
+    assert scm.head_ref() != base_commit
+
+    # The repo can be used again once rewound.
+    scm.rewind_to(base_commit)
+    scm.apply_patches(patches[:1])
+    assert scm.changeset_descriptions() == ["add new_file"]
+
+
+LINES_DIFF = (
+    "diff --git a/lines b/lines\n"
+    "--- a/lines\n"
+    "+++ b/lines\n"
+    "@@ -1,5 +1,5 @@\n"
+    " line 1\n"
+    " line 2\n"
+    " line 3\n"
+    "-line 4\n"
+    "+{line}\n"
+    " line 5\n"
+)
+
+
+def _setup_merge_from_base(
+    clone_path: Path,
+    git_repo: Path,
+    git_setup_user: Callable,
+    upstream_line: int,
+    known_base: bool,
+) -> tuple[GitSCM, str, list[Patch]]:
+    """Clone `git_repo`, and return patches based on a commit behind its tip."""
+    clone_path.mkdir()
+    scm = GitSCM(str(clone_path))
+    scm.clone(str(git_repo))
+    git_setup_user(str(clone_path))
+
+    # The patches were created on top of `base_commit`, and the upstream line
+    # changed since.
+    lines = clone_path / "lines"
+    lines.write_text("".join(f"line {i}\n" for i in range(1, 6)), encoding="utf-8")
+    subprocess.run(["git", "add", "lines"], cwd=str(clone_path), check=True)
+    subprocess.run(
+        ["git", "commit", "-m", "add lines"], cwd=str(clone_path), check=True
+    )
+    base_commit = scm.head_ref()
+    lines.write_text(
+        lines.read_text().replace(f"line {upstream_line}", "upstream"),
+        encoding="utf-8",
+    )
+    subprocess.run(
+        ["git", "commit", "-am", "upstream change"], cwd=str(clone_path), check=True
+    )
+    tip_commit = scm.head_ref()
+
+    patches = [
+        Patch(
+            LINES_DIFF.format(line="patched"),
+            "patch line 4",
+            "Test User <test@example.com>",
+            "1686621879 +0000",
+            base_commit if known_base else None,
+        ),
+        Patch(
+            NEW_FILE_DIFF,
+            "add new_file",
+            "Test User <test@example.com>",
+            "1686621880 +0000",
+            base_commit if known_base else None,
+        ),
+    ]
+    return scm, tip_commit, patches
+
+
+@pytest.mark.parametrize(
+    "upstream_line,known_base,merged",
+    (
+        # The patch merges with the upstream change.
+        (1, True, True),
+        # The patch conflicts with the upstream change.
+        (4, True, False),
+        # The patch context changed, and can't be merged without its base.
+        (1, False, False),
+    ),
+)
+def test_GitSCM_apply_patches_merge_from_base(
+    git_repo: Path,
+    tmp_path: Path,
+    git_setup_user: Callable,
+    upstream_line: int,
+    known_base: bool,
+    merged: bool,
+):
+    clone_path = tmp_path / "repo_test_GitSCM_apply_patches_merge_from_base"
+    scm, tip_commit, patches = _setup_merge_from_base(
+        clone_path, git_repo, git_setup_user, upstream_line, known_base
+    )
+    lines = clone_path / "lines"
+
+    if not merged:
+        with pytest.raises(SCMException) as exc:
+            scm.apply_patches(patches)
+        assert exc.value.patch_index == 0
+        assert scm.head_ref() == tip_commit
+        return
+
+    scm.apply_patches(patches)
+
+    assert lines.read_text() == "upstream\nline 2\nline 3\npatched\nline 5\n"
+    assert (clone_path / "new_file").exists()
+    log = subprocess.run(
+        ["git", "log", "--format=%an|%ad|%s", "--date=raw", f"{tip_commit}..HEAD"],
+        cwd=str(clone_path),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.splitlines()
+    assert log == [
+        "Test User|1686621880 +0000|add new_file",
+        "Test User|1686621879 +0000|patch line 4",
+    ]
+
+
+def test_GitSCM_apply_patches_merge_from_base_rest_fails(
+    git_repo: Path, tmp_path: Path, git_setup_user: Callable, monkeypatch
+):
+    clone_path = tmp_path / "repo_test_GitSCM_apply_patches_merge_from_base_rest"
+    scm, _tip_commit, patches = _setup_merge_from_base(
+        clone_path, git_repo, git_setup_user, 1, True
+    )
+
+    # The rest of the stack fails to apply with an error not identifying a patch.
+    apply_patches = scm.apply_patches
+    calls = []
+
+    def fail_rest(patches):
+        calls.append(patches)
+        if len(calls) > 1:
+            raise ValueError("not a patch error")
+        return apply_patches(patches)
+
+    monkeypatch.setattr(scm, "apply_patches", fail_rest)
+
+    with pytest.raises(ValueError) as exc:
+        scm.apply_patches(patches)
+    assert exc.value.patch_index == 1, "The first patch of the rest should be reported"
+
+
+def test_GitSCM_worktree(git_repo: Path, tmp_path: Path, git_setup_user: Callable):
+    upstream_path = tmp_path / "upstream.git"
+    subprocess.run(
+        ["git", "clone", "--bare", str(git_repo), str(upstream_path)], check=True
+    )
+    clone_path = tmp_path / "repo_test_GitSCM_worktree"
+    clone_path.mkdir()
+    scm = GitSCM(str(clone_path))
+    scm.clone(str(upstream_path))
+    git_setup_user(str(clone_path))
+    branch = subprocess.run(
+        ["git", "symbolic-ref", "--short", "HEAD"],
+        cwd=str(clone_path),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+
+    worktree_path = tmp_path / "worktrees" / "worktree-1"
+    worktree = scm.get_worktree(str(worktree_path))
+    assert worktree.repo_is_initialized
+    assert worktree.head_ref() == scm.head_ref()
+    assert worktree.default_branch == branch
+    assert not (worktree_path / ".git").is_dir(), "Worktrees should share the store"
+    assert (
+        scm.get_worktree(str(worktree_path)).path == worktree.path
+    ), "Existing worktrees should be reused"
+
+    other_worktree = scm.get_worktree(str(tmp_path / "worktrees" / "worktree-2"))
+
+    worktree.apply_patch(
+        NEW_FILE_DIFF, "add new_file", "Test User <test@example.com>", "0 +0000"
+    )
+    assert not (clone_path / "new_file").exists()
+    assert worktree.head_ref() != scm.head_ref()
+
+    # Without a target, the worktree pushes to the branch of the repository.
+    worktree.push(str(upstream_path))
+    pushed_commit = subprocess.run(
+        ["git", "rev-parse", branch],
+        cwd=str(upstream_path),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip()
+    assert pushed_commit == worktree.head_ref()
+
+    # Worktrees are updated without checking out the branch of the repository.
+    assert other_worktree.update_repo(str(upstream_path)) == pushed_commit
+    assert scm.update_repo(str(upstream_path)) == pushed_commit
+    detached = subprocess.run(
+        ["git", "symbolic-ref", "-q", "HEAD"], cwd=other_worktree.path
+    )
+    assert detached.returncode != 0, "Worktrees should keep a detached HEAD"
+
+    scm.remove_worktree(str(worktree_path))
+    assert not worktree_path.exists()
+    assert scm.get_worktree(str(worktree_path)).repo_is_initialized
+
+
 def test_GitSCM_push_get_github_token(git_repo: Path):
     scm = GitSCM(str(git_repo))
     scm._git_run = MagicMock()
@@ -4,7 +4,12 @@ import pytest
 from django.conf import settings
 from django.core.exceptions import ValidationError
 
-from lando.main.models import Repo
+from lando.main.models import (
+    ConfigurationKey,
+    ConfigurationVariable,
+    Repo,
+    VariableTypeChoices,
+)
 from lando.main.scm import (
     SCM_TYPE_GIT,
     SCM_TYPE_HG,
@@ -84,3 +89,26 @@ def test__models__Repo__system_path_validator(path, expected_exception):
             repo.clean_fields()
     else:
         repo.clean_fields()  # Should not raise any exception
+
+
+@pytest.mark.django_db
+def test__models__ConfigurationVariable__get_cached(
+    settings, django_assert_num_queries
+):
+    settings.CONFIGURATION_CACHE_SECONDS = 60
+    key = ConfigurationKey.LANDING_WORKER_PAUSED
+    ConfigurationVariable.cache.invalidate()
+
+    with django_assert_num_queries(1):
+        assert ConfigurationVariable.get_cached(key, False) is False
+        assert (
+            ConfigurationVariable.get_cached(key, False) is False
+        ), "Missing variables should be cached too"
+
+    # Saving the variable makes the change visible immediately.
+    ConfigurationVariable.set(key, VariableTypeChoices.BOOL, "1")
+    with django_assert_num_queries(1):
+        assert ConfigurationVariable.get_cached(key, False) is True
+        assert ConfigurationVariable.get_cached(key, False) is True
+
+    ConfigurationVariable.cache.invalidate()
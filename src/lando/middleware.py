@@ -76,7 +76,7 @@ class MaintenanceModeMiddleware:
             "oidc_authentication_callback",
         )
 
-        in_maintenance = ConfigurationVariable.get(
+        in_maintenance = ConfigurationVariable.get_cached(
             ConfigurationKey.API_IN_MAINTENANCE, False
         )
 
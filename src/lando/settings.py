@@ -106,6 +106,18 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/dev/ref/settings/#caches
+
+# The cache is shared by all processes, e.g. for Phabricator objects and product
+# details.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("CACHE_REDIS_URL", "redis://lando.redis:6379/1"),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/dev/ref/settings/#auth-password-validators
@@ -203,8 +215,77 @@ PHABRICATOR_URL = os.getenv("PHABRICATOR_URL", "http://phabricator.test")
 PHABRICATOR_ADMIN_API_KEY = os.getenv("PHABRICATOR_ADMIN_API_KEY", "")
 PHABRICATOR_UNPRIVILEGED_API_KEY = os.getenv("PHABRICATOR_UNPRIVILEGED_API_KEY", "")
 
+# Timeouts of conduit calls, in seconds.
+PHABRICATOR_CONNECT_TIMEOUT_SECONDS = float(
+    os.getenv("PHABRICATOR_CONNECT_TIMEOUT_SECONDS", "5")
+)
+PHABRICATOR_READ_TIMEOUT_SECONDS = float(
+    os.getenv("PHABRICATOR_READ_TIMEOUT_SECONDS", "60")
+)
+
+# The maximum number of connections kept open to Phabricator by each process.
+PHABRICATOR_POOL_SIZE = int(os.getenv("PHABRICATOR_POOL_SIZE", "10"))
+
+# How many times idempotent conduit calls are retried after a connection error,
+# and the delay before the first retry, in seconds, which doubles for each retry.
+PHABRICATOR_RETRIES = int(os.getenv("PHABRICATOR_RETRIES", "2"))
+PHABRICATOR_RETRY_BACKOFF_SECONDS = float(
+    os.getenv("PHABRICATOR_RETRY_BACKOFF_SECONDS", "0.5")
+)
+
+# How long a user's Phabricator API key is trusted after being verified, in
+# seconds. If 0, API keys are verified on every request.
+PHABRICATOR_API_KEY_VERIFICATION_CACHE_SECONDS = int(
+    os.getenv("PHABRICATOR_API_KEY_VERIFICATION_CACHE_SECONDS", "60")
+)
+
+# How long users, projects, repositories and diffs fetched from Phabricator are
+# cached, in seconds. Diffs are also invalidated when their revision is modified.
+PHABRICATOR_OBJECT_CACHE_SECONDS = int(
+    os.getenv("PHABRICATOR_OBJECT_CACHE_SECONDS", "600")
+)
+
+# Whether the landable paths of stacks are stored in, and read from, the stack
+# index instead of being computed on every request. Indexed results are refreshed
+# whenever the `dateModified` of a revision or repository in the stack changes.
+STACK_INDEX_ENABLED = os.getenv("STACK_INDEX_ENABLED", "true").lower() in (
+    "true",
+    "1",
+)
+
+# The maximum number of independent conduit calls made concurrently by a single
+# request. If 1, conduit calls are made one after the other.
+PHABRICATOR_MAX_CONCURRENT_CALLS = int(
+    os.getenv("PHABRICATOR_MAX_CONCURRENT_CALLS", "8")
+)
+
+# How long product details documents, used for code freeze warnings, are used
+# before being revalidated, and for how long a cached document can be used while
+# it can't be retrieved, in seconds. Only fetching a document which isn't cached
+# blocks requests, for up to the timeout.
+PRODUCT_DETAILS_CACHE_SECONDS = int(os.getenv("PRODUCT_DETAILS_CACHE_SECONDS", "600"))
+PRODUCT_DETAILS_MAX_STALE_SECONDS = int(
+    os.getenv("PRODUCT_DETAILS_MAX_STALE_SECONDS", str(7 * 24 * 60 * 60))
+)
+PRODUCT_DETAILS_TIMEOUT_SECONDS = float(
+    os.getenv("PRODUCT_DETAILS_TIMEOUT_SECONDS", "2")
+)
+
 TREESTATUS_URL = os.getenv("TREESTATUS_URL")
 
+# How long workers cache the state of all trees, in seconds. If 0, every check
+# queries the state of the tree from Tree Status.
+TREESTATUS_CACHE_SECONDS = float(os.getenv("TREESTATUS_CACHE_SECONDS", "10"))
+
+# How long workers keep using the cached tree states while Tree Status can't be
+# reached, in seconds. Past that, checking a tree fails until Tree Status is back.
+TREESTATUS_MAX_STALE_SECONDS = float(os.getenv("TREESTATUS_MAX_STALE_SECONDS", "300"))
+
+# Whether workers refresh the cached tree states in a background thread.
+TREESTATUS_BACKGROUND_REFRESH = os.getenv(
+    "TREESTATUS_BACKGROUND_REFRESH", ""
+).lower() in ("true", "1")
+
 ENVIRONMENT = Environment(os.getenv("ENVIRONMENT", "test"))
 
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://lando.redis:6379")
@@ -224,6 +305,10 @@ CSP_REPORTING_URL = os.getenv("CSP_REPORTING_URL", "")
 LANDING_WORKER_USERNAME = os.getenv("LANDING_WORKER_USERNAME", "app")
 LANDING_WORKER_TARGET_SSH_PORT = os.getenv("LANDING_WORKER_TARGET_SSH_PORT", "22")
 
+# How long configuration variables and worker flags are cached in each process.
+# Changes made in the same process are seen immediately.
+CONFIGURATION_CACHE_SECONDS = float(os.getenv("CONFIGURATION_CACHE_SECONDS", "1"))
+
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
 COMMITTER_NAME = os.getenv("LANDO_COMMITTER_NAME", LANDO_USER_NAME)
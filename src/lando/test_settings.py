@@ -22,5 +22,9 @@ CACHES = {
     }
 }
 
+CONFIGURATION_CACHE_SECONDS = 0
+TREESTATUS_CACHE_SECONDS = 0
+PHABRICATOR_RETRY_BACKOFF_SECONDS = 0
+
 DEFAULT_FROM_EMAIL = "Lando <lando@lando.test>"
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
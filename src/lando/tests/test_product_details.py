@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+import requests
+from django.core.cache import cache
+
+from lando.utils.product_details import (
+    REVALIDATION_THREAD_NAME,
+    _cache_key,
+    get_product_details,
+)
+
+PRODUCT_DETAILS_URL = "https://product-details.test/1.0/firefox_versions.json"
+
+
+@pytest.fixture
+def product_details_cache(settings):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    settings.PRODUCT_DETAILS_CACHE_SECONDS = 600
+    settings.PRODUCT_DETAILS_MAX_STALE_SECONDS = 3600
+    cache.clear()
+
+
+def wait_for_revalidation():
+    for thread in threading.enumerate():
+        if thread.name == REVALIDATION_THREAD_NAME:
+            thread.join()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr("lando.utils.product_details.time.time", lambda: now[0])
+    return now
+
+
+def test_get_product_details_cached(product_details_cache, clock, requests_mock):
+    requests_mock.get(
+        PRODUCT_DETAILS_URL,
+        json={"NEXT_MERGE_DATE": "2026-10-20"},
+        headers={"ETag": '"v1"'},
+    )
+
+    assert get_product_details(PRODUCT_DETAILS_URL) == {"NEXT_MERGE_DATE": "2026-10-20"}
+    clock[0] += 599
+    assert get_product_details(PRODUCT_DETAILS_URL) == {"NEXT_MERGE_DATE": "2026-10-20"}
+    assert requests_mock.call_count == 1, "Fresh documents should not be fetched."
+
+    # Stale documents are used, and revalidated in the background with their ETag.
+    requests_mock.get(PRODUCT_DETAILS_URL, status_code=304)
+    clock[0] += 2
+    assert get_product_details(PRODUCT_DETAILS_URL) == {"NEXT_MERGE_DATE": "2026-10-20"}
+    wait_for_revalidation()
+    assert requests_mock.call_count == 2
+    assert requests_mock.last_request.headers["If-None-Match"] == '"v1"'
+
+
+def test_get_product_details_stale_on_error(
+    product_details_cache, clock, requests_mock
+):
+    product_details = requests_mock.get(
+        PRODUCT_DETAILS_URL,
+        [
+            {"json": {"NEXT_MERGE_DATE": "2026-10-20"}},
+            {"exc": requests.ConnectTimeout},
+        ],
+    )
+    get_product_details(PRODUCT_DETAILS_URL)
+
+    clock[0] += 601
+    assert get_product_details(PRODUCT_DETAILS_URL) == {
+        "NEXT_MERGE_DATE": "2026-10-20"
+    }, "The cached document should be used while the host is down."
+    wait_for_revalidation()
+    assert get_product_details(PRODUCT_DETAILS_URL) is not None
+    assert product_details.call_count == 2, "Failures should not be retried right away."
+
+    clock[0] += 3600
+    assert (
+        get_product_details(PRODUCT_DETAILS_URL) is None
+    ), "Documents should not be used past their maximum staleness."
+
+
+def test_get_product_details_error_without_cache(requests_mock):
+    requests_mock.get(PRODUCT_DETAILS_URL, status_code=500)
+
+    assert get_product_details(PRODUCT_DETAILS_URL) is None
+
+
+def test_get_product_details_lock(product_details_cache, clock, requests_mock):
+    requests_mock.get(PRODUCT_DETAILS_URL, json={"NEXT_MERGE_DATE": "2026-10-20"})
+    lock_key = f"{_cache_key(PRODUCT_DETAILS_URL)}.lock"
+
+    # Fetching a document that isn't cached doesn't take the lock.
+    cache.set(lock_key, True, timeout=None)
+    get_product_details(PRODUCT_DETAILS_URL)
+    assert cache.get(lock_key), "Locks held by other processes should be kept."
+
+    # Stale documents are used as is while another process revalidates them.
+    clock[0] += 601
+    assert get_product_details(PRODUCT_DETAILS_URL) == {"NEXT_MERGE_DATE": "2026-10-20"}
+    assert requests_mock.call_count == 1
+
+    cache.delete(lock_key)
+    get_product_details(PRODUCT_DETAILS_URL)
+    wait_for_revalidation()
+    assert requests_mock.call_count == 2
+    assert cache.get(lock_key) is None, "The lock should be released."
@@ -0,0 +1,30 @@
+from lando.utils.timings import Timings, command_name, time_command
+
+
+def test_timings_stages_and_commands():
+    timings = Timings("lando-api.test.stage")
+
+    with timings.stage("update"):
+        with time_command("hg pull"):
+            pass
+        with time_command("hg pull"):
+            pass
+    with timings.stage("push"):
+        with time_command("hg push"):
+            pass
+
+    # Commands run outside of a stage are not recorded.
+    with time_command("hg log"):
+        pass
+
+    serialized = timings.serialize()
+    assert set(serialized["stages"]) == {"update", "push"}
+    assert serialized["commands"]["hg pull"]["count"] == 2
+    assert serialized["commands"]["hg push"]["count"] == 1
+    assert "hg log" not in serialized["commands"]
+
+
+def test_command_name():
+    assert command_name(["--quiet", "revert", "--all"]) == "revert"
+    assert command_name([b"log", b"-r", b"."]) == "log"
+    assert command_name([]) == ""
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import functools
+import hashlib
 import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import (
     datetime,
     timezone,
@@ -13,15 +18,34 @@ from enum import (
 from json.decoder import JSONDecodeError
 from typing import (
     Any,
+    Callable,
+    Hashable,
     Iterable,
     Optional,
+    TypeVar,
 )
+from urllib.parse import urlparse
 
 import requests
+from datadog import statsd
 from django.conf import settings
+from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Conduit methods which only read data, and so can safely be retried.
+IDEMPOTENT_METHODS = {"conduit.ping", "user.whoami"}
+IDEMPOTENT_METHOD_SUFFIXES = (".search", ".query")
+
+# HTTP statuses of responses to retry, typically returned by a proxy while
+# Phabricator is restarting.
+RETRY_STATUS_CODES = {502, 503, 504}
+
+# Maximum number of results conduit search methods return in a single page.
+CONDUIT_PAGE_LIMIT = 100
+
 
 @unique
 class PhabricatorRevisionStatus(Enum):
@@ -51,7 +75,10 @@ class PhabricatorRevisionStatus(Enum):
         return cls.UNEXPECTED_STATUS
 
     @classmethod
+    @functools.cache
     def meta(cls) -> dict:
+        # Cached, as the properties of statuses are read for every revision of
+        # every stack. The returned dictionary must not be modified.
         return {
             cls.ABANDONED: {
                 "name": "Abandoned",
@@ -160,13 +187,82 @@ class PhabricatorClient:
     underlying exception.
     """
 
+    # Sessions shared by all clients in this process, by host.
+    _shared_sessions: dict[str, requests.Session] = {}
+    _shared_sessions_lock = threading.Lock()
+
     def __init__(
-        self, url: str, api_token: str, *, session: Optional[requests.Session] = None
+        self,
+        url: str,
+        api_token: str,
+        *,
+        session: Optional[requests.Session] = None,
+        timeout: Optional[tuple[float, float]] = None,
     ):
         self.url_base = url
         self.api_url = url + "api/" if url[-1] == "/" else url + "/api/"
         self.api_token = api_token
-        self.session = session or self.create_session()
+        self.session = session or self.shared_session(self.api_url)
+
+        # The (connect, read) timeouts of each conduit call, in seconds.
+        self.timeout = timeout or (
+            settings.PHABRICATOR_CONNECT_TIMEOUT_SECONDS,
+            settings.PHABRICATOR_READ_TIMEOUT_SECONDS,
+        )
+
+        # Results memoized by `memoize`, if enabled. This is set to a dictionary
+        # shared by all the clients used while handling a single HTTP request.
+        self.request_cache: Optional[dict[Hashable, Any]] = None
+
+    def memoize(self, key: Hashable, fetch: Callable[[], T]) -> T:
+        """Return the result of `fetch`, memoized under `key` for the current request.
+
+        The result is shared with later calls using the same key, so it must not be
+        modified. If the client is not used for a request, `fetch` is always called.
+        """
+        if self.request_cache is None:
+            return fetch()
+
+        if key not in self.request_cache:
+            self.request_cache[key] = fetch()
+        return self.request_cache[key]
+
+    def gather(self, *calls: Callable[[], Any]) -> list[Any]:
+        """Run independent calls concurrently and return their results in order.
+
+        Each call is a function taking no arguments, which typically makes one or
+        more conduit calls with this client. At most
+        `settings.PHABRICATOR_MAX_CONCURRENT_CALLS` calls run at the same time.
+
+        Raises:
+            The exception raised by the first failing call, once all calls are
+            done.
+        """
+        max_workers = min(len(calls), settings.PHABRICATOR_MAX_CONCURRENT_CALLS)
+        if max_workers <= 1:
+            return [call() for call in calls]
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="conduit"
+        ) as executor:
+            futures = [executor.submit(call) for call in calls]
+        return [future.result() for future in futures]
+
+    def call_conduit_many(self, *calls: tuple[str, dict]) -> list[Any]:
+        """Make independent conduit calls concurrently, see `gather`.
+
+        Args:
+            *calls: Tuples of (method, parameters) for each conduit call.
+
+        Returns:
+            The result of each conduit call, in the same order as `calls`.
+        """
+        return self.gather(
+            *(
+                lambda method=method, params=params: self.call_conduit(method, **params)
+                for method, params in calls
+            )
+        )
 
     def call_conduit(self, method: str, **kwargs) -> Any:
         """Return the result of an RPC call to a conduit method.
@@ -198,8 +294,9 @@ class PhabricatorClient:
         del extra_data["params"]["__conduit__"]  # Sanitize the api token.
         logger.debug("call to conduit", extra=extra_data)
 
+        retries = settings.PHABRICATOR_RETRIES if self.is_idempotent(method) else 0
         try:
-            response = self.session.get(self.api_url + method, data=data).json()
+            response = self._get(method, data, retries).json()
         except requests.RequestException as exc:
             raise PhabricatorCommunicationException(
                 "An error occurred when communicating with Phabricator"
@@ -212,9 +309,65 @@ class PhabricatorClient:
         PhabricatorAPIException.raise_if_error(response)
         return response.get("result")
 
+    def _get(self, method: str, data: dict, retries: int) -> requests.Response:
+        """Send a request to the conduit `method`, retrying up to `retries` times.
+
+        Only connection errors, timeouts and responses with a status in
+        `RETRY_STATUS_CODES` are retried, with an exponential backoff.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(
+                    self.api_url + method, data=data, timeout=self.timeout
+                )
+                if attempt >= retries or response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                reason = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if attempt >= retries:
+                    raise
+                reason = str(exc)
+
+            delay = settings.PHABRICATOR_RETRY_BACKOFF_SECONDS * 2**attempt
+            attempt += 1
+            logger.warning(
+                f"Retrying conduit call to {method} in {delay}s "
+                f"(attempt {attempt} of {retries}): {reason}"
+            )
+            time.sleep(delay)
+
+    @staticmethod
+    def is_idempotent(method: str) -> bool:
+        """Return True if the conduit `method` can safely be retried."""
+        return method in IDEMPOTENT_METHODS or method.endswith(
+            IDEMPOTENT_METHOD_SUFFIXES
+        )
+
+    @classmethod
+    def shared_session(cls, url: str) -> requests.Session:
+        """Return the session shared by all clients of the host in `url`.
+
+        Sharing sessions lets connections to Phabricator be kept alive and reused
+        across requests, instead of paying for a new TCP and TLS handshake each
+        time. API tokens are sent with each call, so sessions hold no credentials.
+        """
+        host = urlparse(url).netloc
+        with cls._shared_sessions_lock:
+            if host not in cls._shared_sessions:
+                cls._shared_sessions[host] = cls.create_session()
+            return cls._shared_sessions[host]
+
     @staticmethod
     def create_session() -> requests.Session:
-        return requests.Session()
+        """Return a session with a pool of `settings.PHABRICATOR_POOL_SIZE`."""
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=settings.PHABRICATOR_POOL_SIZE
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
     @classmethod
     def single(
@@ -289,16 +442,29 @@ class PhabricatorClient:
         """
         return datetime.fromtimestamp(int(timestamp), timezone.utc)
 
-    def verify_api_token(self) -> bool:
+    def verify_api_token(self, cache_seconds: int = 0) -> bool:
         """Verifies that the api token is valid.
 
         Returns False if Phabricator returns an error code when checking this
         api token. Returns True if no errors are found.
+
+        If `cache_seconds` is set, a successful verification is cached for that
+        many seconds, under a hash of the api token.
         """
+        cache_key = (
+            "phabricator.verified."
+            + hashlib.sha256(self.api_token.encode("utf-8")).hexdigest()
+        )
+        if cache_seconds and cache.get(cache_key):
+            return True
+
         try:
             self.call_conduit("user.whoami")
         except PhabricatorAPIException:
             return False
+
+        if cache_seconds:
+            cache.set(cache_key, True, timeout=cache_seconds)
         return True
 
 
@@ -350,6 +516,116 @@ def result_list_to_phid_dict(
     return result
 
 
+class PhidCache:
+    """Cache the objects returned by a conduit search method, individually by PHID.
+
+    Searches only request the PHIDs missing from the cache, so overlapping searches
+    share cached objects. Objects are cached separately for each API token, as
+    different tokens may not see the same objects. PHIDs which are not found are
+    not cached, so that they are searched for again.
+
+    Objects may be cached under a version, such as the `dateModified` of the
+    revision a diff belongs to, so that they are fetched again once it changes.
+    """
+
+    def __init__(self, method: str, **params):
+        # The conduit search method, e.g. `user.search`, and the extra parameters
+        # to search with, e.g. attachments.
+        self.method = method
+        self.params = params
+
+        # Number of PHIDs found in, and missing from, the cache by this process.
+        self.hits = 0
+        self.misses = 0
+
+    def cache_key(
+        self, api_token: str, phid: str, version: Optional[str | int] = None
+    ) -> str:
+        """Return the key `phid` is cached under for `api_token`, at `version` if given."""
+        token_hash = hashlib.sha256(api_token.encode("utf-8")).hexdigest()[:16]
+        key = f"phabricator.{self.method}.{token_hash}.{phid}"
+        if self.params:
+            key += "." + ",".join(sorted(self.params.get("attachments", {})))
+        if version is not None:
+            key += f".{version}"
+        return key
+
+    def search(
+        self,
+        phabricator: PhabricatorClient,
+        phids: Iterable[str],
+        versions: Optional[dict[str, str | int]] = None,
+    ) -> dict[str, dict]:
+        """Return a dictionary mapping phid to data for the `phids` that were found.
+
+        Args:
+            phabricator: A PhabricatorClient instance, used to search for misses.
+            phids: The PHIDs of the objects to return.
+            versions: An optional version for each PHID.
+        """
+        versions = versions or {}
+        keys = {
+            phid: self.cache_key(phabricator.api_token, phid, versions.get(phid))
+            for phid in phids
+        }
+        cached = cache.get_many(keys.values())
+
+        result = {}
+        misses = []
+        for phid, key in keys.items():
+            if key in cached:
+                result[phid] = cached[key]
+            else:
+                misses.append(phid)
+
+        self.hits += len(keys) - len(misses)
+        self.misses += len(misses)
+        tags = [f"method:{self.method}"]
+        statsd.increment(
+            "lando-api.phabricator.cache.hits", len(keys) - len(misses), tags=tags
+        )
+        statsd.increment("lando-api.phabricator.cache.misses", len(misses), tags=tags)
+
+        if not misses:
+            return result
+
+        chunks = [
+            misses[i : i + CONDUIT_PAGE_LIMIT]
+            for i in range(0, len(misses), CONDUIT_PAGE_LIMIT)
+        ]
+        responses = phabricator.call_conduit_many(
+            *(
+                (
+                    self.method,
+                    {
+                        "constraints": {"phids": chunk},
+                        "limit": len(chunk),
+                        **self.params,
+                    },
+                )
+                for chunk in chunks
+            )
+        )
+        found = {}
+        for response in responses:
+            found.update(result_list_to_phid_dict(phabricator.expect(response, "data")))
+
+        result.update(found)
+        cache.set_many(
+            {keys[phid]: data for phid, data in found.items() if phid in keys},
+            timeout=settings.PHABRICATOR_OBJECT_CACHE_SECONDS,
+        )
+        return result
+
+
+USER_CACHE = PhidCache("user.search")
+PROJECT_CACHE = PhidCache("project.search")
+REPOSITORY_CACHE = PhidCache(
+    "diffusion.repository.search", attachments={"projects": True}
+)
+DIFF_CACHE = PhidCache("differential.diff.search", attachments={"commits": True})
+
+
 def get_phabricator_client(
     privileged: Optional[bool] = False, api_key: Optional[str] = None
 ) -> PhabricatorClient:
@@ -0,0 +1,123 @@
+"""Cached retrieval of product details documents, such as code freeze dates."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Optional
+
+import requests
+from datadog import statsd
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Name of the threads revalidating stale documents.
+REVALIDATION_THREAD_NAME = "product-details-revalidation"
+
+
+def _cache_key(url: str) -> str:
+    return "product_details." + hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def get_product_details(url: str) -> Optional[dict]:
+    """Return the product details document at `url`.
+
+    Documents are kept in the Django cache, shared by all processes, and only
+    revalidated once they are older than `settings.PRODUCT_DETAILS_CACHE_SECONDS`.
+    Revalidation is conditional on the `ETag` and `Last-Modified` of the cached
+    document, and done in the background by a single process at a time, while the
+    cached document keeps being used. If the document can't be retrieved, the
+    cached document is used for up to `settings.PRODUCT_DETAILS_MAX_STALE_SECONDS`.
+    Only documents which aren't cached, or are too stale, are fetched right away.
+
+    Returns:
+        The product details, or None if they could not be retrieved and no cached
+        document is available.
+    """
+    key = _cache_key(url)
+    entry = cache.get(key)
+    now = time.time()
+
+    if entry and now - entry["checked_at"] < settings.PRODUCT_DETAILS_CACHE_SECONDS:
+        statsd.increment("lando-api.product_details.cache", tags=["result:fresh"])
+        return entry["data"]
+
+    if (
+        not entry
+        or now - entry["validated_at"] > settings.PRODUCT_DETAILS_MAX_STALE_SECONDS
+    ):
+        return _fetch(url, key, entry, now)
+
+    # Only one process revalidates a stale document.
+    lock_key = f"{key}.lock"
+    if cache.add(lock_key, True, timeout=settings.PRODUCT_DETAILS_TIMEOUT_SECONDS * 2):
+        threading.Thread(
+            target=_revalidate,
+            args=(url, key, entry, now),
+            name=REVALIDATION_THREAD_NAME,
+            daemon=True,
+        ).start()
+
+    statsd.increment("lando-api.product_details.cache", tags=["result:stale"])
+    return entry["data"]
+
+
+def _revalidate(url: str, key: str, entry: dict, now: float):
+    """Revalidate the cached `entry` of the document at `url`, then release its lock."""
+    try:
+        _fetch(url, key, entry, now)
+    except Exception as e:
+        logger.exception(e)
+    finally:
+        # The lock is only released once the new entry is cached, so that other
+        # processes don't revalidate the document again in the meantime.
+        cache.delete(f"{key}.lock")
+
+
+def _fetch(url: str, key: str, entry: Optional[dict], now: float) -> Optional[dict]:
+    """Fetch, or revalidate the cached `entry` of, the document at `url`, and cache it.
+
+    Returns:
+        The product details, or None if they could not be retrieved and the cached
+        document, if any, is too stale to be used.
+    """
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        response = requests.get(
+            url, headers=headers, timeout=settings.PRODUCT_DETAILS_TIMEOUT_SECONDS
+        )
+        if entry and response.status_code == 304:
+            result = "not_modified"
+        else:
+            response.raise_for_status()
+            result = "miss"
+            entry = {
+                "data": response.json(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+        entry["validated_at"] = now
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.exception(e)
+        if not entry or (
+            now - entry["validated_at"] > settings.PRODUCT_DETAILS_MAX_STALE_SECONDS
+        ):
+            statsd.increment("lando-api.product_details.cache", tags=["result:error"])
+            return None
+
+        # Keep using the cached document, and only try again once it is stale.
+        result = "stale_on_error"
+
+    statsd.increment("lando-api.product_details.cache", tags=[f"result:{result}"])
+    entry["checked_at"] = now
+    cache.set(key, entry, timeout=settings.PRODUCT_DETAILS_MAX_STALE_SECONDS)
+    return entry["data"]
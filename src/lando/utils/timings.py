@@ -0,0 +1,105 @@
+"""Timing of the stages of long-running operations, such as landing jobs."""
+
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import monotonic
+from typing import Iterator, Optional
+
+from datadog import statsd
+
+logger = logging.getLogger(__name__)
+
+# The timings collecting the commands run in the current thread, if any.
+_current_timings: ContextVar[Optional[Timings]] = ContextVar(
+    "current_timings", default=None
+)
+
+
+class Timings:
+    """Collect the duration of named stages, and of the commands run during them.
+
+    Durations are measured with a monotonic clock, in seconds, and are also emitted
+    as statsd timings.
+    """
+
+    def __init__(self, metric: str, tags: Optional[list[str]] = None):
+        # Name of the statsd metric for stages, e.g. `lando-api.landing_job.stage`.
+        self.metric = metric
+        self.tags = tags or []
+
+        # Total duration of each stage.
+        self.stages: dict[str, float] = {}
+
+        # Number of runs, and total duration, of each command.
+        self.commands: dict[str, dict[str, float]] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as stage `name`.
+
+        Commands run by the current thread while in the block are timed too.
+        """
+        start = monotonic()
+        token = _current_timings.set(self)
+        try:
+            yield
+        finally:
+            _current_timings.reset(token)
+            duration = monotonic() - start
+            self.stages[name] = self.stages.get(name, 0.0) + duration
+            statsd.timing(
+                self.metric, duration * 1000, tags=self.tags + [f"stage:{name}"]
+            )
+
+    def add_command(self, command: str, duration: float):
+        """Record a run of `command` that took `duration` seconds."""
+        entry = self.commands.setdefault(command, {"count": 0, "seconds": 0.0})
+        entry["count"] += 1
+        entry["seconds"] += duration
+
+    def serialize(self) -> dict:
+        """Return a JSON compatible dictionary, with durations rounded to the ms."""
+        return {
+            "stages": {
+                name: round(seconds, 3) for name, seconds in self.stages.items()
+            },
+            "commands": {
+                command: {
+                    "count": int(entry["count"]),
+                    "seconds": round(entry["seconds"], 3),
+                }
+                for command, entry in self.commands.items()
+            },
+        }
+
+
+def command_name(args: list[str | bytes]) -> str:
+    """Return the name of the subcommand in `args`, skipping any leading options."""
+    for arg in args:
+        if isinstance(arg, bytes):
+            arg = arg.decode(errors="replace")
+        if not arg.startswith("-"):
+            return arg
+    return ""
+
+
+@contextmanager
+def time_command(command: str) -> Iterator[None]:
+    """Time a run of `command`, e.g. `hg pull`.
+
+    The duration is emitted as a statsd timing, and added to the stage being timed
+    in the current thread, if any.
+    """
+    start = monotonic()
+    try:
+        yield
+    finally:
+        duration = monotonic() - start
+        statsd.timing(
+            "lando-api.scm.command", duration * 1000, tags=[f"command:{command}"]
+        )
+        if timings := _current_timings.get():
+            timings.add_command(command, duration)